@@ -1,24 +1,74 @@
 import numpy as np
 
 from poker.cards import Card, Rank, Suit
-from poker.state import GameStage, State
-from poker.q_function import get_model
+from poker.state import State
+from poker.features import LEN_PRIVATE_STATE, encode_private_state
+from poker.policy import Policy, random_weights
+from poker.q_backends import KerasQBackend
 
 
 class Agent:
-    def __init__(self, player_index=0, actions=[-1, 0, 1, 2, 3]):
+    def __init__(
+        self,
+        player_index=0,
+        actions=[-1, 0, 1, 2, 3],
+        weights=None,
+        model=None,
+        policy=None,
+        q_backend=None,
+        verbose=False,
+        rng=None,
+    ):
 
         self.player_index = player_index
 
+        self.rng = np.random.default_rng() if rng is None else rng
+
         self.actions = actions
 
-        self.len_private_state = 13
+        self.len_private_state = LEN_PRIVATE_STATE
         self.n_inputs = self.len_private_state + 1
 
-        # Note: the number of inputs is equal to the length of the private state vector plus one (for the actions)
-        self.model = get_model(
-            n_actions=len(self.actions), n_inputs=self.n_inputs
+        # Note: model inputs for all actions are written into this buffer, whose last column
+        #  (the actions) never changes
+        self.action_indexes = {action: index for index, action in enumerate(actions)}
+        self.model_input_buffer = np.empty(
+            (len(actions), self.n_inputs), dtype=np.float32
         )
+        self.model_input_buffer[:, -1] = actions
+
+        # Note: private states are encoded into this buffer, which is overwritten
+        #  whenever the agent encodes a new state
+        self.private_state_buffer = np.empty(LEN_PRIVATE_STATE, dtype=np.float32)
+
+        self.cached_game_state = None
+        self.cached_n_actions_taken = None
+        self.cached_private_state = None
+        self.cached_q = None
+
+        # Note: the q function is a pluggable backend (see poker.q_backends) with predict_batch,
+        #  update_batch, save and load methods. By default, it is a keras network
+        if q_backend is None:
+
+            # Note: the number of inputs is equal to the length of the private state vector plus one (for the actions)
+            q_backend = KerasQBackend(
+                self.n_inputs,
+                n_actions=len(self.actions),
+                model=model,
+                policy=policy,
+                weights=weights,
+                verbose=verbose,
+            )
+
+        self.q_backend = q_backend
+
+    def get_weights(self):
+
+        return self.q_backend.get_weights()
+
+    def set_weights(self, weights):
+
+        self.q_backend.set_weights(weights)
 
     def describe_learned_q_function(self, n_iter=20):
 
@@ -31,7 +81,7 @@ class Agent:
 
             model_input = self.get_model_input(private_state, self.actions)
 
-            q = self.model.predict(model_input)[:, 0]
+            q = self.q_backend.predict_batch(model_input)
 
             print(
                 f"Value at stage {game_state.game_stage.name} with private cards {private_cards}: {q}"
@@ -39,68 +89,59 @@ class Agent:
 
     def get_private_state(self, game_state):
 
-        # Note: the player is not allowed to see the other player's private cards!
-
-        game_stage = game_state.game_stage
-        first_hole_card = game_state.hole_cards[self.player_index][0]
-        second_hole_card = game_state.hole_cards[self.player_index][1]
-
-        public_cards = [-1, -1, -1, -1, -1, -1]
-
-        if game_state.game_stage != GameStage.PRE_FLOP:
-            public_cards = [
-                game_state.public_cards[0].rank,
-                game_state.public_cards[0].suit,
-                game_state.public_cards[1].rank,
-                game_state.public_cards[1].suit,
-                game_state.public_cards[2].rank,
-                game_state.public_cards[2].suit,
-            ]
-
-        own_wealth = game_state.wealth[self.player_index]
-        total_bet_by_self = game_state.total_bet_by_player(self.player_index)
-
-        private_state = [
-            game_stage,
-            first_hole_card.rank,
-            first_hole_card.suit,
-            second_hole_card.rank,
-            second_hole_card.suit,
-            own_wealth,
-            total_bet_by_self,
-        ] + public_cards
+        # Note: the encoding of the most recent state is cached, since it is typically needed
+        #  several times per decision (e.g. by get_private_state, get_action and predicted_q)
+        if (
+            game_state is self.cached_game_state
+            and game_state.n_actions_taken == self.cached_n_actions_taken
+        ):
+            return self.cached_private_state
+
+        # Note: the returned array is the agent's buffer, so callers that keep it (e.g. in
+        #  transitions) must copy it before the agent sees another state
+        private_state = encode_private_state(
+            game_state, self.player_index, out=self.private_state_buffer
+        )
+
+        self.cached_game_state = game_state
+        self.cached_n_actions_taken = game_state.n_actions_taken
+        self.cached_private_state = private_state
+        self.cached_q = None
 
         return private_state
 
     def random_legal_action(self, minimum_legal_bet, maximum_legal_bet):
 
-        action_probabilities = []
-        for action in self.actions:
-
-            # Note: negative actions indicate folding, which is always a legal action
-            if action < 0 or (minimum_legal_bet <= action <= maximum_legal_bet):
-                action_probabilities.append(1.0)
-            else:
-                action_probabilities.append(0.0)
+        # Note: negative actions indicate folding, which is always a legal action
+        legal_actions = [
+            action
+            for action in self.actions
+            if action < 0 or (minimum_legal_bet <= action <= maximum_legal_bet)
+        ]
 
-        action_probabilities = np.array(action_probabilities) / sum(
-            action_probabilities
-        )
-        return np.random.choice(self.actions, p=action_probabilities)
+        # Note: every legal action is equally likely
+        return legal_actions[self.rng.integers(len(legal_actions))]
 
     def predicted_q(self, private_state, action):
 
+        # Note: get_action may already have predicted q at this private state
+        if private_state is self.cached_private_state and self.cached_q is not None:
+            return self.cached_q[self.action_indexes[action]]
+
         model_input = self.get_model_input(private_state, actions=[action])
-        return self.model.predict(model_input)[0, 0]
+        return self.q_backend.predict_batch(model_input)[0]
 
     def get_model_input(self, private_state, actions):
 
-        model_input = np.zeros((len(actions), self.n_inputs))
-        private_state = np.expand_dims(np.array(private_state), 0)
-        model_input[0:len(actions), 0:self.len_private_state] = np.repeat(
-            private_state, len(actions), 0
-        )
-        model_input[:, -1] = actions
+        # Note: the input for all of the agent's actions reuses a buffer, which is overwritten
+        #  by the next call (so callers must not keep it)
+        if actions is self.actions:
+            model_input = self.model_input_buffer
+        else:
+            model_input = np.empty((len(actions), self.n_inputs), dtype=np.float32)
+            model_input[:, -1] = actions
+
+        model_input[:, :-1] = private_state
 
         return model_input
 
@@ -109,25 +150,57 @@ class Agent:
         model_input = self.get_model_input(private_state, actions=[action])
         y = np.array([updated_guess_for_q])
 
-        self.model.fit(
-            x=model_input, y=y, epochs=1, batch_size=1, steps_per_epoch=1, verbose=0
+        self.q_backend.update_batch(model_input, y)
+
+        self.cached_q = None
+
+    def update_q_batch(self, private_states, actions, updated_guesses_for_q):
+
+        model_input = np.column_stack([private_states, actions])
+
+        # Note: one update on the whole minibatch
+        self.q_backend.update_batch(model_input, updated_guesses_for_q)
+
+        self.cached_q = None
+
+    def update_q_from_replay(self, replay_buffer, batch_size):
+
+        (
+            private_states,
+            actions,
+            rewards,
+            next_private_states,
+            next_actions,
+            terminal,
+        ) = replay_buffer.sample(batch_size)
+
+        # Note: SARSA targets are computed with the current q function at training time,
+        #  rather than with the (possibly stale) q function at the time the transition was played
+        continuation_values = self.q_backend.predict_batch(
+            np.column_stack([next_private_states, next_actions])
         )
+        updated_guesses_for_q = rewards + np.where(terminal, 0.0, continuation_values)
+
+        self.update_q_batch(private_states, actions, updated_guesses_for_q)
 
     def get_action(self, game_state, proba_random_action=0.8):
 
         minimum_legal_bet = game_state.minimum_legal_bet()
         maximum_legal_bet = game_state.maximum_legal_bet()
 
-        if np.random.uniform() < proba_random_action:
+        if self.rng.random() < proba_random_action:
 
             return self.random_legal_action(minimum_legal_bet, maximum_legal_bet)
 
         private_state = self.get_private_state(game_state)
 
-        model_input = self.get_model_input(private_state, self.actions)
+        # Note: the backend returns predicted action-values of shape (len(self.actions),)
+        #  We keep them for predicted_q, and mask illegal actions in a copy
+        if self.cached_q is None:
+            model_input = self.get_model_input(private_state, self.actions)
+            self.cached_q = self.q_backend.predict_batch(model_input)
 
-        # Note: the model returns predicted action-values of shape (len(self.actions), 1)
-        q_at_private_state = self.model.predict(model_input)[:, 0]
+        q_at_private_state = self.cached_q.copy()
 
         for index, action in enumerate(self.actions):
 
@@ -140,3 +213,17 @@ class Agent:
         #  even when they aren't exploring. Optimal strategy is likely _not_ deterministic play!
         action_index = np.argmax(q_at_private_state)
         return self.actions[action_index]
+
+
+def random_policy_players(rng, n_players=3):
+
+    # Note: the seats share one policy with random weights (e.g. for benchmarks and profiling)
+    policy = Policy()
+    players = [Agent(player_index, policy=policy) for player_index in range(n_players)]
+
+    policy.set_weights(random_weights(rng, players[0].n_inputs))
+
+    for player in players:
+        player.q_backend.sync_policy()
+
+    return players
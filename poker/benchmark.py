@@ -0,0 +1,289 @@
+import argparse
+import contextlib
+import copy
+import io
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+
+from poker.agent import random_policy_players
+from poker.cards import FULL_DECK
+from poker.hands import best_hand_strength, strength
+from poker.play import run_one_episode
+from poker.state import State
+
+# Note: a benchmark regresses if it is more than this fraction slower than the baseline
+DEFAULT_THRESHOLD = 0.2
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+
+    """
+    Register a benchmark. A benchmark takes a random number generator and returns a function
+    which performs a batch of operations and returns how many operations it performed
+    (any setup that should not be timed happens before that function is returned)
+    """
+
+    def register(function):
+
+        BENCHMARKS[name] = function
+        return function
+
+    return register
+
+
+def operations_per_second(run_batch, min_seconds, n_repeats):
+
+    # Note: one untimed batch to warm up caches, then the best of n_repeats timings,
+    #  since noise from other processes can only make a benchmark slower
+    run_batch()
+
+    best = 0.0
+
+    for _ in range(n_repeats):
+
+        n_operations = 0
+        start_time = time.perf_counter()
+
+        while True:
+
+            n_operations += run_batch()
+            elapsed = time.perf_counter() - start_time
+
+            if elapsed >= min_seconds:
+                break
+
+        best = max(best, n_operations / elapsed)
+
+    return best
+
+
+def random_hands(rng, n_hands, n_cards):
+
+    return [
+        [
+            FULL_DECK[index]
+            for index in rng.choice(len(FULL_DECK), n_cards, replace=False)
+        ]
+        for _ in range(n_hands)
+    ]
+
+
+def random_legal_action(rng, game_state, actions=(-1, 0, 1, 2, 3)):
+
+    minimum_legal_bet = game_state.minimum_legal_bet()
+    maximum_legal_bet = game_state.maximum_legal_bet()
+
+    legal_actions = [
+        action
+        for action in actions
+        if action < 0 or minimum_legal_bet <= action <= maximum_legal_bet
+    ]
+
+    return legal_actions[rng.integers(len(legal_actions))]
+
+
+@benchmark("strength")
+def benchmark_strength(rng):
+
+    hands = random_hands(rng, 10_000, 5)
+
+    def run_batch():
+
+        for hand in hands:
+            strength(hand)
+
+        return len(hands)
+
+    return run_batch
+
+
+@benchmark("best_hand_strength")
+def benchmark_best_hand_strength(rng):
+
+    hands = random_hands(rng, 10_000, 7)
+
+    # Note: make sure the seven card tables are loaded before timing starts
+    best_hand_strength(hands[0][:5], hands[0][5:])
+
+    def run_batch():
+
+        for hand in hands:
+            best_hand_strength(hand[:5], hand[5:])
+
+        return len(hands)
+
+    return run_batch
+
+
+@benchmark("state_construction")
+def benchmark_state_construction(rng):
+    def run_batch():
+
+        # Note: the States share the benchmark's generator, so that creating one is not timed
+        for _ in range(1_000):
+            State(n_players=3, rng=rng)
+
+        return 1_000
+
+    return run_batch
+
+
+@benchmark("state_update")
+def benchmark_state_update(rng):
+
+    # Note: actions are chosen ahead of time, so that only State.update is timed
+    #  (an action that turns out to be illegal is replaced by folding, which is always legal)
+    proposed_actions = rng.integers(-1, 4, size=10_000).tolist()
+
+    def run_batch():
+
+        game_state = State(n_players=3)
+
+        for action in proposed_actions:
+
+            if action >= 0 and not (
+                game_state.minimum_legal_bet()
+                <= action
+                <= game_state.maximum_legal_bet()
+            ):
+                action = -1
+
+            game_state.update(action)
+
+            if game_state.terminal:
+                game_state = State(n_players=3)
+
+        return len(proposed_actions)
+
+    return run_batch
+
+
+@benchmark("agent_get_action")
+def benchmark_agent_get_action(rng):
+
+    players = random_policy_players(rng)
+
+    # Note: a sample of the states reached under random play
+    game_states = []
+    game_state = State(n_players=3)
+
+    while len(game_states) < 1_000:
+
+        game_states.append(copy.deepcopy(game_state))
+        game_state.update(random_legal_action(rng, game_state))
+
+        if game_state.terminal:
+            game_state = State(n_players=3)
+
+    def run_batch():
+
+        for game_state in game_states:
+            players[game_state.current_player].get_action(
+                game_state, proba_random_action=0.0
+            )
+
+        return len(game_states)
+
+    return run_batch
+
+
+@benchmark("run_one_episode")
+def benchmark_run_one_episode(rng):
+
+    players = random_policy_players(rng)
+
+    def run_batch():
+
+        # Note: a late episode, so that players mostly act greedily (and call their q function)
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_one_episode(10_000, players, learn=False)
+
+        return 1
+
+    return run_batch
+
+
+def run_benchmarks(names=None, min_seconds=1.0, n_repeats=3, seed=0):
+
+    results = {}
+
+    for name in names or BENCHMARKS:
+
+        run_batch = BENCHMARKS[name](np.random.default_rng(seed))
+        results[name] = operations_per_second(run_batch, min_seconds, n_repeats)
+
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "operations_per_second": results,
+    }
+
+
+def compare_to_baseline(results, baseline, threshold=DEFAULT_THRESHOLD):
+
+    """
+    Return {name: current / baseline throughput} for the benchmarks in both results,
+    and the names of the benchmarks whose throughput dropped by more than threshold
+    """
+
+    current = results["operations_per_second"]
+    previous = baseline["operations_per_second"]
+
+    ratios = {
+        name: current[name] / previous[name] for name in current if name in previous
+    }
+    regressions = [name for name, ratio in ratios.items() if ratio < 1 - threshold]
+
+    return ratios, regressions
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark hand evaluation, game state updates and agents"
+    )
+    parser.add_argument("--benchmarks", nargs="*", choices=sorted(BENCHMARKS))
+    parser.add_argument("--min-seconds", type=float, default=1.0)
+    parser.add_argument("--n-repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against this JSON file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    results = run_benchmarks(
+        args.benchmarks, args.min_seconds, args.n_repeats, args.seed
+    )
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+
+    if not args.baseline:
+        print(json.dumps(results, indent=2))
+        return
+
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+
+    ratios, regressions = compare_to_baseline(results, baseline, args.threshold)
+
+    for name, ratio in ratios.items():
+        flag = "  REGRESSION" if name in regressions else ""
+        print(
+            f"{name:<20} {results['operations_per_second'][name]:>14,.1f}/s"
+            f" {ratio:>7.2f}x baseline{flag}"
+        )
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -30,21 +30,57 @@ class Rank(IntEnum):
     ACE = 12
 
 
-class Card:
-    def __init__(self, rank, suit):
-        self.rank = rank
-        self.suit = suit
+RANKS = tuple(Rank)
+SUITS = tuple(Suit)
 
-    def __eq__(self, other):
-        return self.rank == other.rank and self.suit == other.suit
+
+class Card(int):
+
+    # Note: a card is stored as its index in FULL_DECK (an int between 0 and 51), so cards
+    #  can be compared, hashed and used to index lookup tables directly. The rank and suit are
+    #  a readable view over that index
+    __slots__ = ()
+
+    def __new__(cls, rank, suit):
+        return super().__new__(cls, suit + rank * len(Suit))
+
+    def __getnewargs__(self):
+        return self.rank, self.suit
+
+    @property
+    def rank(self):
+        return RANKS[self // len(Suit)]
+
+    @property
+    def suit(self):
+        return SUITS[self % len(Suit)]
 
     def __repr__(self):
         # Example: "SIX of HEARTS"
         return f"{self.rank.name} of {self.suit.name}"
 
+    __str__ = __repr__
+
 
 FULL_DECK = tuple(Card(rank, suit) for rank in Rank for suit in Suit)
 
+# Note: a set of cards can be stored as a 52-bit mask, where bit i is set if FULL_DECK[i] is in the set
+FULL_DECK_MASK = (1 << len(FULL_DECK)) - 1
+
 
 def card_index(card):
-    return card.suit + card.rank * len(Suit)
+    return int(card)
+
+
+def cards_to_mask(cards):
+
+    mask = 0
+    for card in cards:
+        mask |= 1 << card
+
+    return mask
+
+
+def mask_to_cards(mask):
+
+    return [card for card in FULL_DECK if mask >> card & 1]
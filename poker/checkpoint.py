@@ -0,0 +1,129 @@
+import json
+import os
+import queue
+import threading
+
+import numpy as np
+
+
+def save_checkpoint(path, arrays, metadata):
+
+    """
+    Write a dictionary of arrays and a JSON-serializable metadata dictionary to path (an .npz file)
+    The file is written next to path and then renamed, so a crash never leaves a partial checkpoint
+    """
+
+    temporary_path = f"{path}.tmp"
+
+    with open(temporary_path, "wb") as checkpoint_file:
+        np.savez(checkpoint_file, metadata=np.array(json.dumps(metadata)), **arrays)
+
+    os.replace(temporary_path, path)
+
+
+def load_checkpoint(path):
+
+    with np.load(path) as checkpoint_file:
+        metadata = json.loads(str(checkpoint_file["metadata"]))
+        arrays = {
+            name: checkpoint_file[name]
+            for name in checkpoint_file.files
+            if name != "metadata"
+        }
+
+    return arrays, metadata
+
+
+def with_prefix(prefix, arrays):
+
+    return {f"{prefix}/{name}": array for name, array in arrays.items()}
+
+
+def without_prefix(prefix, arrays):
+
+    return {
+        name[len(prefix) + 1 :]: array
+        for name, array in arrays.items()
+        if name.startswith(f"{prefix}/")
+    }
+
+
+def get_rng_states(rngs):
+
+    return [rng.bit_generator.state for rng in rngs]
+
+
+def set_rng_states(rngs, rng_states):
+
+    # Note: generators are restored in place, since they are shared with seats, buffers, etc.
+    for rng, rng_state in zip(rngs, rng_states):
+        rng.bit_generator.state = rng_state
+
+
+class Checkpointer:
+
+    """
+    Save checkpoints to path on a background thread, so that training does not wait on the
+    file system. Each checkpoint replaces the previous one. The arrays given to save must not be
+    modified afterwards (e.g. copies, or read-only published weights). If saving falls more than
+    max_pending_checkpoints behind, save blocks until the thread catches up
+    If a checkpoint can't be written, the error is raised by the next call to save or close
+    """
+
+    def __init__(self, path, max_pending_checkpoints=1):
+
+        self.path = path
+        self.n_saved = 0
+        self.error = None
+
+        self.pending_checkpoints = queue.Queue(maxsize=max_pending_checkpoints)
+        self.thread = threading.Thread(
+            target=self.write_pending_checkpoints, daemon=True
+        )
+        self.thread.start()
+
+    def write_pending_checkpoints(self):
+
+        while True:
+
+            checkpoint = self.pending_checkpoints.get()
+
+            # Note: None tells the thread to stop
+            if checkpoint is None:
+                break
+
+            # Note: after an error, the thread keeps taking checkpoints off the queue
+            #  (so that save never waits for it forever), but doesn't write them
+            if self.error is not None:
+                continue
+
+            try:
+                save_checkpoint(self.path, *checkpoint)
+            except Exception as error:
+                self.error = error
+            else:
+                self.n_saved += 1
+
+    def raise_error(self):
+
+        if self.error is not None:
+            raise self.error
+
+    def save(self, arrays, metadata):
+
+        self.raise_error()
+        self.pending_checkpoints.put((arrays, metadata))
+
+    def close(self):
+
+        self.pending_checkpoints.put(None)
+        self.thread.join()
+        self.raise_error()
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, *exc_info):
+
+        self.close()
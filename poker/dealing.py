@@ -0,0 +1,97 @@
+import numpy as np
+
+from poker.cards import FULL_DECK
+
+# Note: indexing this with an array of card indexes gives the corresponding Card objects
+FULL_DECK_ARRAY = np.array(FULL_DECK, dtype=object)
+
+
+def n_cards_to_deal(n_players):
+
+    # Note: two hole cards per player, and five public cards
+    return min(2 * n_players + 5, len(FULL_DECK))
+
+
+def partial_shuffle(n_cards, rng):
+
+    """
+    Return the full deck as a list, in which the last n_cards cards are a uniformly random draw
+    (the deck is dealt by popping cards off of its end). This is a Fisher-Yates shuffle that stops
+    after n_cards swaps, since the order of the cards that are never dealt does not matter
+    """
+
+    deck = list(FULL_DECK)
+    uniforms = rng.random(n_cards).tolist()
+
+    for offset, uniform in enumerate(uniforms):
+
+        position = len(deck) - 1 - offset
+        other_position = int(uniform * (position + 1))
+
+        deck[position], deck[other_position] = deck[other_position], deck[position]
+
+    return deck
+
+
+def generate_decks(n_decks, n_cards, rng):
+
+    """
+    The vectorized version of partial_shuffle: return an (n_decks, 52) array of card indexes,
+    where the last n_cards columns of each row are an independent uniformly random draw
+    """
+
+    decks = np.tile(np.arange(len(FULL_DECK)), (n_decks, 1))
+    uniforms = rng.random((n_decks, n_cards))
+    rows = np.arange(n_decks)
+
+    for offset in range(n_cards):
+
+        position = len(FULL_DECK) - 1 - offset
+        other_positions = (uniforms[:, offset] * (position + 1)).astype(np.int64)
+
+        swapped_cards = decks[rows, other_positions]
+        decks[rows, other_positions] = decks[:, position]
+        decks[:, position] = swapped_cards
+
+    return decks
+
+
+class DeckBuffer:
+
+    """
+    Deal decks (as lists of Cards, like partial_shuffle) from batches of buffer_size decks
+    that are generated all at once, which is much faster than shuffling one deck at a time
+    Several States can share one buffer
+    """
+
+    def __init__(self, n_cards, rng=None, buffer_size=4096):
+
+        self.n_cards = n_cards
+        self.rng = np.random.default_rng() if rng is None else rng
+        self.buffer_size = buffer_size
+
+        self.decks = []
+
+    def next_deck(self):
+
+        if not self.decks:
+
+            # Note: we pop decks off of the end of the list, so we reverse it to deal them in order
+            self.decks = FULL_DECK_ARRAY[
+                generate_decks(self.buffer_size, self.n_cards, self.rng)
+            ].tolist()
+            self.decks.reverse()
+
+        return self.decks.pop()
+
+    def get_state(self):
+
+        # Note: the decks that have been generated but not dealt yet, in the order they will be dealt
+        decks = np.array(self.decks[::-1], dtype=np.int64).reshape(-1, len(FULL_DECK))
+
+        return {"decks": decks}
+
+    def set_state(self, state):
+
+        self.decks = FULL_DECK_ARRAY[state["decks"]].tolist()
+        self.decks.reverse()
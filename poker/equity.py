@@ -0,0 +1,239 @@
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from poker.cards import FULL_DECK, cards_to_mask
+from poker.hands import batch_hand_strength
+
+N_PUBLIC_CARDS = 5
+
+# Note: equity is the expected share of the pot (a win counts as 1, a k-way tie as 1 / k),
+#  and standard_error is the standard error of the equity estimate
+Equity = namedtuple("Equity", ["win", "tie", "equity", "standard_error", "n_samples"])
+
+
+def sample_showdowns(hole_cards, public_cards, n_opponents, n_samples, seed):
+
+    """
+    Deal n_samples random completions of the board and random hole cards for n_opponents,
+    and return the totals (n_samples, wins, ties, sum of pot shares, sum of squared pot shares)
+    """
+
+    rng = np.random.default_rng(seed)
+
+    dead_cards_mask = cards_to_mask(hole_cards) | cards_to_mask(public_cards)
+    live_cards = np.array(
+        [card for card in FULL_DECK if not dead_cards_mask >> card & 1], dtype=np.int32
+    )
+
+    n_missing_public_cards = N_PUBLIC_CARDS - len(public_cards)
+    n_cards_to_deal = n_missing_public_cards + 2 * n_opponents
+
+    # Note: sorting uniform random numbers gives every row an independent random permutation,
+    #  of which we only need the first n_cards_to_deal cards
+    permutations = np.argsort(rng.random((n_samples, len(live_cards))), axis=1)
+    dealt_cards = live_cards[permutations[:, :n_cards_to_deal]]
+
+    public_cards = np.concatenate(
+        [
+            np.broadcast_to(
+                np.array(public_cards, dtype=np.int32), (n_samples, len(public_cards))
+            ),
+            dealt_cards[:, :n_missing_public_cards],
+        ],
+        axis=1,
+    )
+
+    # Note: the player's own hole cards come first, followed by each opponent's hole cards
+    hole_cards = np.concatenate(
+        [
+            np.broadcast_to(np.array(hole_cards, dtype=np.int32), (n_samples, 1, 2)),
+            dealt_cards[:, n_missing_public_cards:].reshape(n_samples, n_opponents, 2),
+        ],
+        axis=1,
+    )
+
+    hands = np.concatenate(
+        [
+            np.broadcast_to(
+                public_cards[:, np.newaxis, :],
+                (n_samples, n_opponents + 1, N_PUBLIC_CARDS),
+            ),
+            hole_cards,
+        ],
+        axis=2,
+    )
+
+    hand_strengths = batch_hand_strength(hands.reshape(-1, hands.shape[2])).reshape(
+        n_samples, n_opponents + 1
+    )
+
+    own_strengths = hand_strengths[:, 0]
+    opponent_strengths = hand_strengths[:, 1:]
+
+    best_opponent_strengths = opponent_strengths.max(axis=1)
+
+    wins = own_strengths > best_opponent_strengths
+    ties = own_strengths == best_opponent_strengths
+
+    n_tied_opponents = (opponent_strengths == own_strengths[:, np.newaxis]).sum(axis=1)
+    pot_shares = np.where(wins, 1.0, np.where(ties, 1.0 / (1 + n_tied_opponents), 0.0))
+
+    return np.array(
+        [
+            n_samples,
+            wins.sum(),
+            ties.sum(),
+            pot_shares.sum(),
+            np.square(pot_shares).sum(),
+        ]
+    )
+
+
+def summarize(totals):
+
+    n_samples, wins, ties, pot_shares, squared_pot_shares = totals
+
+    equity = pot_shares / n_samples
+    variance = max(squared_pot_shares / n_samples - equity**2, 0.0)
+
+    return Equity(
+        win=float(wins / n_samples),
+        tie=float(ties / n_samples),
+        equity=float(equity),
+        standard_error=float(np.sqrt(variance / n_samples)),
+        n_samples=int(n_samples),
+    )
+
+
+def estimate_equity(
+    hole_cards,
+    public_cards=(),
+    n_opponents=1,
+    target_standard_error=None,
+    time_budget=None,
+    max_samples=1_000_000,
+    batch_size=10_000,
+    n_workers=1,
+    seed=None,
+):
+
+    """
+    Monte Carlo estimate of the win, tie and equity probabilities of hole_cards against
+    n_opponents players holding random hole cards, given zero to five public_cards
+    Sampling stops as soon as the standard error is at most target_standard_error, time_budget
+    seconds have elapsed, or max_samples showdowns have been dealt (whichever comes first)
+    Batches are sampled in a pool of n_workers processes when n_workers > 1
+    """
+
+    if n_opponents < 1:
+        raise ValueError(f"n_opponents must be at least 1, not {n_opponents}")
+
+    hole_cards = [int(card) for card in hole_cards]
+    public_cards = [int(card) for card in public_cards]
+
+    if len(hole_cards) != 2:
+        raise ValueError(f"there must be 2 hole cards, not {len(hole_cards)}")
+
+    if len(public_cards) > N_PUBLIC_CARDS:
+        raise ValueError(
+            f"there can be at most {N_PUBLIC_CARDS} public cards, not {len(public_cards)}"
+        )
+
+    known_cards = hole_cards + public_cards
+    if len(set(known_cards)) != len(known_cards):
+        raise ValueError("the hole cards and public cards must all be different cards")
+
+    # Note: the rest of the board and the opponents' hole cards are dealt from the cards left
+    n_cards_to_deal = N_PUBLIC_CARDS - len(public_cards) + 2 * n_opponents
+    if n_cards_to_deal > len(FULL_DECK) - len(known_cards):
+        raise ValueError(
+            f"there are not enough cards left to deal hole cards to {n_opponents} opponents"
+        )
+
+    start_time = time.perf_counter()
+    seed_sequence = np.random.SeedSequence(seed)
+    totals = np.zeros(5)
+    n_samples_submitted = 0
+
+    def should_stop():
+
+        if totals[0] >= max_samples:
+            return True
+
+        if time_budget is not None and time.perf_counter() - start_time >= time_budget:
+            return totals[0] > 0
+
+        if target_standard_error is not None and totals[0] > 0:
+            return summarize(totals).standard_error <= target_standard_error
+
+        return False
+
+    def batch_arguments():
+
+        nonlocal n_samples_submitted
+
+        # Note: the last batch is cut short, so that no more than max_samples showdowns are dealt
+        n_samples = int(min(batch_size, max_samples - n_samples_submitted))
+        n_samples_submitted += n_samples
+
+        return (
+            hole_cards,
+            public_cards,
+            n_opponents,
+            n_samples,
+            seed_sequence.spawn(1)[0],
+        )
+
+    if n_workers <= 1:
+
+        while not should_stop():
+            totals += sample_showdowns(*batch_arguments())
+
+        return summarize(totals)
+
+    with ProcessPoolExecutor(n_workers) as executor:
+
+        # Note: we keep two batches in flight per worker, so that workers never wait for us
+        pending = set()
+        while len(pending) < 2 * n_workers and n_samples_submitted < max_samples:
+            pending.add(executor.submit(sample_showdowns, *batch_arguments()))
+
+        while pending:
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                totals += future.result()
+
+            if should_stop():
+
+                for future in pending:
+                    future.cancel()
+
+                break
+
+            for _ in done:
+                if n_samples_submitted < max_samples:
+                    pending.add(executor.submit(sample_showdowns, *batch_arguments()))
+
+    return summarize(totals)
+
+
+def estimate_equity_at_state(game_state, player_index, **kwargs):
+
+    # Note: the player's opponents are the other players who have not folded
+    n_opponents = sum(
+        not has_folded
+        for player, has_folded in enumerate(game_state.has_folded)
+        if player != player_index
+    )
+
+    return estimate_equity(
+        game_state.hole_cards[player_index],
+        game_state.public_cards,
+        n_opponents=n_opponents,
+        **kwargs,
+    )
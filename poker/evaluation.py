@@ -0,0 +1,285 @@
+import argparse
+import json
+import multiprocessing
+
+import numpy as np
+
+from poker.agent import Agent
+from poker.dealing import FULL_DECK_ARRAY, generate_decks, n_cards_to_deal
+from poker.inference import load_weights
+from poker.policy import Policy
+from poker.state import State
+from poker.utils import spawn_generators
+
+# Note: the policies of the two contestants, set once in every worker process by initialize_worker
+WORKER_POLICIES = {}
+
+
+class HandResult:
+
+    """
+    A recorder (see poker.state.State) that keeps the change in every player's wealth
+    over the first hand played in a State, and ignores the hands after it
+    """
+
+    def __init__(self):
+
+        self.wealth_deltas = None
+
+    def start_hand(self, deck, dealer):
+
+        pass
+
+    def record_action(self, game_state, action):
+
+        pass
+
+    def end_hand(self, game_state, winning_players, wealth_before):
+
+        if self.wealth_deltas is None:
+            self.wealth_deltas = np.subtract(game_state.wealth, wealth_before)
+
+
+def initialize_worker(candidate_weights, baseline_weights):
+
+    # Note: a contestant without weights plays uniformly random legal actions, and its policy
+    #  is never used (so no model is ever built)
+    WORKER_POLICIES["candidate"] = Policy(candidate_weights)
+    WORKER_POLICIES["baseline"] = Policy(baseline_weights)
+
+
+def play_hand(players, deck, initial_wealth, big_blind, small_blind):
+
+    """
+    Play one hand from deck, with every player starting with initial_wealth, and return
+    the change in every player's wealth. players is a list of (agent, proba_random_action)
+    """
+
+    result = HandResult()
+
+    state = State(
+        n_players=len(players),
+        initial_wealth=initial_wealth,
+        big_blind=big_blind,
+        small_blind=small_blind,
+        deck=deck,
+        recorder=result,
+    )
+
+    while result.wealth_deltas is None:
+
+        agent, proba_random_action = players[state.current_player]
+        state.update(agent.get_action(state, proba_random_action))
+
+    return result.wealth_deltas
+
+
+def play_duplicate_deals(
+    seed, n_deals, n_players, initial_wealth=100.0, big_blind=2, small_blind=1
+):
+
+    """
+    Deal n_deals decks (generated from seed) and play each of them n_players times,
+    with the candidate in a different seat and the baseline in every other seat each time,
+    so that the candidate is dealt every seat's cards once. Return the candidate's mean
+    winnings per hand, in big blinds, for every deal
+    """
+
+    rngs = spawn_generators(seed, 2 * n_players + 1)
+
+    decks = FULL_DECK_ARRAY[
+        generate_decks(n_deals, n_cards_to_deal(n_players), rngs[-1])
+    ].tolist()
+
+    contestants = {}
+    for offset, name in enumerate(["candidate", "baseline"]):
+
+        policy = WORKER_POLICIES[name]
+        proba_random_action = 1.0 if policy.q_function is None else 0.0
+
+        contestants[name] = [
+            (
+                Agent(seat, policy=policy, rng=rngs[offset * n_players + seat]),
+                proba_random_action,
+            )
+            for seat in range(n_players)
+        ]
+
+    results = np.zeros(n_deals)
+
+    for deal, deck in enumerate(decks):
+        for candidate_seat in range(n_players):
+
+            players = [
+                contestants["candidate" if seat == candidate_seat else "baseline"][seat]
+                for seat in range(n_players)
+            ]
+
+            # Note: State deals by popping cards off of the deck, so every hand needs a copy
+            wealth_deltas = play_hand(
+                players, list(deck), initial_wealth, big_blind, small_blind
+            )
+            results[deal] += wealth_deltas[candidate_seat]
+
+    return results / (n_players * big_blind)
+
+
+def play_batch(task):
+
+    seed, n_deals, n_players = task
+
+    return play_duplicate_deals(seed, n_deals, n_players)
+
+
+def sequential_decision(deal_results, margin, alpha, beta):
+
+    """
+    Wald's sequential probability ratio test of "the candidate wins margin big blinds per 100 hands"
+    against "the candidate loses margin big blinds per 100 hands", treating the deals as normal with
+    their sample variance. Return "better", "worse", or None if more deals are needed
+    """
+
+    n_deals = len(deal_results)
+    variance = np.var(deal_results, ddof=1)
+
+    if variance == 0:
+        return None
+
+    # Note: per-deal results are per hand, while margin is per 100 hands
+    delta = margin / 100
+    log_likelihood_ratio = 2 * delta * n_deals * np.mean(deal_results) / variance
+
+    if log_likelihood_ratio >= np.log((1 - beta) / alpha):
+        return "better"
+
+    if log_likelihood_ratio <= np.log(beta / (1 - alpha)):
+        return "worse"
+
+    return None
+
+
+def summarize(deal_results, n_players, decision, z=1.96):
+
+    n_deals = len(deal_results)
+    win_rate = 100 * float(np.mean(deal_results))
+    standard_error = 100 * float(np.std(deal_results, ddof=1)) / n_deals**0.5
+
+    return {
+        "n_deals": n_deals,
+        "n_hands": n_deals * n_players,
+        "big_blinds_per_100_hands": win_rate,
+        "confidence_interval": [
+            win_rate - z * standard_error,
+            win_rate + z * standard_error,
+        ],
+        "decision": decision,
+    }
+
+
+def evaluate(
+    candidate_weights,
+    baseline_weights=None,
+    n_players=2,
+    max_deals=20_000,
+    deals_per_batch=100,
+    min_deals=500,
+    margin=5.0,
+    alpha=0.05,
+    beta=0.05,
+    n_workers=0,
+    seed=None,
+):
+
+    """
+    Play the candidate against the baseline (by default, uniformly random legal actions) on
+    duplicate deals with rotating seats, in batches of deals_per_batch deals spread over n_workers
+    processes, until the sequential test decides which of them is better or max_deals deals have
+    been played. Contestants are given as weights (e.g. from poker.inference.load_weights), or None
+    for random play. Results are in big blinds won by the candidate per 100 hands
+    The same seed always plays the same deals, whatever the number of workers
+    """
+
+    n_batches = -(-max_deals // deals_per_batch)
+    batch_seeds = np.random.SeedSequence(seed).spawn(n_batches)
+    tasks = [(batch_seed, deals_per_batch, n_players) for batch_seed in batch_seeds]
+
+    deal_results = []
+    decision = None
+
+    if n_workers > 0:
+
+        # Note: the pool is terminated as soon as the test is decided, which discards
+        #  the batches that are no longer needed
+        context = multiprocessing.get_context("spawn")
+        pool = context.Pool(
+            n_workers,
+            initializer=initialize_worker,
+            initargs=(candidate_weights, baseline_weights),
+        )
+
+    else:
+
+        pool = None
+        initialize_worker(candidate_weights, baseline_weights)
+
+    try:
+
+        batches = (
+            map(play_batch, tasks) if pool is None else pool.imap(play_batch, tasks)
+        )
+
+        for batch_results in batches:
+
+            deal_results.extend(batch_results)
+
+            if len(deal_results) >= min_deals:
+                decision = sequential_decision(deal_results, margin, alpha, beta)
+
+            if decision is not None or len(deal_results) >= max_deals:
+                break
+
+    finally:
+
+        if pool is not None:
+            pool.terminate()
+
+    return summarize(deal_results[:max_deals], n_players, decision)
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Evaluate a checkpoint against random play or another checkpoint"
+    )
+    parser.add_argument(
+        "candidate", help="weights saved with poker.inference.save_weights"
+    )
+    parser.add_argument(
+        "--baseline", help="weights to compare to (default: random play)"
+    )
+    parser.add_argument("--n-players", type=int, default=2)
+    parser.add_argument("--max-deals", type=int, default=20_000)
+    parser.add_argument("--margin", type=float, default=5.0)
+    parser.add_argument("--n-workers", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    baseline_weights = None
+    if args.baseline is not None:
+        baseline_weights = load_weights(args.baseline)
+
+    results = evaluate(
+        load_weights(args.candidate),
+        baseline_weights,
+        n_players=args.n_players,
+        max_deals=args.max_deals,
+        margin=args.margin,
+        n_workers=args.n_workers,
+        seed=args.seed,
+    )
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
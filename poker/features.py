@@ -0,0 +1,96 @@
+import numpy as np
+
+from poker.cards import Suit
+from poker.state import GameStage
+
+# Note: the game stage, the rank and suit of both hole cards, the player's wealth, the player's
+#  total bet, and the rank and suit of the three flop cards (or -1 before the flop)
+LEN_PRIVATE_STATE = 13
+
+NO_PUBLIC_CARDS = [-1, -1, -1, -1, -1, -1]
+
+
+def encode_private_state(game_state, player_index, out=None):
+
+    """
+    Write the private state of player_index (what the player is allowed to see) into out,
+    a float32 array of length LEN_PRIVATE_STATE, which is allocated if it is not given
+    """
+
+    if out is None:
+        out = np.empty(LEN_PRIVATE_STATE, dtype=np.float32)
+
+    # Note: the player is not allowed to see the other player's private cards!
+    first_hole_card, second_hole_card = game_state.hole_cards[player_index]
+
+    # Note: cards are ints, so divmod(card, len(Suit)) is the card's (rank, suit)
+    first_rank, first_suit = divmod(first_hole_card, len(Suit))
+    second_rank, second_suit = divmod(second_hole_card, len(Suit))
+
+    features = [
+        game_state.game_stage,
+        first_rank,
+        first_suit,
+        second_rank,
+        second_suit,
+        game_state.wealth[player_index],
+        game_state.total_bet_by_player(player_index),
+    ]
+
+    if game_state.game_stage == GameStage.PRE_FLOP:
+        features.extend(NO_PUBLIC_CARDS)
+
+    else:
+        for card in game_state.public_cards[:3]:
+            features.extend(divmod(card, len(Suit)))
+
+    out[:] = features
+
+    return out
+
+
+def encode_private_states(game_states, player_indexes, out=None):
+
+    """
+    Encode one private state per (game_state, player_index) pair, e.g. every seat at a table
+    or the current player at many tables, into the rows of out
+    """
+
+    if out is None:
+        out = np.empty((len(game_states), LEN_PRIVATE_STATE), dtype=np.float32)
+
+    for row, (game_state, player_index) in enumerate(zip(game_states, player_indexes)):
+        encode_private_state(game_state, player_index, out[row])
+
+    return out
+
+
+def encode_vector_state(vector_state, player_indexes=None, out=None):
+
+    """
+    Encode the private state of player_indexes[i] (by default, the current player)
+    at every table of a poker.vector_state.VectorState, without looping over tables
+    """
+
+    tables = np.arange(vector_state.n_tables)
+
+    if player_indexes is None:
+        player_indexes = vector_state.current_player
+
+    if out is None:
+        out = np.empty((vector_state.n_tables, LEN_PRIVATE_STATE), dtype=np.float32)
+
+    hole_cards = vector_state.hole_cards[tables, player_indexes]
+    flop = vector_state.public_cards[:, :3]
+
+    out[:, 0] = vector_state.game_stage
+    out[:, 1:5:2] = hole_cards // len(Suit)
+    out[:, 2:5:2] = hole_cards % len(Suit)
+    out[:, 5] = vector_state.wealth[tables, player_indexes]
+    out[:, 6] = vector_state.total_bets[tables, player_indexes]
+    out[:, 7::2] = flop // len(Suit)
+    out[:, 8::2] = flop % len(Suit)
+
+    out[vector_state.game_stage == GameStage.PRE_FLOP, 7:] = -1
+
+    return out
@@ -1,94 +1,420 @@
-from collections import Counter
+from enum import IntEnum
 from itertools import combinations
-from operator import attrgetter
 
-from poker.cards import Rank
+import numpy as np
+
+from poker.cards import FULL_DECK, Rank, Suit
+from poker.tables import load_table
+
+
+class HandCategory(IntEnum):
+
+    HIGH_CARD = 0
+    PAIR = 1
+    TWO_PAIR = 2
+    THREE_OF_A_KIND = 3
+    STRAIGHT = 4
+    FLUSH = 5
+    FULL_HOUSE = 6
+    FOUR_OF_A_KIND = 7
+    STRAIGHT_FLUSH = 8
+
+
+# Note: each rank is assigned a prime number, so that the product of the primes in a hand
+#  identifies its ranks regardless of the order of the cards (and regardless of suits)
+PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+# Note: cards are ints (see poker.cards.Card), so per-card values are looked up by card index
+CARD_RANKS = tuple(int(card.rank) for card in FULL_DECK)
+CARD_SUITS = tuple(int(card.suit) for card in FULL_DECK)
+CARD_RANK_BITS = tuple(1 << card.rank for card in FULL_DECK)
+CARD_PRIMES = tuple(PRIMES[card.rank] for card in FULL_DECK)
+
+# Note: the ace-low straight (the "wheel") is the weakest straight, and its top card is a FIVE
+STRAIGHTS = ((Rank.FIVE, (1 << Rank.ACE) | 0b1111),) + tuple(
+    (Rank(low + 4), 0b11111 << low) for low in range(Rank.TEN + 1)
+)
+
+
+def equivalence_classes():
+
+    """
+    Return the list of all 7462 distinct 5-card hand values, weakest first
+    Each value is a (HandCategory, ranks) pair, where ranks are ordered by tiebreaking importance
+    """
+
+    straight_masks = set(mask for _, mask in STRAIGHTS)
+
+    # Note: combinations of distinct ranks, with the strongest rank first
+    no_pairs = sorted(
+        ranks[::-1]
+        for ranks in combinations(Rank, 5)
+        if sum(1 << rank for rank in ranks) not in straight_masks
+    )
+
+    pairs = sorted(
+        (pair,) + kickers[::-1]
+        for pair in Rank
+        for kickers in combinations([rank for rank in Rank if rank != pair], 3)
+    )
+
+    two_pairs = sorted(
+        (high_pair, low_pair, kicker)
+        for low_pair, high_pair in combinations(Rank, 2)
+        for kicker in Rank
+        if kicker not in (low_pair, high_pair)
+    )
+
+    three_of_a_kinds = sorted(
+        (triple,) + kickers[::-1]
+        for triple in Rank
+        for kickers in combinations([rank for rank in Rank if rank != triple], 2)
+    )
+
+    straights = [(top,) for top, _ in STRAIGHTS]
+
+    full_houses = [(triple, pair) for triple in Rank for pair in Rank if pair != triple]
+
+    four_of_a_kinds = [
+        (quad, kicker) for quad in Rank for kicker in Rank if kicker != quad
+    ]
+
+    ranks_by_category = [
+        (HandCategory.HIGH_CARD, no_pairs),
+        (HandCategory.PAIR, pairs),
+        (HandCategory.TWO_PAIR, two_pairs),
+        (HandCategory.THREE_OF_A_KIND, three_of_a_kinds),
+        (HandCategory.STRAIGHT, straights),
+        (HandCategory.FLUSH, no_pairs),
+        (HandCategory.FULL_HOUSE, full_houses),
+        (HandCategory.FOUR_OF_A_KIND, four_of_a_kinds),
+        (HandCategory.STRAIGHT_FLUSH, straights),
+    ]
+
+    return [
+        (category, ranks)
+        for category, all_ranks in ranks_by_category
+        for ranks in all_ranks
+    ]
+
+
+# Note: hand strengths run from 1 (seven high) to 7462 (a royal straight flush),
+#  and EQUIVALENCE_CLASSES[hand_strength] describes the hand. Index zero is unused
+EQUIVALENCE_CLASSES = [None] + equivalence_classes()
+
+MULTIPLICITIES = {
+    HandCategory.PAIR: (2, 1, 1, 1),
+    HandCategory.TWO_PAIR: (2, 2, 1),
+    HandCategory.THREE_OF_A_KIND: (3, 1, 1),
+    HandCategory.FULL_HOUSE: (3, 2),
+    HandCategory.FOUR_OF_A_KIND: (4, 1),
+}
+
+
+def build_lookup_tables():
+
+    # Note: hands with five distinct ranks are looked up by their 13-bit rank mask
+    #  (one table for flushes, one for everything else), and hands with repeated ranks
+    #  are looked up by the product of their rank primes
+    flush_table = [0] * (1 << len(Rank))
+    unique_ranks_table = [0] * (1 << len(Rank))
+    prime_product_table = {}
+
+    straight_masks = dict(STRAIGHTS)
+
+    for hand_strength, (category, ranks) in enumerate(EQUIVALENCE_CLASSES[1:], start=1):
+
+        if category in (HandCategory.STRAIGHT, HandCategory.STRAIGHT_FLUSH):
+            rank_mask = straight_masks[ranks[0]]
+
+        elif category in (HandCategory.HIGH_CARD, HandCategory.FLUSH):
+            rank_mask = sum(1 << rank for rank in ranks)
+
+        else:
+            prime_product = 1
+            for rank, multiplicity in zip(ranks, MULTIPLICITIES[category]):
+                prime_product *= PRIMES[rank] ** multiplicity
+
+            prime_product_table[prime_product] = hand_strength
+            continue
+
+        if category in (HandCategory.FLUSH, HandCategory.STRAIGHT_FLUSH):
+            flush_table[rank_mask] = hand_strength
+        else:
+            unique_ranks_table[rank_mask] = hand_strength
+
+    return flush_table, unique_ranks_table, prime_product_table
+
+
+FLUSH_TABLE, UNIQUE_RANKS_TABLE, PRIME_PRODUCT_TABLE = build_lookup_tables()
 
 
 def sort_hand(hand):
 
-    return sorted(hand, key=attrgetter("rank", "suit"))
+    # Note: cards are ordered by rank and then by suit
+    return sorted(hand)
+
+
+def rank_strength(ranks):
+
+    # Note: this is the strength of five cards with the given ranks, assuming they are not a flush
+    rank_mask = 0
+    prime_product = 1
+
+    for rank in ranks:
+        rank_mask |= 1 << rank
+        prime_product *= PRIMES[rank]
+
+    return UNIQUE_RANKS_TABLE[rank_mask] or PRIME_PRODUCT_TABLE[prime_product]
+
+
+# Note: each row of the rank DAG has one column per rank (the offset of the row reached by adding
+#  a card of that rank) followed by the strength of the best non-flush hand at that row
+RANK_DAG_WIDTH = len(Rank) + 1
+
+MAX_CARDS = 7
+
+
+def generate_rank_dag():
 
+    """
+    Build the card-by-card state transition table used by best_hand_strength
+    Rows are the multisets of up to seven ranks (suits are ignored), so that a hand is evaluated by
+    following one transition per card, in any order, starting from the empty multiset at offset zero
+    """
 
-def is_straight(sorted_hand):
+    multisets = [()]
+    row_by_multiset = {(): 0}
 
-    if sorted_hand[-1].rank == Rank.ACE and sorted_hand[0].rank == Rank.TWO:
+    for multiset in multisets:
 
-        # Note: in this case the sorted hand is [two, ... , ace]
-        straight_tiebreaker = sorted_hand[-2].rank
-        return is_straight(sorted_hand[:-1])[0], straight_tiebreaker
+        if len(multiset) == MAX_CARDS:
+            continue
 
-    straight_tiebreaker = sorted_hand[-1].rank
+        for rank in Rank:
 
-    for i, card in enumerate(sorted_hand[:-1]):
+            if multiset.count(rank) < len(Suit):
 
-        next_card = sorted_hand[i + 1]
+                child = tuple(sorted(multiset + (rank,)))
 
-        if card.rank + 1 != next_card.rank:
-            return False, straight_tiebreaker
+                if child not in row_by_multiset:
+                    row_by_multiset[child] = len(multisets)
+                    multisets.append(child)
 
-    return True, straight_tiebreaker
+    rank_dag = np.zeros((len(multisets), RANK_DAG_WIDTH), dtype=np.int32)
+
+    for row, multiset in enumerate(multisets):
+
+        for rank in Rank:
+
+            child = tuple(sorted(multiset + (rank,)))
+
+            if child in row_by_multiset:
+                rank_dag[row, rank] = row_by_multiset[child] * RANK_DAG_WIDTH
+
+        if len(multiset) >= 5:
+            rank_dag[row, -1] = max(
+                rank_strength(ranks) for ranks in set(combinations(multiset, 5))
+            )
+
+    return rank_dag.ravel()
+
+
+def generate_flush_table():
+
+    """
+    Map a 13-bit mask of the ranks held in a single suit to the strength of the best
+    flush (or straight flush) among those ranks, or zero if there are fewer than five
+    """
+
+    flush_table = [0] * (1 << len(Rank))
+
+    for rank_mask in range(len(flush_table)):
+
+        ranks = [rank for rank in Rank if rank_mask & (1 << rank)]
+
+        if len(ranks) < 5:
+            continue
+
+        for _, straight_mask in reversed(STRAIGHTS):
+            if rank_mask & straight_mask == straight_mask:
+                flush_table[rank_mask] = FLUSH_TABLE[straight_mask]
+                break
+
+        else:
+            top_five_mask = sum(1 << rank for rank in ranks[-5:])
+            flush_table[rank_mask] = FLUSH_TABLE[top_five_mask]
+
+    return flush_table
+
+
+# Note: the seven card tables are loaded lazily, the first time they are needed
+SEVEN_CARD_TABLES = {}
+
+
+def seven_card_tables():
+
+    if not SEVEN_CARD_TABLES:
+
+        rank_dag = load_table("rank_dag_v1", generate_rank_dag)
+
+        SEVEN_CARD_TABLES["rank_dag"] = rank_dag
+        SEVEN_CARD_TABLES["rank_dag_view"] = memoryview(rank_dag)
+        SEVEN_CARD_TABLES["flush_table"] = generate_flush_table()
+        SEVEN_CARD_TABLES["flush_table_array"] = np.array(
+            SEVEN_CARD_TABLES["flush_table"], dtype=np.int32
+        )
+
+    return SEVEN_CARD_TABLES
+
+
+# Note: suit counts are packed into one integer with four bits per suit. Adding three to every
+#  field sets a field's high bit exactly when that suit has five or more cards (a flush)
+SUIT_COUNT_BITS = 4
+FLUSH_CARRY = sum(3 << (SUIT_COUNT_BITS * suit) for suit in Suit)
+FLUSH_HIGH_BITS = sum(8 << (SUIT_COUNT_BITS * suit) for suit in Suit)
+CARD_SUIT_COUNTS = tuple(1 << (SUIT_COUNT_BITS * card.suit) for card in FULL_DECK)
 
 
 def best_hand_strength(public_cards, hole_cards):
 
-    available_cards = public_cards + hole_cards
+    """
+    Return the strength of the best 5-card hand that can be made from 5 to 7 cards
+    This is equal to the largest strength() of any five of the cards, but it is calculated
+    with one rank DAG transition per card instead of checking every combination
+    """
 
-    return max(
-        strength(candidate_hand) for candidate_hand in combinations(available_cards, 5)
-    )
+    if not SEVEN_CARD_TABLES:
+        seven_card_tables()
+
+    rank_dag = SEVEN_CARD_TABLES["rank_dag_view"]
+
+    row = 0
+    suit_counts = 0
+
+    for cards in (public_cards, hole_cards):
+        for card in cards:
+            row = rank_dag[row + CARD_RANKS[card]]
+            suit_counts += CARD_SUIT_COUNTS[card]
+
+    flush_high_bits = (suit_counts + FLUSH_CARRY) & FLUSH_HIGH_BITS
+
+    if not flush_high_bits:
+        return rank_dag[row + RANK_DAG_WIDTH - 1]
+
+    # Note: with at most seven cards, a flush cannot coexist with four of a kind or a full house,
+    #  so the best flush in the flush suit is the best hand
+    flush_suit = (flush_high_bits.bit_length() - 1) // SUIT_COUNT_BITS
+
+    rank_mask = 0
+    for cards in (public_cards, hole_cards):
+        for card in cards:
+            if CARD_SUITS[card] == flush_suit:
+                rank_mask |= CARD_RANK_BITS[card]
+
+    return SEVEN_CARD_TABLES["flush_table"][rank_mask]
+
+
+def batch_hand_strength(card_indexes):
+
+    """
+    Vectorized best_hand_strength for an (N, 5), (N, 6) or (N, 7) integer array of card
+    indexes (as returned by poker.cards.card_index), one hand per row
+    Returns an (N,) array of hand strengths, where higher is better
+    """
+
+    tables = seven_card_tables()
+    rank_dag = np.asarray(tables["rank_dag"])
+    flush_table = tables["flush_table_array"]
+
+    card_indexes = np.asarray(card_indexes, dtype=np.int32)
+    ranks = card_indexes // len(Suit)
+    suits = card_indexes % len(Suit)
+
+    rows = np.zeros(len(card_indexes), dtype=np.int32)
+    for column in range(card_indexes.shape[1]):
+        rows = rank_dag[rows + ranks[:, column]]
+
+    hand_strengths = rank_dag[rows + RANK_DAG_WIDTH - 1]
+
+    # Note: cards of the same suit have distinct ranks, so summing their rank bits gives the suit's
+    #  rank mask. A flush is always the best hand when it exists, so we can take the maximum
+    rank_bits = np.left_shift(1, ranks)
+
+    for suit in Suit:
+        suit_rank_masks = np.where(suits == suit, rank_bits, 0).sum(axis=1)
+        hand_strengths = np.maximum(hand_strengths, flush_table[suit_rank_masks])
+
+    return hand_strengths
 
 
 def strength(hand):
 
-    # TODO Finish this function
+    # Note: higher is better, and two hands tie if and only if their strengths are equal
+    first, second, third, fourth, fifth = hand
+
+    rank_mask = (
+        CARD_RANK_BITS[first]
+        | CARD_RANK_BITS[second]
+        | CARD_RANK_BITS[third]
+        | CARD_RANK_BITS[fourth]
+        | CARD_RANK_BITS[fifth]
+    )
+
+    if (
+        CARD_SUITS[first]
+        == CARD_SUITS[second]
+        == CARD_SUITS[third]
+        == CARD_SUITS[fourth]
+        == CARD_SUITS[fifth]
+    ):
+        return FLUSH_TABLE[rank_mask]
+
+    hand_strength = UNIQUE_RANKS_TABLE[rank_mask]
+    if hand_strength:
+        return hand_strength
+
+    return PRIME_PRODUCT_TABLE[
+        CARD_PRIMES[first]
+        * CARD_PRIMES[second]
+        * CARD_PRIMES[third]
+        * CARD_PRIMES[fourth]
+        * CARD_PRIMES[fifth]
+    ]
+
 
-    unique_suits = set(card.suit for card in hand)
+def hand_category(hand_strength):
 
-    sorted_hand = sort_hand(hand)
-    straight, straight_tiebreaker = is_straight(sorted_hand)
+    return EQUIVALENCE_CLASSES[hand_strength][0]
 
-    # Note: the hand is a flush (either a straight flush or a regular flush)
-    if len(unique_suits) == 1:
 
-        if straight:
-            # Straight flush (ties broken by the rank of the last card in the straight)
-            return 1000 + straight_tiebreaker, "a straight flush"
+def describe_hand_strength(hand_strength):
 
-        # Regular flush (ties broken by the rank of the high card)
-        description = f"a {hand[0].suit.name} flush"
-        return 500 + sorted_hand[-1].rank, description
+    category, ranks = EQUIVALENCE_CLASSES[hand_strength]
+    names = [rank.name for rank in ranks]
 
-    rank_counter = Counter([card.rank for card in hand])
-    most_common_ranks = rank_counter.most_common()
+    if category == HandCategory.STRAIGHT_FLUSH:
+        return f"a straight flush ending in a {names[0]}"
 
-    first_most_common_rank = most_common_ranks[0][0]
-    second_most_common_rank = most_common_ranks[1][0]
-    first_most_common_count = most_common_ranks[0][1]
-    second_most_common_count = most_common_ranks[1][1]
+    if category == HandCategory.FOUR_OF_A_KIND:
+        return f"four {names[0]}"
 
-    if first_most_common_count == 4:
-        description = f"four {first_most_common_rank.name}"
-        return 700 + first_most_common_rank, description
+    if category == HandCategory.FULL_HOUSE:
+        return f"a full house ({names[0]} full of {names[1]})"
 
-    if first_most_common_count == 3 and second_most_common_count == 2:
-        description = f"a full house ({first_most_common_rank.name} full of {second_most_common_rank.name})"
-        return 600 + first_most_common_rank, description
+    if category == HandCategory.FLUSH:
+        return f"a {names[0]} high flush"
 
-    if straight:
-        description = f"a straight ending in a {straight_tiebreaker.name}"
-        return 400 + straight_tiebreaker, description
+    if category == HandCategory.STRAIGHT:
+        return f"a straight ending in a {names[0]}"
 
-    if first_most_common_count == 3:
-        description = f"three of a kind ({first_most_common_rank.name})"
-        return 300 + first_most_common_rank, description
+    if category == HandCategory.THREE_OF_A_KIND:
+        return f"three of a kind ({names[0]})"
 
-    if first_most_common_count == 2 and second_most_common_count == 2:
-        return 200, "two pair"
+    if category == HandCategory.TWO_PAIR:
+        return f"two pair ({names[0]} and {names[1]})"
 
-    if first_most_common_count == 2:
-        description = f"a pair of {first_most_common_rank.name}"
-        return 100 + first_most_common_rank, description
+    if category == HandCategory.PAIR:
+        return f"a pair of {names[0]}"
 
-    description = f"{sorted_hand[-1].rank.name} high"
-    return int(sorted_hand[-1].rank), description
+    return f"{names[0]} high"
@@ -0,0 +1,250 @@
+import os
+import queue
+import threading
+
+import numpy as np
+
+from poker.cards import FULL_DECK
+from poker.state import GameStage
+
+# Note: every file starts with a fixed-size header holding MAGIC, the number of players and the
+#  maximum number of actions per record, which together determine the record layout
+#  MAGIC ends with a version number, which changes whenever the record layout does
+MAGIC = b"POKERHH2"
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("n_players", "<u4"), ("max_actions", "<u4")])
+HEADER_SIZE = 64
+
+MAX_ACTIONS = 128
+
+
+def record_dtype(n_players, max_actions=MAX_ACTIONS):
+
+    """
+    The layout of one hand. deck is the deck before any card is dealt (cards are dealt from the end),
+    of which only the first n_cards are used (decks injected into a State may be shorter than
+    a full deck), and action_players, action_stages and actions hold the first n_actions actions of the hand,
+    including the blinds (negative actions are folds). If a hand has more than max_actions actions,
+    n_actions is the true number of actions but only the first max_actions are stored
+    """
+
+    return np.dtype(
+        [
+            ("hand_index", "<u8"),
+            ("dealer", "u1"),
+            ("n_cards", "u1"),
+            ("deck", "u1", (len(FULL_DECK),)),
+            ("n_actions", "<u2"),
+            ("action_players", "u1", (max_actions,)),
+            ("action_stages", "u1", (max_actions,)),
+            ("actions", "<f4", (max_actions,)),
+            ("bets", "<f4", (len(GameStage), n_players)),
+            ("winners", "?", (n_players,)),
+            ("wealth_deltas", "<f4", (n_players,)),
+        ]
+    )
+
+
+class HandHistoryWriter:
+
+    """
+    Append fixed-width hand records to a file. Records are collected in a preallocated buffer,
+    and full buffers are written to disk by a background thread, so that simulations don't wait
+    on the file system (unless the thread falls more than max_pending_buffers behind)
+    If a buffer can't be written, the error is raised by the next call to write, flush or close
+    A new file is written, unless n_records_to_keep is given, in which case the existing file
+    (e.g. of a run resumed from a checkpoint) is kept up to that many records and appended to
+    """
+
+    def __init__(
+        self,
+        path,
+        n_players,
+        max_actions=MAX_ACTIONS,
+        buffer_size=4096,
+        max_pending_buffers=4,
+        n_records_to_keep=None,
+    ):
+
+        self.dtype = record_dtype(n_players, max_actions)
+        self.n_players = n_players
+        self.max_actions = max_actions
+        self.buffer_size = buffer_size
+
+        self.buffer = np.zeros(buffer_size, dtype=self.dtype)
+        self.n_buffered = 0
+        self.n_records = 0
+
+        if n_records_to_keep is None:
+
+            header = np.zeros(1, dtype=HEADER_DTYPE)
+            header[0] = (MAGIC, n_players, max_actions)
+
+            self.file = open(path, "wb")
+            self.file.write(header.tobytes().ljust(HEADER_SIZE, b"\0"))
+
+        else:
+
+            existing_records = read_hand_history(path)
+
+            if existing_records.dtype != self.dtype:
+                raise ValueError(
+                    f"{path} has records for a different number of players or actions"
+                )
+
+            # Note: records that were never written (e.g. if the process was killed)
+            #  can't be kept
+            self.n_records = min(n_records_to_keep, len(existing_records))
+
+            # Note: the file is memory-mapped, and must be unmapped before it is truncated
+            del existing_records
+
+            self.file = open(path, "r+b")
+            self.file.truncate(HEADER_SIZE + self.n_records * self.dtype.itemsize)
+            self.file.seek(0, os.SEEK_END)
+
+        self.error = None
+
+        self.pending_buffers = queue.Queue(maxsize=max_pending_buffers)
+        self.thread = threading.Thread(target=self.write_pending_buffers, daemon=True)
+        self.thread.start()
+
+    def write_pending_buffers(self):
+
+        while True:
+
+            records = self.pending_buffers.get()
+
+            # Note: None tells the thread to stop
+            if records is None:
+                break
+
+            # Note: as in poker.checkpoint.Checkpointer, after an error the thread keeps taking
+            #  buffers off the queue (so that flush never waits for it forever), but doesn't write them
+            if self.error is not None:
+                continue
+
+            try:
+                self.file.write(records.tobytes())
+            except Exception as error:
+                self.error = error
+
+    def raise_error(self):
+
+        if self.error is not None:
+            raise self.error
+
+    def write(self, record):
+
+        self.raise_error()
+
+        if self.n_buffered == self.buffer_size:
+            self.flush()
+
+        self.buffer[self.n_buffered] = record
+
+        self.n_buffered += 1
+        self.n_records += 1
+
+    def flush(self):
+
+        self.raise_error()
+
+        if self.n_buffered == 0:
+            return
+
+        # Note: the full buffer is handed over to the thread, so we need a new one
+        self.pending_buffers.put(self.buffer[: self.n_buffered])
+        self.buffer = np.zeros(self.buffer_size, dtype=self.dtype)
+        self.n_buffered = 0
+
+    def close(self):
+
+        # Note: the thread is stopped and the file closed even if flush raises
+        try:
+            self.flush()
+        finally:
+            self.pending_buffers.put(None)
+            self.thread.join()
+            self.file.close()
+
+        self.raise_error()
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, *exc_info):
+
+        self.close()
+
+
+class HandHistoryRecorder:
+
+    """
+    Record the hands played in one State into a HandHistoryWriter
+    Several States (e.g. several tables) can record into the same writer, each with its own recorder
+    """
+
+    def __init__(self, writer):
+
+        self.writer = writer
+        self.n_hands = 0
+
+        # Note: the hand in progress is filled in here, and only written once it is over
+        #  (so that a hand which is started but never finished is never written)
+        self.record = np.zeros((), dtype=writer.dtype)
+
+    def start_hand(self, deck, dealer):
+
+        self.record[...] = 0
+
+        self.record["hand_index"] = self.n_hands
+        self.record["dealer"] = dealer
+        self.record["n_cards"] = len(deck)
+        self.record["deck"][: len(deck)] = deck
+
+        self.n_hands += 1
+
+    def record_action(self, game_state, action):
+
+        n_actions = int(self.record["n_actions"])
+
+        if n_actions < self.writer.max_actions:
+            self.record["action_players"][n_actions] = game_state.current_player
+            self.record["action_stages"][n_actions] = game_state.game_stage
+            self.record["actions"][n_actions] = action
+
+        self.record["n_actions"] = n_actions + 1
+
+    def end_hand(self, game_state, winning_players, wealth_before):
+
+        self.record["bets"] = game_state.stage_bets
+        self.record["winners"][winning_players] = True
+        self.record["wealth_deltas"] = np.subtract(game_state.wealth, wealth_before)
+
+        self.writer.write(self.record)
+
+
+def read_hand_history(path):
+
+    """
+    Memory-map a file written by HandHistoryWriter as a structured array with one row per hand
+    Only the rows that are accessed are read from disk
+    """
+
+    header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)[0]
+
+    if header["magic"] != MAGIC:
+        raise ValueError(f"{path} is not a hand history file")
+
+    dtype = record_dtype(int(header["n_players"]), int(header["max_actions"]))
+
+    # Note: the file may still be written to, in which case we ignore any incomplete record
+    n_records = (os.path.getsize(path) - HEADER_SIZE) // dtype.itemsize
+
+    if n_records == 0:
+        return np.zeros(0, dtype=dtype)
+
+    return np.memmap(
+        path, dtype=dtype, mode="r", offset=HEADER_SIZE, shape=(n_records,)
+    )
@@ -0,0 +1,54 @@
+import numpy as np
+
+
+class NumpyQFunction:
+
+    """
+    Evaluates the q function network built by poker.q_function.get_model (dense ReLU layers
+    followed by a linear output layer) with NumPy. For the handful of rows the agent evaluates
+    at a time, this takes microseconds instead of the milliseconds spent in keras predict,
+    and it does not need tensorflow to be installed
+    """
+
+    def __init__(self, weights):
+
+        self.set_weights(weights)
+
+    def set_weights(self, weights):
+
+        # Note: weights are in the order returned by keras get_weights(),
+        #  i.e. the kernel and then the bias of each dense layer
+        self.layers = [
+            (np.asarray(kernel, dtype=np.float32), np.asarray(bias, dtype=np.float32))
+            for kernel, bias in zip(weights[::2], weights[1::2])
+        ]
+
+    def get_weights(self):
+
+        return [array for layer in self.layers for array in layer]
+
+    def predict(self, model_input):
+
+        activations = np.asarray(model_input, dtype=np.float32)
+
+        for kernel, bias in self.layers[:-1]:
+            activations = np.maximum(activations @ kernel + bias, 0.0)
+
+        kernel, bias = self.layers[-1]
+
+        return activations @ kernel + bias
+
+
+def save_weights(path, weights):
+
+    # Note: np.savez adds ".npz" to a path, but not to an open file, which keeps path as given
+    with open(path, "wb") as weights_file:
+        np.savez(weights_file, *weights)
+
+
+def load_weights(path):
+
+    with np.load(path) as weights_file:
+        return [
+            weights_file[f"arr_{index}"] for index in range(len(weights_file.files))
+        ]
@@ -0,0 +1,181 @@
+import functools
+import inspect
+from collections import OrderedDict
+
+from poker.cards import Card, Rank, Suit
+from poker.equity import estimate_equity
+
+
+def suit_signatures(card_groups):
+
+    """
+    For every suit, the ranks of that suit's cards in each group, packed into one int
+    with len(Rank) bits per group. Relabelling suits only permutes the signatures
+    """
+
+    signatures = [0] * len(Suit)
+
+    for group_index, cards in enumerate(card_groups):
+
+        shift = group_index * len(Rank)
+
+        for card in cards:
+            rank, suit = divmod(card, len(Suit))
+            signatures[suit] |= 1 << (rank + shift)
+
+    return signatures
+
+
+def canonical_key(*card_groups):
+
+    """
+    Map groups of cards (e.g. hole cards, flop, turn and river) to an int that is the same for
+    any two inputs that only differ by a relabelling of the suits (and the order of the cards within
+    each group). Keys are only comparable between inputs with the same number of groups
+    For example, there are 1,755 keys for canonical_key(flop) and 169 for canonical_key(hole_cards)
+    """
+
+    # Note: the sorted signatures are the same for two inputs exactly when their suits
+    #  can be relabelled into each other
+    signatures = sorted(suit_signatures(card_groups))
+
+    signature_bits = len(Rank) * len(card_groups)
+
+    key = 0
+    for signature in signatures:
+        key = (key << signature_bits) | signature
+
+    return key
+
+
+def canonical_cards(*card_groups):
+
+    """
+    Relabel the suits of groups of cards in a canonical way, and sort every group, so that any
+    two inputs with the same canonical_key are mapped to the same cards
+    """
+
+    signatures = suit_signatures(card_groups)
+
+    # Note: suits with equal signatures are interchangeable, so ties can be broken arbitrarily
+    suit_order = sorted(Suit, key=lambda suit: signatures[suit], reverse=True)
+    new_suits = {suit: new_suit for new_suit, suit in enumerate(suit_order)}
+
+    return [
+        sorted(Card(card // len(Suit), new_suits[card % len(Suit)]) for card in cards)
+        for cards in card_groups
+    ]
+
+
+class LRUCache:
+
+    """
+    A dictionary of at most maxsize entries, which evicts the least recently used entry
+    when it is full, and counts hits and misses
+    """
+
+    def __init__(self, maxsize=2**16):
+
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+
+        return len(self.entries)
+
+    def get(self, key, default=None):
+
+        try:
+            value = self.entries[key]
+
+        except KeyError:
+            self.misses += 1
+            return default
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+
+        return value
+
+    def put(self, key, value):
+
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self):
+
+        n_lookups = self.hits + self.misses
+        return self.hits / n_lookups if n_lookups else 0.0
+
+    def stats(self):
+
+        return {
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+        }
+
+
+def memoize(key_function, maxsize=2**16):
+
+    """
+    Decorate a function so that its results are kept in an LRUCache (the wrapper's cache
+    attribute) under key_function(*args, **kwargs), e.g. a canonical_key of its cards
+    """
+
+    def decorator(function):
+
+        cache = LRUCache(maxsize)
+
+        # Note: a sentinel, since None could be a cached value
+        missing = object()
+
+        @functools.wraps(function)
+        def memoized(*args, **kwargs):
+
+            key = key_function(*args, **kwargs)
+            value = cache.get(key, missing)
+
+            if value is missing:
+                value = function(*args, **kwargs)
+                cache.put(key, value)
+
+            return value
+
+        memoized.cache = cache
+
+        return memoized
+
+    return decorator
+
+
+def equity_key(*args, **kwargs):
+
+    # Note: the arguments are bound to estimate_equity's parameters (including their defaults),
+    #  so that an estimate has the same key whether its options are passed by position or by name
+    arguments = inspect.signature(estimate_equity).bind(*args, **kwargs)
+    arguments.apply_defaults()
+
+    options = dict(arguments.arguments)
+    cards = canonical_key(options.pop("hole_cards"), options.pop("public_cards"))
+
+    return cards, tuple(sorted(options.items()))
+
+
+# Note: every equity estimate that is reused saves a whole Monte Carlo simulation. There is no
+#  cache for best_hand_strength, since its rank DAG lookup is several times faster than canonical_key
+cached_estimate_equity = memoize(equity_key, maxsize=2**12)(estimate_equity)
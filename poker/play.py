@@ -1,30 +1,87 @@
+import argparse
+import contextlib
+import multiprocessing
+import os
+from queue import Empty
+
 import numpy as np
 
 from poker.state import State
 from poker.agent import Agent
-
-
-def run_one_episode(episode, players, initial_wealth=100):
+from poker.checkpoint import (
+    Checkpointer,
+    get_rng_states,
+    load_checkpoint,
+    set_rng_states,
+    with_prefix,
+    without_prefix,
+)
+from poker.dealing import DeckBuffer, n_cards_to_deal
+from poker.history import HandHistoryRecorder, HandHistoryWriter
+from poker.policy import Policy
+from poker.q_backends import KerasQBackend
+from poker.replay import ReplayBuffer
+from poker.utils import spawn_generators
+
+
+def run_one_episode(
+    episode,
+    players,
+    initial_wealth=100,
+    learn=True,
+    replay_buffer=None,
+    batch_size=32,
+    train_every=4,
+    hand_history=None,
+    rng=None,
+    deck_buffer=None,
+):
+
+    """
+    Play one game and return the learning player's SARSA transitions, a list of
+    (private_state, action, updated_guess_for_q) tuples. If learn is False, the transitions
+    are only returned (e.g. to be learned from in another process) and q is not updated
+    If a replay_buffer is given, transitions are also pushed into it, and (if learn is True)
+    q is trained on a minibatch of batch_size replayed transitions every train_every steps,
+    instead of on every transition as it is played
+    If a hand_history (a poker.history.HandHistoryWriter) is given, every hand is recorded in it
+    The cards are shuffled with rng (or taken from deck_buffer, a poker.dealing.DeckBuffer),
+    and each player acts with their own generator
+    """
 
     # Note: the probability of random (exploratory) actions decreases over time
     proba_random_action = 0.02 + 0.98 * np.exp(-episode / 500)
 
-    state = State(n_players=len(players), initial_wealth=initial_wealth, verbose=False)
+    recorder = None if hand_history is None else HandHistoryRecorder(hand_history)
+
+    state = State(
+        n_players=len(players),
+        initial_wealth=initial_wealth,
+        verbose=False,
+        recorder=recorder,
+        rng=rng,
+        deck_buffer=deck_buffer,
+    )
 
     learning_player = state.current_player
 
-    private_state = players[learning_player].get_private_state(state)
+    # Note: the learning player's private states are copied, since they are kept in transitions
+    #  and each agent encodes states into a buffer of its own
+    private_state = players[learning_player].get_private_state(state).copy()
     action = players[learning_player].get_action(state, proba_random_action)
 
     cumulative_reward = 0
+    transitions = []
 
-    # Note: at the beginning of every episode, we push updates to the q function
-    #  from the learning player to all other players
-    for player_index in range(state.n_players):
-        if player_index != learning_player:
-            players[player_index].model.set_weights(
-                players[learning_player].model.get_weights()
-            )
+    # Note: at the beginning of every episode, the players pick up the learning player's
+    #  latest q function. Players sharing its backend's parameters only take a reference to the
+    #  new version (if there is one), and only players with parameters of their own need a copy
+    #  This includes the learning player, whose snapshot may date from an episode in which
+    #  it was not learning (or from before its weights were restored)
+    learning_q_backend = players[learning_player].q_backend
+
+    for player in players:
+        player.q_backend.copy_from(learning_q_backend)
 
     while not state.terminal:
 
@@ -73,30 +130,420 @@ def run_one_episode(episode, players, initial_wealth=100):
         else:
             updated_guess_for_q = reward + continuation_value
 
-        players[learning_player].update_q(private_state, action, updated_guess_for_q)
+        transitions.append((private_state, action, updated_guess_for_q))
+
+        if replay_buffer is not None:
+
+            replay_buffer.add(
+                private_state,
+                action,
+                reward,
+                next_private_state,
+                next_action,
+                state.terminal,
+            )
+
+            if (
+                learn
+                and replay_buffer.n_added % train_every == 0
+                and len(replay_buffer) >= batch_size
+            ):
+                players[learning_player].update_q_from_replay(replay_buffer, batch_size)
+
+        elif learn:
+            players[learning_player].update_q(
+                private_state, action, updated_guess_for_q
+            )
 
         action = next_action
-        private_state = next_private_state
+        private_state = next_private_state.copy()
+
+    return transitions
+
+
+def run_actor(
+    actor_index,
+    n_players,
+    episode_queue,
+    message_queue,
+    weights_queue,
+    sync_interval,
+    seed,
+):
+
+    # Note: every actor has its own seed, from which each seat and the cards get a generator
+    rngs = spawn_generators(seed, n_players + 1)
+    deck_buffer = DeckBuffer(n_cards_to_deal(n_players), rng=rngs[-1])
+
+    # Note: actors play with a snapshot of the learner's q function, shared by all of their seats,
+    #  which they request every sync_interval episodes (starting with their first episode).
+    #  They never need a keras model
+    policy = Policy()
+    players = [
+        Agent(player_index, policy=policy, rng=rngs[player_index])
+        for player_index in range(n_players)
+    ]
+
+    n_episodes_played = 0
+
+    while True:
+
+        episode = episode_queue.get()
+
+        if episode is None:
+            break
+
+        # Note: a message without transitions is a request for the learner's latest weights
+        if n_episodes_played % sync_interval == 0:
+            message_queue.put((actor_index, None))
+            policy.set_weights(weights_queue.get())
+
+        transitions = run_one_episode(
+            episode, players, learn=False, deck_buffer=deck_buffer
+        )
+        message_queue.put((actor_index, transitions))
+
+        n_episodes_played += 1
+
+
+def receive_message(message_queue, workers, timeout, poll_interval=1.0):
+
+    """
+    The next message from the actors, checking every poll_interval seconds that none of them
+    has crashed. Raises a RuntimeError if one has, or if no message arrives within timeout seconds
+    """
+
+    n_seconds_waited = 0.0
+
+    while True:
+
+        try:
+            return message_queue.get(timeout=poll_interval)
+        except Empty:
+            n_seconds_waited += poll_interval
+
+        for worker in workers:
+            if worker.exitcode not in (None, 0):
+                raise RuntimeError(
+                    f"actor process {worker.pid} exited with code {worker.exitcode}"
+                )
+
+        if timeout is not None and n_seconds_waited >= timeout:
+            raise RuntimeError(f"no message from the actors in {timeout} seconds")
+
+
+def run_actor_learner(
+    n_players,
+    n_episodes,
+    n_workers,
+    sync_interval,
+    seed=None,
+    q_backend=None,
+    timeout=600.0,
+):
+
+    """
+    Generate episodes in n_workers actor processes and learn from all of their
+    transitions in this (learner) process. Every sync_interval episodes, each actor requests
+    the learner's latest weights, so actors play with a recent snapshot of q
+    Each actor gets an independent child of seed, so that the same seed gives every actor
+    the same random stream (although the episodes each actor plays depend on timing)
+    If an actor crashes, or the actors send nothing for timeout seconds, the other actors are
+    stopped and a RuntimeError is raised
+    """
+
+    if n_workers < 1:
+        raise ValueError(f"n_workers must be at least 1, not {n_workers}")
+
+    if sync_interval < 1:
+        raise ValueError(f"sync_interval must be at least 1, not {sync_interval}")
+
+    learner = Agent(player_index=0, q_backend=q_backend)
+
+    # Note: tensorflow does not support forking a process that has already initialized it
+    context = multiprocessing.get_context("spawn")
+
+    episode_queue = context.Queue()
+    message_queue = context.Queue()
+    weights_queues = [context.Queue() for _ in range(n_workers)]
+
+    for episode in range(n_episodes):
+        episode_queue.put(episode)
+
+    # Note: each worker stops when it receives None
+    for _ in range(n_workers):
+        episode_queue.put(None)
+
+    worker_seeds = np.random.SeedSequence(seed).spawn(n_workers)
+
+    workers = [
+        context.Process(
+            target=run_actor,
+            args=(
+                actor_index,
+                n_players,
+                episode_queue,
+                message_queue,
+                weights_queue,
+                sync_interval,
+                worker_seed,
+            ),
+        )
+        for actor_index, (weights_queue, worker_seed) in enumerate(
+            zip(weights_queues, worker_seeds)
+        )
+    ]
+
+    # Note: every message in a queue is eventually read (each weights message answers a request),
+    #  so that no process is left waiting to flush a queue when it exits
+    try:
+
+        for worker in workers:
+            worker.start()
+
+        n_episodes_received = 0
 
+        while n_episodes_received < n_episodes:
 
-def run_sarsa(n_players, n_episodes=2000):
+            actor_index, transitions = receive_message(message_queue, workers, timeout)
+
+            if transitions is None:
+                weights_queues[actor_index].put(learner.get_weights())
+                continue
+
+            for private_state, action, updated_guess_for_q in transitions:
+                learner.update_q(private_state, action, updated_guess_for_q)
+
+            n_episodes_received += 1
+
+        for worker in workers:
+            worker.join()
+
+    finally:
+
+        # Note: if the learner stops early, unread messages must not keep this process from exiting
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+
+        for process_queue in [episode_queue, message_queue] + weights_queues:
+            process_queue.cancel_join_thread()
+
+    return learner
+
+
+def get_training_state(
+    episode, q_backend, rngs, deck_buffer, replay_buffer, hand_history=None
+):
+
+    """
+    Everything run_sarsa needs to continue exactly where it left off at the start of episode,
+    as (arrays, metadata) for poker.checkpoint.save_checkpoint
+    """
+
+    arrays = with_prefix("q_backend", q_backend.get_state())
+    arrays.update(with_prefix("deck_buffer", deck_buffer.get_state()))
+
+    if replay_buffer is not None:
+        arrays.update(with_prefix("replay_buffer", replay_buffer.get_state()))
+
+    metadata = {"episode": episode, "rng_states": get_rng_states(rngs)}
+
+    # Note: the hands recorded after the checkpoint are played again when resuming,
+    #  so they are removed from the hand history
+    if hand_history is not None:
+        metadata["n_hand_history_records"] = hand_history.n_records
+
+    return arrays, metadata
+
+
+def set_training_state(arrays, metadata, q_backend, rngs, deck_buffer, replay_buffer):
+
+    q_backend.set_state(without_prefix("q_backend", arrays))
+    deck_buffer.set_state(without_prefix("deck_buffer", arrays))
+
+    if replay_buffer is not None:
+        replay_buffer.set_state(without_prefix("replay_buffer", arrays))
+
+    set_rng_states(rngs, metadata["rng_states"])
+
+    return metadata["episode"]
+
+
+def run_sarsa(
+    n_players,
+    n_episodes=2000,
+    n_workers=0,
+    sync_interval=10,
+    replay_capacity=None,
+    batch_size=32,
+    train_every=4,
+    hand_history_path=None,
+    seed=None,
+    q_backend=None,
+    checkpoint_path=None,
+    checkpoint_every=100,
+    resume=False,
+):
 
     # This is (roughly) Sutton and Barto Figure 6.9
     # page 130, TODO compare to page 131
     # page 244
 
-    players = [Agent(player_index) for player_index in range(n_players)]
+    # Note: q_backend (e.g. a poker.q_backends.HashedQTable) replaces the default keras network.
+    #  When n_workers is not 0, it must be a poker.q_backends.KerasQBackend, since the actors play
+    #  with a poker.policy.Policy built from the network's weights, and the replay buffer, hand
+    #  history and checkpoints (which would have to be shared between processes) are not supported
 
-    for episode in range(n_episodes):
+    # Note: when n_workers is 0 and a checkpoint_path is given, a checkpoint of the q backend
+    #  (including the optimizer's state), the buffers, the random generators and the episode
+    #  counter is saved every checkpoint_every episodes (and at the end), on a background thread
+    #  If resume is True and the checkpoint exists, training continues exactly where it stopped
 
-        run_one_episode(episode, players)
+    if n_workers > 0:
 
-    players[0].describe_learned_q_function()
+        if q_backend is not None and not isinstance(q_backend, KerasQBackend):
+            raise ValueError(
+                "actors can only play with the weights of a KerasQBackend,"
+                f" not a {type(q_backend).__name__}"
+            )
+
+        for name, value in [
+            ("replay_capacity", replay_capacity),
+            ("hand_history_path", hand_history_path),
+            ("checkpoint_path", checkpoint_path),
+        ]:
+            if value is not None:
+                raise ValueError(f"{name} is not supported when n_workers > 0")
+
+        learner = run_actor_learner(
+            n_players, n_episodes, n_workers, sync_interval, seed, q_backend=q_backend
+        )
+        learner.describe_learned_q_function()
+
+        return
+
+    # Note: all seats share one q backend (by default, one keras model and one policy), so memory
+    #  does not grow with the number of seats, and weights are never copied between seats
+    #  The seats, the cards and the replay buffer each get a generator derived from seed
+    rngs = spawn_generators(seed, n_players + 2)
+
+    learner = Agent(player_index=0, q_backend=q_backend, rng=rngs[0])
+    players = [learner] + [
+        Agent(
+            player_index,
+            q_backend=learner.q_backend.share(),
+            rng=rngs[player_index],
+        )
+        for player_index in range(1, n_players)
+    ]
+
+    # Note: the replay buffer's memory is allocated once, up front
+    replay_buffer = None
+    if replay_capacity is not None:
+        replay_buffer = ReplayBuffer(
+            replay_capacity, players[0].len_private_state, rng=rngs[-1]
+        )
+
+    # Note: decks for all episodes are generated in large batches
+    deck_buffer = DeckBuffer(n_cards_to_deal(n_players), rng=rngs[n_players])
 
+    first_episode = 0
+    n_hand_history_records = None
+
+    if resume and checkpoint_path is not None and os.path.exists(checkpoint_path):
+
+        arrays, metadata = load_checkpoint(checkpoint_path)
+        first_episode = set_training_state(
+            arrays,
+            metadata,
+            learner.q_backend,
+            rngs,
+            deck_buffer,
+            replay_buffer,
+        )
+        n_hand_history_records = metadata.get("n_hand_history_records")
+
+        print(f"Resuming from episode {first_episode} of {checkpoint_path}")
+
+    # Note: the hand history and the checkpointer are closed even if training raises, so that
+    #  the recorded hands are flushed and the last checkpoint requested is still written
+    with contextlib.ExitStack() as writers:
+
+        # Note: when resuming, the hand history recorded up to the checkpoint is kept
+        hand_history = None
+        if hand_history_path is not None:
+            hand_history = writers.enter_context(
+                HandHistoryWriter(
+                    hand_history_path,
+                    n_players,
+                    n_records_to_keep=n_hand_history_records,
+                )
+            )
+
+        checkpointer = None
+        if checkpoint_path is not None:
+            checkpointer = writers.enter_context(Checkpointer(checkpoint_path))
+
+        for episode in range(first_episode, n_episodes):
+
+            run_one_episode(
+                episode,
+                players,
+                replay_buffer=replay_buffer,
+                batch_size=batch_size,
+                train_every=train_every,
+                hand_history=hand_history,
+                deck_buffer=deck_buffer,
+            )
+
+            n_episodes_played = episode + 1
+
+            if checkpointer is not None and (
+                n_episodes_played % checkpoint_every == 0
+                or n_episodes_played == n_episodes
+            ):
+                checkpointer.save(
+                    *get_training_state(
+                        n_episodes_played,
+                        learner.q_backend,
+                        rngs,
+                        deck_buffer,
+                        replay_buffer,
+                        hand_history,
+                    )
+                )
+
+    players[0].describe_learned_q_function()
 
-def main(n_players=3):
 
-    run_sarsa(n_players)
+def main():
+
+    parser = argparse.ArgumentParser(description="Train an agent with SARSA")
+    parser.add_argument("--n-players", type=int, default=3)
+    parser.add_argument("--n-episodes", type=int, default=2000)
+    parser.add_argument("--n-workers", type=int, default=0)
+    parser.add_argument("--sync-interval", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--checkpoint", help="path of the .npz checkpoint to save")
+    parser.add_argument("--checkpoint-every", type=int, default=100)
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue from the checkpoint, if it exists",
+    )
+    args = parser.parse_args()
+
+    run_sarsa(
+        args.n_players,
+        n_episodes=args.n_episodes,
+        n_workers=args.n_workers,
+        sync_interval=args.sync_interval,
+        seed=args.seed,
+        checkpoint_path=args.checkpoint,
+        checkpoint_every=args.checkpoint_every,
+        resume=args.resume,
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,53 @@
+import numpy as np
+
+from poker.inference import NumpyQFunction
+
+
+class Policy:
+
+    """
+    A versioned q function that any number of seats can play with
+    The weights are read-only and never modified in place: set_weights replaces the q function
+    and increments version, so a seat holding the previous q function keeps a consistent
+    snapshot, and seats only need to take a new reference (not a copy) when the version changes
+    """
+
+    def __init__(self, weights=None):
+
+        self.version = 0
+
+        # Note: a policy created without weights has nothing to play with until
+        #  the weights of the model it is published from are first needed
+        self.q_function = None
+        self.is_stale = True
+
+        if weights is not None:
+            self.set_weights(weights)
+
+    def set_weights(self, weights):
+
+        # Note: this is the only place where weights are copied
+        weights = [np.array(array, dtype=np.float32) for array in weights]
+
+        for array in weights:
+            array.flags.writeable = False
+
+        self.q_function = NumpyQFunction(weights)
+        self.version += 1
+
+        # Note: is_stale is set when the keras model this policy was published from
+        #  has been trained since, i.e. when the weights need to be published again
+        self.is_stale = False
+
+
+def random_weights(rng, n_inputs, n_units=64):
+
+    # Note: the same layer shapes as poker.q_function.get_model, so that no tensorflow is needed
+    return [
+        rng.normal(size=(n_inputs, n_units)) / np.sqrt(n_inputs),
+        np.zeros(n_units),
+        rng.normal(size=(n_units, n_units)) / np.sqrt(n_units),
+        np.zeros(n_units),
+        rng.normal(size=(n_units, 1)) / np.sqrt(n_units),
+        np.zeros(1),
+    ]
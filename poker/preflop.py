@@ -0,0 +1,160 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+
+import numpy as np
+
+from poker.cards import Card, Rank, Suit
+from poker.equity import Equity, estimate_equity
+from poker.tables import save_table, table_path
+
+# Note: up to nine players, so up to eight opponents
+MAX_OPPONENTS = 8
+
+N_STARTING_HANDS = len(Rank) * len(Rank)
+
+PREFLOP_EQUITY_TABLE = "preflop_equity_v1"
+
+
+def starting_hand_index(first_card, second_card):
+
+    """
+    Map two hole cards to one of the 169 suit-isomorphic starting hands, laid out as a 13 x 13 grid:
+    pairs are on the diagonal, suited hands have the higher rank as their row,
+    and offsuit hands have the higher rank as their column
+    """
+
+    first_rank, first_suit = divmod(first_card, len(Suit))
+    second_rank, second_suit = divmod(second_card, len(Suit))
+
+    high_rank, low_rank = max(first_rank, second_rank), min(first_rank, second_rank)
+
+    if first_suit == second_suit:
+        return high_rank * len(Rank) + low_rank
+
+    return low_rank * len(Rank) + high_rank
+
+
+def representative_hole_cards(index):
+
+    row, column = divmod(index, len(Rank))
+
+    if row > column:
+        # Note: suited hand
+        return [Card(Rank(column), Suit.HEARTS), Card(Rank(row), Suit.HEARTS)]
+
+    return [Card(Rank(row), Suit.HEARTS), Card(Rank(column), Suit.SPADES)]
+
+
+def describe_starting_hand(index):
+
+    row, column = divmod(index, len(Rank))
+
+    if row == column:
+        return f"pair of {Rank(row).name}"
+
+    if row > column:
+        return f"{Rank(row).name} {Rank(column).name} suited"
+
+    return f"{Rank(column).name} {Rank(row).name} offsuit"
+
+
+def starting_hand_equity(index, n_opponents, n_samples, seed):
+
+    return estimate_equity(
+        representative_hole_cards(index),
+        n_opponents=n_opponents,
+        max_samples=n_samples,
+        batch_size=min(n_samples, 50_000),
+        seed=seed,
+    )
+
+
+def generate_preflop_equity_table(
+    n_samples=1_000_000, max_opponents=MAX_OPPONENTS, n_workers=None, seed=0
+):
+
+    """
+    Estimate the all-in equity of every starting hand against 1 to max_opponents random hands
+    Returns a float32 array of shape (169, max_opponents, len(Equity._fields))
+    """
+
+    tasks = list(product(range(N_STARTING_HANDS), range(1, max_opponents + 1)))
+    seeds = np.random.SeedSequence(seed).generate_state(len(tasks)).tolist()
+
+    arguments = (
+        [index for index, _ in tasks],
+        [n_opponents for _, n_opponents in tasks],
+        [n_samples] * len(tasks),
+        seeds,
+    )
+
+    if n_workers == 1:
+        equities = list(map(starting_hand_equity, *arguments))
+
+    else:
+        with ProcessPoolExecutor(n_workers) as executor:
+            equities = list(executor.map(starting_hand_equity, *arguments))
+
+    table = np.array(equities, dtype=np.float32)
+
+    return table.reshape(N_STARTING_HANDS, max_opponents, len(Equity._fields))
+
+
+def preflop_equity_table():
+
+    path = table_path(PREFLOP_EQUITY_TABLE)
+
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"{path} does not exist, generate it with `python -m poker.preflop`"
+        )
+
+    return np.load(path, mmap_mode="r")
+
+
+# Note: the table is memory-mapped the first time it is needed
+PREFLOP_EQUITY = {}
+
+
+def preflop_equity(first_card, second_card, n_opponents=1):
+
+    if not PREFLOP_EQUITY:
+        PREFLOP_EQUITY["table"] = preflop_equity_table()
+
+    # Note: the table has one column per number of opponents, starting from one
+    max_opponents = PREFLOP_EQUITY["table"].shape[1]
+
+    if not 1 <= n_opponents <= max_opponents:
+        raise ValueError(
+            f"n_opponents must be between 1 and {max_opponents}, not {n_opponents}"
+        )
+
+    row = PREFLOP_EQUITY["table"][
+        starting_hand_index(first_card, second_card), n_opponents - 1
+    ]
+
+    return Equity(*row[:-1].tolist(), n_samples=int(row[-1]))
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Precompute the preflop equity of all 169 starting hands"
+    )
+    parser.add_argument("--n-samples", type=int, default=1_000_000)
+    parser.add_argument("--n-workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    table = generate_preflop_equity_table(
+        n_samples=args.n_samples, n_workers=args.n_workers, seed=args.seed
+    )
+    save_table(PREFLOP_EQUITY_TABLE, table)
+
+    print(f"Saved preflop equities to {table_path(PREFLOP_EQUITY_TABLE)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+import argparse
+import contextlib
+import csv
+import functools
+import io
+import json
+import time
+import tracemalloc
+
+import numpy as np
+
+import poker.hands
+import poker.play
+import poker.state
+from poker.agent import Agent, random_policy_players
+from poker.q_backends import HashedQTable, KerasQBackend
+from poker.state import State
+
+# Note: (object, attribute, name) of every instrumented point. best_hand_strength is patched
+#  both where it is defined and where poker.state imported it
+PROFILED_POINTS = [
+    (State, "update", "State.update"),
+    (State, "calculate_best_hand_strengths", "State.calculate_best_hand_strengths"),
+    (poker.hands, "best_hand_strength", "best_hand_strength"),
+    (poker.state, "best_hand_strength", "best_hand_strength"),
+    (Agent, "get_action", "Agent.get_action"),
+    (KerasQBackend, "predict_batch", "predict"),
+    (KerasQBackend, "update_batch", "fit"),
+    (HashedQTable, "predict_batch", "predict"),
+    (HashedQTable, "update_batch", "fit"),
+    (KerasQBackend, "copy_from", "weight_sync"),
+    (HashedQTable, "copy_from", "weight_sync"),
+    (poker.play, "run_one_episode", "run_one_episode"),
+]
+
+FIELDS = ["calls", "seconds", "allocated_bytes"]
+
+
+class Profiler:
+
+    """
+    Count calls and cumulative time (and, if track_allocations, the net memory allocated)
+    at the points in PROFILED_POINTS. The points are only wrapped while the profiler is enabled,
+    so there is no cost at all otherwise. Counters are summarized at the end of every episode
+    Calls made while the same point is already running (e.g. State.update dealing the blinds
+    of the next hand) are counted, but their time is only included once
+    """
+
+    def __init__(self, track_allocations=False):
+
+        self.track_allocations = track_allocations
+        self.counters = {}
+        self.depths = {}
+        self.episodes = []
+        self.originals = []
+        self.started_tracing = False
+
+    def enable(self):
+
+        # Note: memory may already be traced by the caller, in which case it is left running
+        if self.track_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+
+        for owner, attribute, name in PROFILED_POINTS:
+
+            original = getattr(owner, attribute)
+            self.originals.append((owner, attribute, original))
+            setattr(owner, attribute, self.wrap(original, name))
+
+    def disable(self):
+
+        for owner, attribute, original in reversed(self.originals):
+            setattr(owner, attribute, original)
+
+        self.originals = []
+
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    def __enter__(self):
+
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+
+        self.disable()
+
+    def wrap(self, function, name):
+
+        self.counters.setdefault(name, dict.fromkeys(FIELDS, 0))
+        self.depths.setdefault(name, 0)
+
+        @functools.wraps(function)
+        def profiled(*args, **kwargs):
+
+            counter = self.counters[name]
+            counter["calls"] += 1
+
+            if self.depths[name] > 0:
+                return function(*args, **kwargs)
+
+            self.depths[name] += 1
+
+            if self.track_allocations:
+                memory_before = tracemalloc.get_traced_memory()[0]
+
+            start_time = time.perf_counter()
+
+            try:
+                return function(*args, **kwargs)
+
+            finally:
+
+                counter["seconds"] += time.perf_counter() - start_time
+
+                if self.track_allocations:
+                    memory_after = tracemalloc.get_traced_memory()[0]
+                    counter["allocated_bytes"] += memory_after - memory_before
+
+                self.depths[name] -= 1
+
+                if name == "run_one_episode":
+                    self.end_episode()
+
+        return profiled
+
+    def end_episode(self):
+
+        self.episodes.append(
+            {name: dict(counter) for name, counter in self.counters.items()}
+        )
+
+        for counter in self.counters.values():
+            for field in FIELDS:
+                counter[field] = 0
+
+    def rows(self):
+
+        return [
+            {"episode": episode, "name": name, **counter}
+            for episode, counters in enumerate(self.episodes)
+            for name, counter in counters.items()
+        ]
+
+    def totals(self):
+
+        totals = {name: dict.fromkeys(FIELDS, 0) for name in self.counters}
+
+        for counters in self.episodes + [self.counters]:
+            for name, counter in counters.items():
+                for field in FIELDS:
+                    totals[name][field] += counter[field]
+
+        return totals
+
+    def to_json(self, path):
+
+        with open(path, "w") as output_file:
+            json.dump({"episodes": self.episodes, "totals": self.totals()}, output_file)
+
+    def to_csv(self, path):
+
+        with open(path, "w", newline="") as output_file:
+            writer = csv.DictWriter(
+                output_file, fieldnames=["episode", "name"] + FIELDS
+            )
+            writer.writeheader()
+            writer.writerows(self.rows())
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Profile where the time of run_one_episode goes"
+    )
+    parser.add_argument("--n-episodes", type=int, default=20)
+    parser.add_argument("--track-allocations", action="store_true")
+    parser.add_argument(
+        "--output", help="write per-episode counters to a .json or .csv"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    players = random_policy_players(np.random.default_rng(args.seed))
+
+    with Profiler(track_allocations=args.track_allocations) as profiler:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for episode in range(args.n_episodes):
+                poker.play.run_one_episode(episode, players, learn=False)
+
+    for name, total in profiler.totals().items():
+        print(
+            f"{name:<36} {total['calls']:>10} calls {total['seconds']:>10.4f}s"
+            f" {total['allocated_bytes']:>12} bytes"
+        )
+
+    if args.output and args.output.endswith(".csv"):
+        profiler.to_csv(args.output)
+    elif args.output:
+        profiler.to_json(args.output)
+
+
+if __name__ == "__main__":
+    main()
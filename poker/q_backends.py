@@ -0,0 +1,278 @@
+import numpy as np
+
+from poker.inference import load_weights, save_weights
+from poker.policy import Policy
+from poker.q_function import get_model
+
+# Note: the 64-bit FNV-1a offset basis and prime
+FNV_OFFSET = np.uint64(0xCBF29CE484222325)
+FNV_PRIME = np.uint64(0x100000001B3)
+
+
+def optimizer_variables(optimizer):
+
+    # Note: variables is a method in tf.keras, and a property in keras 3
+    variables = optimizer.variables
+    variables = list(variables() if callable(variables) else variables)
+
+    # Note: some optimizers also keep state in variables that they don't list (e.g. the learning
+    #  rate, or Nadam's running product of momentum schedules in tf.keras), which we add in
+    #  the order of their attribute names
+    listed_variables = {id(variable) for variable in variables}
+
+    for _, value in sorted(vars(optimizer).items()):
+        if hasattr(value, "assign") and id(value) not in listed_variables:
+            variables.append(value)
+
+    return variables
+
+
+def count_prefix(state, prefix):
+
+    return sum(name.startswith(prefix) for name in state)
+
+
+class KerasQBackend:
+
+    """
+    Q(private_state, action) as the keras network from poker.q_function.get_model
+    Every update_batch is one gradient step, and predictions are made with a NumPy copy of the
+    network: the latest version of a Policy that the seats sharing this model also share
+    """
+
+    def __init__(
+        self,
+        n_inputs,
+        n_actions,
+        model=None,
+        policy=None,
+        weights=None,
+        verbose=False,
+    ):
+
+        # Note: a backend created from weights or from a policy alone can only predict
+        #  (it has no keras model to train), and it never imports tensorflow
+        if model is None and weights is None and policy is None:
+            model = get_model(n_actions=n_actions, n_inputs=n_inputs, verbose=verbose)
+
+        self.n_inputs = n_inputs
+        self.n_actions = n_actions
+        self.model = model
+
+        # Note: seats that share a model should also share its policy, so that the weights
+        #  are published (copied out of the model) once per update rather than once per seat
+        self.policy = Policy(weights) if policy is None else policy
+
+        # Note: predictions use a reference to one version of the policy's q function,
+        #  which is only replaced when sync_policy is called
+        self.q_function = self.policy.q_function
+        self.policy_version = self.policy.version
+
+    def share(self):
+
+        # Note: a backend for another seat, which trains the same model and plays with the same policy
+        return KerasQBackend(
+            self.n_inputs, self.n_actions, model=self.model, policy=self.policy
+        )
+
+    def sync_policy(self):
+
+        if self.policy_version != self.policy.version:
+            self.q_function = self.policy.q_function
+            self.policy_version = self.policy.version
+
+    def copy_from(self, other):
+
+        if self.policy is other.policy:
+
+            # Note: publish the other backend's latest weights, if it has been trained since
+            other.get_q_function()
+            self.sync_policy()
+
+        else:
+            self.set_weights(other.get_weights())
+
+    def get_q_function(self):
+
+        # Note: after the model has been trained, its weights are published as a new version
+        #  of the policy (lazily, so that several updates in a row only publish once)
+        if self.model is not None and self.policy.is_stale:
+            self.policy.set_weights(self.model.get_weights())
+            self.sync_policy()
+
+        return self.q_function
+
+    def get_weights(self):
+
+        # Note: these are the latest published weights, which are newer than this backend's
+        #  snapshot if another backend sharing the policy has published them since
+        self.get_q_function()
+        return self.policy.q_function.get_weights()
+
+    def set_weights(self, weights):
+
+        if self.model is not None:
+            self.model.set_weights(weights)
+
+        self.policy.set_weights(weights)
+        self.sync_policy()
+
+    def predict_batch(self, model_input):
+
+        # Note: the network returns predictions of shape (len(model_input), 1)
+        return self.get_q_function().predict(model_input)[:, 0]
+
+    def update_batch(self, model_input, targets):
+
+        self.model.train_on_batch(x=model_input, y=targets)
+
+        # Note: the model's weights have changed, so the published policy is now stale
+        self.policy.is_stale = True
+
+    def get_state(self):
+
+        """
+        The weights and the optimizer's variables (e.g. its moment estimates and step count),
+        i.e. everything needed to resume training, as a dictionary of arrays
+        """
+
+        # Note: the published weights are read-only, so they don't need to be copied
+        weights = self.get_weights()
+        state = {f"weights_{index}": array for index, array in enumerate(weights)}
+
+        if self.model is not None:
+            for index, variable in enumerate(optimizer_variables(self.model.optimizer)):
+                state[f"optimizer_{index}"] = np.array(variable)
+
+        return state
+
+    def set_state(self, state):
+
+        self.set_weights(
+            [
+                state[f"weights_{index}"]
+                for index in range(count_prefix(state, "weights_"))
+            ]
+        )
+
+        n_optimizer_variables = count_prefix(state, "optimizer_")
+
+        if self.model is None or n_optimizer_variables == 0:
+            return
+
+        optimizer = self.model.optimizer
+        variables = optimizer_variables(optimizer)
+
+        # Note: optimizers create their variables on their first update,
+        #  so a new optimizer has to be built before its variables can be restored
+        if len(variables) != n_optimizer_variables:
+            optimizer.build(self.model.trainable_variables)
+            variables = optimizer_variables(optimizer)
+
+        for index, variable in enumerate(variables):
+            variable.assign(state[f"optimizer_{index}"])
+
+    def save(self, path):
+
+        save_weights(path, self.get_weights())
+
+    def load(self, path):
+
+        self.set_weights(load_weights(path))
+
+
+class HashedQTable:
+
+    """
+    Q(private_state, action) as a table of n_buckets values, indexed by a hash of the model input
+    (with every feature rounded to a multiple of resolution). Updates move the value of each row's
+    bucket towards its target by learning_rate, in constant time per row and without tensorflow
+    Unlike the keras network, the table does not generalize: inputs that round differently
+    never share a value, unless (rarely, with many buckets) their hashes collide
+    """
+
+    def __init__(self, n_inputs, n_buckets=2**20, learning_rate=0.1, resolution=1.0):
+
+        self.n_inputs = n_inputs
+        self.n_buckets = n_buckets
+        self.learning_rate = learning_rate
+        self.resolution = resolution
+
+        self.values = np.zeros(n_buckets, dtype=np.float32)
+
+    def share(self):
+
+        # Note: seats share the table itself, which is updated in place
+        return self
+
+    def copy_from(self, other):
+
+        if other is not self:
+            np.copyto(self.values, other.values)
+
+    def buckets(self, model_input):
+
+        keys = np.rint(np.asarray(model_input) / self.resolution).astype(np.int64)
+        keys = keys.view(np.uint64)
+
+        hashes = np.full(len(keys), FNV_OFFSET)
+        for column in keys.T:
+            hashes = (hashes ^ column) * FNV_PRIME
+
+        return (hashes % np.uint64(self.n_buckets)).astype(np.intp)
+
+    def predict_batch(self, model_input):
+
+        return self.values[self.buckets(model_input)].astype(np.float64)
+
+    def update_batch(self, model_input, targets):
+
+        buckets = self.buckets(model_input)
+        errors = np.asarray(targets, dtype=np.float32) - self.values[buckets]
+
+        # Note: rows that share a bucket all move its value
+        np.add.at(self.values, buckets, self.learning_rate * errors)
+
+    def get_weights(self):
+
+        return [self.values.copy()]
+
+    def set_weights(self, weights):
+
+        (values,) = weights
+        self.values = np.array(values, dtype=np.float32)
+        self.n_buckets = len(self.values)
+
+    def get_state(self):
+
+        return {
+            "values": self.values.copy(),
+            "learning_rate": np.array(self.learning_rate),
+            "resolution": np.array(self.resolution),
+        }
+
+    def set_state(self, state):
+
+        self.values = np.array(state["values"], dtype=np.float32)
+        self.n_buckets = len(self.values)
+        self.learning_rate = float(state["learning_rate"])
+        self.resolution = float(state["resolution"])
+
+    def save(self, path):
+
+        # Note: as in poker.inference.save_weights, the file is written to path exactly
+        with open(path, "wb") as table_file:
+            np.savez(
+                table_file,
+                values=self.values,
+                learning_rate=self.learning_rate,
+                resolution=self.resolution,
+            )
+
+    def load(self, path):
+
+        with np.load(path) as table_file:
+            self.values = table_file["values"]
+            self.n_buckets = len(self.values)
+            self.learning_rate = float(table_file["learning_rate"])
+            self.resolution = float(table_file["resolution"])
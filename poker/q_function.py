@@ -1,15 +1,15 @@
-from tensorflow.keras import losses, optimizers
-from tensorflow.keras.models import Model
-from tensorflow.keras.layers import (
-    Dense,
-    Input,
-)
-
-
-def get_model(n_actions, n_inputs, n_units=64):
+def get_model(n_actions, n_inputs, n_units=64, verbose=False):
 
     # This is a model for Q(private_state, action), i.e. an action-value function
 
+    # Note: tensorflow takes seconds to import, so we only import it once a model is needed
+    from tensorflow.keras import losses, optimizers
+    from tensorflow.keras.models import Model
+    from tensorflow.keras.layers import (
+        Dense,
+        Input,
+    )
+
     input_layer = Input(shape=(n_inputs,))
 
     layer1 = Dense(n_units, activation="relu")(input_layer)
@@ -25,6 +25,7 @@ def get_model(n_actions, n_inputs, n_units=64):
         optimizer=nadam, loss=losses.mean_squared_error, metrics=["mean_squared_error"],
     )
 
-    print(model.summary())
+    if verbose:
+        print(model.summary())
 
     return model
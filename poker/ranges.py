@@ -0,0 +1,275 @@
+import math
+from collections import namedtuple
+from functools import lru_cache
+from itertools import combinations
+
+import numpy as np
+
+from poker.cards import FULL_DECK, cards_to_mask
+from poker.equity import N_PUBLIC_CARDS
+from poker.hands import batch_hand_strength
+from poker.preflop import starting_hand_index
+
+# Note: a range is an array of N_COMBOS weights, one for every two-card combination of hole cards,
+#  in the order of COMBOS (which lists the pairs of card indexes in lexicographic order)
+COMBOS = np.array(list(combinations(range(len(FULL_DECK)), 2)), dtype=np.int32)
+N_COMBOS = len(COMBOS)
+
+# Note: the 52-bit mask of each combo's cards (as in poker.cards.cards_to_mask)
+COMBO_MASKS = np.left_shift(np.uint64(1), COMBOS.astype(np.uint64)).sum(
+    axis=1, dtype=np.uint64
+)
+
+COMBO_INDEXES = np.full((len(FULL_DECK), len(FULL_DECK)), -1, dtype=np.int32)
+COMBO_INDEXES[COMBOS[:, 0], COMBOS[:, 1]] = np.arange(N_COMBOS)
+COMBO_INDEXES[COMBOS[:, 1], COMBOS[:, 0]] = np.arange(N_COMBOS)
+
+# Note: the index of each combo's starting hand, as in poker.preflop.starting_hand_index
+STARTING_HAND_INDEXES = np.array(
+    [starting_hand_index(first, second) for first, second in COMBOS], dtype=np.int32
+)
+
+# Note: the largest number of runouts that are enumerated rather than sampled, i.e. every turn
+#  and river on the flop (there are 1,081 of them)
+MAX_EXACT_RUNOUTS = math.comb(len(FULL_DECK) - 3, N_PUBLIC_CARDS - 3)
+
+# Note: equity[i, j] is the equity of COMBOS[i] against COMBOS[j], averaged over n_runouts[i, j]
+#  runouts of the board. n_runouts is 0 for pairs of combos that can't be dealt together
+#  (they share a card, or one of them shares a card with the board), whose equity is also 0
+EquityMatrix = namedtuple("EquityMatrix", ["equity", "n_runouts"])
+
+
+def combo_index(first_card, second_card):
+
+    return int(COMBO_INDEXES[first_card, second_card])
+
+
+@lru_cache(maxsize=None)
+def combo_conflicts():
+
+    # Note: an (N_COMBOS, N_COMBOS) boolean matrix, true where two combos share a card
+    return (COMBO_MASKS[:, np.newaxis] & COMBO_MASKS[np.newaxis, :]) != 0
+
+
+def expand_starting_hands(starting_hand_weights):
+
+    """
+    The range that gives every combo the weight of its starting hand, from an array of
+    169 weights laid out as in poker.preflop.starting_hand_index
+    """
+
+    return np.asarray(starting_hand_weights, dtype=np.float64)[STARTING_HAND_INDEXES]
+
+
+def remove_blocked_combos(weights, dead_cards):
+
+    """
+    A copy of the range where the combos that contain any of dead_cards have no weight, e.g.
+    to remove a player's own hole cards from an opponent's range
+    """
+
+    dead_cards_mask = np.uint64(cards_to_mask(dead_cards))
+    return np.where(COMBO_MASKS & dead_cards_mask, 0.0, weights)
+
+
+def runouts(public_cards, n_runouts=None, rng=None):
+
+    """
+    An (R, 5 - len(public_cards)) array of the cards that complete the board: every completion if
+    n_runouts is None (there are at most MAX_EXACT_RUNOUTS of them, i.e. from the flop onwards),
+    and otherwise n_runouts completions drawn uniformly at random with rng
+    """
+
+    dead_cards_mask = cards_to_mask(public_cards)
+    live_cards = np.array(
+        [card for card in FULL_DECK if not dead_cards_mask >> card & 1], dtype=np.int32
+    )
+
+    n_missing_public_cards = N_PUBLIC_CARDS - len(public_cards)
+
+    if n_runouts is None:
+
+        n_runouts = math.comb(len(live_cards), n_missing_public_cards)
+
+        if n_runouts > MAX_EXACT_RUNOUTS:
+            raise ValueError(
+                f"there are too many runouts of {len(public_cards)} public cards to enumerate,"
+                " n_runouts must be given"
+            )
+
+        return np.array(
+            list(combinations(live_cards, n_missing_public_cards)), dtype=np.int32
+        ).reshape(n_runouts, n_missing_public_cards)
+
+    if rng is None:
+        rng = np.random.default_rng()
+
+    # Note: as in poker.equity.sample_showdowns, every row is an independent random permutation
+    permutations = np.argsort(rng.random((n_runouts, len(live_cards))), axis=1)
+    return live_cards[permutations[:, :n_missing_public_cards]]
+
+
+def runout_strengths(public_cards, runout_cards):
+
+    """
+    The (R, N_COMBOS) array of the strength of every combo's best hand on every board made of
+    public_cards and one row of runout_cards (as returned by runouts), or 0 where
+    the combo shares a card with that board
+    These are evaluated once per board, in one batch, and then reused for every pair of combos
+    """
+
+    n_runouts = len(runout_cards)
+
+    boards = np.concatenate(
+        [
+            np.broadcast_to(
+                np.array(public_cards, dtype=np.int32), (n_runouts, len(public_cards))
+            ),
+            runout_cards,
+        ],
+        axis=1,
+    )
+
+    board_masks = np.left_shift(np.uint64(1), boards.astype(np.uint64)).sum(
+        axis=1, dtype=np.uint64
+    )
+    is_blocked = (board_masks[:, np.newaxis] & COMBO_MASKS[np.newaxis, :]) != 0
+
+    # Note: only hands without duplicate cards are evaluated
+    runout_indexes, combo_indexes = np.nonzero(~is_blocked)
+    hands = np.concatenate([boards[runout_indexes], COMBOS[combo_indexes]], axis=1)
+
+    strengths = np.zeros((n_runouts, N_COMBOS), dtype=np.int16)
+    strengths[runout_indexes, combo_indexes] = batch_hand_strength(hands)
+
+    return strengths
+
+
+def equity_matrix(public_cards, n_runouts=None, seed=None):
+
+    """
+    The EquityMatrix of every combo against every other combo, on a board that starts with
+    public_cards (e.g. State.public_cards): exact over every runout if n_runouts is None, and
+    otherwise estimated with n_runouts random runouts (which are required before the flop)
+    On the river, this takes a small fraction of a second
+    """
+
+    runout_cards = runouts(public_cards, n_runouts, np.random.default_rng(seed))
+    strengths = runout_strengths(public_cards, runout_cards)
+
+    # Note: the sign of the difference of strengths is +1 for a win, -1 for a loss and 0 for a tie,
+    #  so that equity = (1 + mean sign) / 2 over the runouts
+    signs = np.zeros((N_COMBOS, N_COMBOS), dtype=np.int32)
+    differences = np.empty((N_COMBOS, N_COMBOS), dtype=np.int16)
+
+    for runout_strength in strengths:
+        np.subtract.outer(runout_strength, runout_strength, out=differences)
+        np.sign(differences, out=differences)
+        signs += differences
+
+    # Note: a blocked combo has a strength of 0, so it "loses" to every combo that isn't blocked.
+    #  Over the runouts where only one combo of a pair is blocked, that adds n_i - n_j to signs[i, j],
+    #  where n_i is the number of runouts that don't block combo i, so it can be subtracted at once
+    is_valid = strengths > 0
+    n_valid_runouts = is_valid.sum(axis=0)
+    signs -= np.subtract.outer(n_valid_runouts, n_valid_runouts).astype(np.int32)
+
+    is_valid = is_valid.astype(np.float32)
+    pair_runouts = np.rint(is_valid.T @ is_valid).astype(np.int32)
+    pair_runouts[combo_conflicts()] = 0
+
+    signs += pair_runouts
+    equity = np.divide(
+        signs,
+        pair_runouts,
+        out=np.zeros((N_COMBOS, N_COMBOS), dtype=np.float32),
+        where=pair_runouts > 0,
+    )
+    equity *= 0.5
+
+    return EquityMatrix(equity, pair_runouts)
+
+
+def equity_matrix_at_state(game_state, **kwargs):
+
+    return equity_matrix(game_state.public_cards, **kwargs)
+
+
+def range_equity(matrix, weights, opponent_weights):
+
+    """
+    The equity of a range against an opponent's range, given their EquityMatrix
+    Every pair of combos is weighted by the product of their weights and by its number of runouts,
+    so that card removal is taken into account exactly
+    """
+
+    wins = matrix.equity * matrix.n_runouts
+    return (weights @ wins @ opponent_weights) / (
+        weights @ matrix.n_runouts @ opponent_weights
+    )
+
+
+def combo_equities(matrix, opponent_weights):
+
+    """
+    The equity of every combo against an opponent's range, given their EquityMatrix
+    (0 for the combos that can't be dealt against any combo of that range)
+    """
+
+    wins = (matrix.equity * matrix.n_runouts) @ opponent_weights
+    totals = matrix.n_runouts @ opponent_weights
+
+    return np.divide(wins, totals, out=np.zeros(N_COMBOS), where=totals > 0)
+
+
+def multiway_equity(ranges, public_cards, n_samples=10_000, n_runouts=None, seed=None):
+
+    """
+    Estimate the equity of each of two or more players' ranges against all the others, on a board
+    that starts with public_cards, from n_samples deals of one combo per range and one runout
+    (out of n_runouts random runouts, or every runout if n_runouts is None)
+    Deals where two players' combos share a card, or a combo shares a card with the board,
+    are rejected, so card removal is exact and only the accepted deals are averaged
+    Raises a ValueError if a range has no weight, or if every deal is rejected
+    """
+
+    for weights in ranges:
+        if not np.sum(weights) > 0:
+            raise ValueError("every range must have a positive total weight")
+
+    rng = np.random.default_rng(seed)
+
+    runout_cards = runouts(public_cards, n_runouts, rng)
+    strengths = runout_strengths(public_cards, runout_cards)
+
+    runout_indexes = rng.integers(len(runout_cards), size=n_samples)
+    combo_indexes = np.stack(
+        [
+            rng.choice(N_COMBOS, size=n_samples, p=weights / np.sum(weights))
+            for weights in ranges
+        ],
+        axis=1,
+    )
+
+    hand_strengths = strengths[runout_indexes[:, np.newaxis], combo_indexes]
+
+    # Note: a combo that shares a card with the board has a strength of 0
+    is_possible = (hand_strengths > 0).all(axis=1)
+
+    dealt_cards_mask = np.zeros(n_samples, dtype=np.uint64)
+    for combo_masks in COMBO_MASKS[combo_indexes].T:
+        is_possible &= (dealt_cards_mask & combo_masks) == 0
+        dealt_cards_mask |= combo_masks
+
+    hand_strengths = hand_strengths[is_possible]
+
+    if len(hand_strengths) == 0:
+        raise ValueError(
+            "none of the deals were possible, the ranges may block each other or the board"
+        )
+
+    # Note: a k-way tie for the best hand is worth 1 / k of the pot to each of the k players
+    is_best = hand_strengths == hand_strengths.max(axis=1, keepdims=True)
+    pot_shares = is_best / is_best.sum(axis=1, keepdims=True)
+
+    return pot_shares.mean(axis=0)
@@ -0,0 +1,90 @@
+import numpy as np
+
+
+class ReplayBuffer:
+
+    """
+    A fixed-capacity ring buffer of SARSA transitions (private_state, action, reward,
+    next_private_state, next_action, terminal), stored in arrays that are allocated up front
+    Once the buffer is full, new transitions overwrite the oldest ones
+    """
+
+    def __init__(self, capacity, len_private_state, rng=None):
+
+        self.capacity = capacity
+        self.rng = np.random.default_rng() if rng is None else rng
+
+        self.private_states = np.zeros((capacity, len_private_state), dtype=np.float32)
+        self.actions = np.zeros(capacity, dtype=np.float32)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_private_states = np.zeros(
+            (capacity, len_private_state), dtype=np.float32
+        )
+        self.next_actions = np.zeros(capacity, dtype=np.float32)
+        self.terminal = np.zeros(capacity, dtype=bool)
+
+        # Note: n_added counts every transition ever added, including overwritten ones
+        self.n_added = 0
+
+    def __len__(self):
+
+        return min(self.n_added, self.capacity)
+
+    @property
+    def nbytes(self):
+
+        return sum(array.nbytes for array in self.arrays().values())
+
+    def add(
+        self, private_state, action, reward, next_private_state, next_action, terminal
+    ):
+
+        index = self.n_added % self.capacity
+
+        self.private_states[index] = private_state
+        self.actions[index] = action
+        self.rewards[index] = reward
+        self.next_private_states[index] = next_private_state
+        self.next_actions[index] = next_action
+        self.terminal[index] = terminal
+
+        self.n_added += 1
+
+    def get_state(self):
+
+        # Note: copies, since the buffer keeps being written to (e.g. while a checkpoint is saved)
+        state = {name: array.copy() for name, array in self.arrays().items()}
+        state["n_added"] = np.array(self.n_added)
+
+        return state
+
+    def set_state(self, state):
+
+        for name, array in self.arrays().items():
+            array[...] = state[name]
+
+        self.n_added = int(state["n_added"])
+
+    def arrays(self):
+
+        return {
+            "private_states": self.private_states,
+            "actions": self.actions,
+            "rewards": self.rewards,
+            "next_private_states": self.next_private_states,
+            "next_actions": self.next_actions,
+            "terminal": self.terminal,
+        }
+
+    def sample(self, batch_size):
+
+        indexes = self.rng.integers(len(self), size=batch_size)
+
+        return (
+            self.private_states[indexes],
+            self.actions[indexes],
+            self.rewards[indexes],
+            self.next_private_states[indexes],
+            self.next_actions[indexes],
+            self.terminal[indexes],
+        )
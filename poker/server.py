@@ -0,0 +1,565 @@
+import argparse
+import asyncio
+import json
+import logging
+import numbers
+import time
+
+import numpy as np
+
+from poker.agent import Agent
+from poker.cards import FULL_DECK
+from poker.inference import load_weights
+from poker.policy import Policy
+from poker.state import GameStage, State
+from poker.utils import spawn_generators
+
+logger = logging.getLogger(__name__)
+
+# Note: the upper edges of the latency histogram's buckets (in seconds), 20 per decade from
+#  a microsecond to 1000s, so percentiles are accurate to about 12% however many decisions
+#  are made
+LATENCY_BUCKET_EDGES = np.geomspace(1e-6, 1e3, 181)
+
+
+class PlayerView:
+
+    """
+    What one player is allowed to see of a State when it is their turn: everything but the other
+    players' hole cards (which are None). It has the attributes and methods of a State that
+    Agent.get_action reads, so agents can act on a view as they would on a State
+    """
+
+    def __init__(
+        self,
+        table_index,
+        player_index,
+        n_actions_taken,
+        game_stage,
+        hole_cards,
+        public_cards,
+        wealth,
+        player_bets,
+        has_folded,
+        minimum_legal_bet,
+        maximum_legal_bet,
+    ):
+
+        self.table_index = table_index
+        self.player_index = player_index
+        self.current_player = player_index
+        self.n_actions_taken = n_actions_taken
+        self.game_stage = game_stage
+        self.hole_cards = hole_cards
+        self.public_cards = public_cards
+        self.wealth = wealth
+        self.player_bets = player_bets
+        self.has_folded = has_folded
+        self.legal_bets = (minimum_legal_bet, maximum_legal_bet)
+
+    @classmethod
+    def from_state(cls, game_state, table_index):
+
+        player_index = game_state.current_player
+
+        hole_cards = [None] * game_state.n_players
+        hole_cards[player_index] = list(game_state.hole_cards[player_index])
+
+        return cls(
+            table_index,
+            player_index,
+            game_state.n_actions_taken,
+            game_state.game_stage,
+            hole_cards,
+            list(game_state.public_cards),
+            list(game_state.wealth),
+            list(game_state.player_bets),
+            list(game_state.has_folded),
+            game_state.minimum_legal_bet(),
+            game_state.maximum_legal_bet(),
+        )
+
+    def minimum_legal_bet(self):
+
+        return self.legal_bets[0]
+
+    def maximum_legal_bet(self):
+
+        return self.legal_bets[1]
+
+    def total_bet_by_player(self, player_index):
+
+        return self.player_bets[player_index]
+
+    def is_legal(self, action):
+
+        # Note: negative actions indicate folding, which is always a legal action
+        return action < 0 or self.legal_bets[0] <= action <= self.legal_bets[1]
+
+    def default_action(self):
+
+        # Note: a player who does not act in time checks if they can, and folds otherwise
+        return 0 if self.legal_bets[0] == 0 else -1
+
+    def to_dict(self):
+
+        # Note: cards are sent as their indexes in FULL_DECK
+        return {
+            "table_index": self.table_index,
+            "player_index": self.player_index,
+            "n_actions_taken": self.n_actions_taken,
+            "game_stage": int(self.game_stage),
+            "hole_cards": [
+                None if cards is None else [int(card) for card in cards]
+                for cards in self.hole_cards
+            ],
+            "public_cards": [int(card) for card in self.public_cards],
+            "wealth": self.wealth,
+            "player_bets": self.player_bets,
+            "has_folded": self.has_folded,
+            "minimum_legal_bet": self.legal_bets[0],
+            "maximum_legal_bet": self.legal_bets[1],
+        }
+
+    @classmethod
+    def from_dict(cls, view):
+
+        return cls(
+            view["table_index"],
+            view["player_index"],
+            view["n_actions_taken"],
+            GameStage(view["game_stage"]),
+            [
+                None if cards is None else [FULL_DECK[card] for card in cards]
+                for cards in view["hole_cards"]
+            ],
+            [FULL_DECK[card] for card in view["public_cards"]],
+            view["wealth"],
+            view["player_bets"],
+            view["has_folded"],
+            view["minimum_legal_bet"],
+            view["maximum_legal_bet"],
+        )
+
+
+class QueueClient:
+
+    """
+    The server's end of an in-process client: decisions are put in requests as (view, future)
+    pairs, and the client sets each future's result to its action (see run_queue_agents)
+    requests holds at most max_pending decisions, after which tables wait for the client to catch up
+    Like any asyncio queue, it should be created inside the event loop that uses it
+    """
+
+    def __init__(self, max_pending=64):
+
+        self.requests = asyncio.Queue(maxsize=max_pending)
+
+    async def send(self, view):
+
+        # Note: this waits while the client has max_pending decisions to make already,
+        #  and returns a future of the client's action
+        future = asyncio.get_running_loop().create_future()
+        await self.requests.put((view, future))
+
+        return future
+
+
+class SocketClient:
+
+    """
+    The server's end of a client connected to a socket (see accept_socket_clients). Views are sent
+    as lines of JSON with a request_id, and the client answers each with a line holding the same
+    request_id and its action. At most max_pending decisions are in flight on one connection
+    Lines that can't be parsed are counted in n_malformed_messages, and otherwise ignored
+    """
+
+    def __init__(self, reader, writer, max_pending=64):
+
+        self.reader = reader
+        self.writer = writer
+        self.pending = {}
+        self.n_requests = 0
+        self.n_malformed_messages = 0
+        self.slots = asyncio.Semaphore(max_pending)
+
+        self.reader_task = asyncio.get_running_loop().create_task(self.read_actions())
+
+    async def read_actions(self):
+
+        while True:
+
+            line = await self.reader.readline()
+
+            if not line:
+                break
+
+            # Note: a malformed line is logged and ignored (its decision, if any, times out),
+            #  rather than ending this task, which would make every later decision time out
+            try:
+                response = json.loads(line)
+                request_id, action = response["request_id"], response["action"]
+                future = self.pending.get(request_id)
+
+            except (ValueError, KeyError, TypeError) as error:
+                self.n_malformed_messages += 1
+                logger.warning(
+                    "Ignoring a malformed message from a client (%r): %r", error, line
+                )
+                continue
+
+            # Note: answers to decisions that have already timed out are ignored
+            if future is not None and not future.done():
+                future.set_result(action)
+
+    async def send(self, view):
+
+        await self.slots.acquire()
+
+        request_id = self.n_requests
+        self.n_requests += 1
+
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+
+        # Note: the slot is freed once the decision is made (or cancelled, e.g. after a timeout)
+        def on_done(future):
+            del self.pending[request_id]
+            self.slots.release()
+
+        future.add_done_callback(on_done)
+
+        message = {"request_id": request_id, "view": view.to_dict()}
+        self.writer.write(json.dumps(message).encode() + b"\n")
+        await self.writer.drain()
+
+        return future
+
+    async def close(self):
+
+        self.reader_task.cancel()
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+class TableMetrics:
+
+    """
+    Counts of what happened at one table, and a histogram of the latency of its decisions
+    (in seconds), whose memory does not grow with the number of decisions
+    """
+
+    def __init__(self):
+
+        self.n_hands = 0
+        self.n_games = 0
+        self.n_timeouts = 0
+        self.n_illegal_actions = 0
+
+        self.n_decisions = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.latency_counts = np.zeros(len(LATENCY_BUCKET_EDGES) + 1, dtype=np.int64)
+
+    def record_latency(self, latency):
+
+        self.n_decisions += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        self.latency_counts[np.searchsorted(LATENCY_BUCKET_EDGES, latency)] += 1
+
+    def latency_percentile(self, percentile):
+
+        # Note: the upper edge of the bucket that holds the percentile (or the maximum latency,
+        #  which is also the only bound for the last bucket, of latencies over 1000s)
+        rank = int(np.ceil(percentile / 100 * self.n_decisions))
+        bucket = np.searchsorted(np.cumsum(self.latency_counts), max(rank, 1))
+
+        if bucket == len(LATENCY_BUCKET_EDGES):
+            return self.max_latency
+
+        return min(float(LATENCY_BUCKET_EDGES[bucket]), self.max_latency)
+
+    def summary(self):
+
+        summary = {
+            "n_hands": self.n_hands,
+            "n_games": self.n_games,
+            "n_decisions": self.n_decisions,
+            "n_timeouts": self.n_timeouts,
+            "n_illegal_actions": self.n_illegal_actions,
+        }
+
+        if self.n_decisions:
+            summary["mean_latency"] = self.total_latency / self.n_decisions
+            summary["p50_latency"] = self.latency_percentile(50)
+            summary["p99_latency"] = self.latency_percentile(99)
+            summary["max_latency"] = self.max_latency
+
+        return summary
+
+
+class HandCounter:
+
+    """
+    A recorder (see poker.state.State) that counts the hands finished in a State
+    """
+
+    def __init__(self, metrics):
+
+        self.metrics = metrics
+
+    def start_hand(self, deck, dealer):
+
+        pass
+
+    def record_action(self, game_state, action):
+
+        pass
+
+    def end_hand(self, game_state, winning_players, wealth_before):
+
+        self.metrics.n_hands += 1
+
+
+class GameServer:
+
+    """
+    Host many tables in one asyncio event loop. seat_clients[table_index][player_index] is the
+    client (e.g. a QueueClient or a SocketClient, or any object with an async send(view) method that
+    returns a future of the action) that acts for that seat, and one client can act
+    for any number of seats. A client that does not act within action_timeout seconds, or whose
+    action is illegal, checks if it can and folds otherwise
+    Each table plays games (until a player runs out of money, as in run_one_episode) one after
+    the other, until n_hands hands have been played at that table
+    """
+
+    def __init__(
+        self,
+        seat_clients,
+        action_timeout=1.0,
+        initial_wealth=100.0,
+        big_blind=2,
+        small_blind=1,
+        seed=None,
+    ):
+
+        self.seat_clients = seat_clients
+        self.n_tables = len(seat_clients)
+        self.action_timeout = action_timeout
+        self.initial_wealth = initial_wealth
+        self.big_blind = big_blind
+        self.small_blind = small_blind
+
+        self.rngs = spawn_generators(seed, self.n_tables)
+        self.metrics = [TableMetrics() for _ in range(self.n_tables)]
+
+    def new_state(self, table_index):
+
+        return State(
+            n_players=len(self.seat_clients[table_index]),
+            initial_wealth=self.initial_wealth,
+            big_blind=self.big_blind,
+            small_blind=self.small_blind,
+            recorder=HandCounter(self.metrics[table_index]),
+            rng=self.rngs[table_index],
+        )
+
+    async def get_action(self, table_index, view):
+
+        metrics = self.metrics[table_index]
+        client = self.seat_clients[table_index][view.player_index]
+
+        start_time = time.perf_counter()
+
+        # Note: the timeout starts once the client has accepted the decision, so that
+        #  tables waiting on a busy client (backpressure) are not penalized
+        future = await client.send(view)
+
+        try:
+            action = await asyncio.wait_for(future, self.action_timeout)
+
+        except asyncio.TimeoutError:
+            metrics.n_timeouts += 1
+            action = view.default_action()
+
+        metrics.record_latency(time.perf_counter() - start_time)
+
+        # Note: JSON true and false are bools, which are also numbers, but not bets
+        if (
+            isinstance(action, bool)
+            or not isinstance(action, numbers.Real)
+            or not view.is_legal(action)
+        ):
+            metrics.n_illegal_actions += 1
+            action = view.default_action()
+
+        return action
+
+    async def run_table(self, table_index, n_hands):
+
+        metrics = self.metrics[table_index]
+
+        while metrics.n_hands < n_hands:
+
+            game_state = self.new_state(table_index)
+            metrics.n_games += 1
+
+            while not game_state.terminal and metrics.n_hands < n_hands:
+                view = PlayerView.from_state(game_state, table_index)
+                game_state.update(await self.get_action(table_index, view))
+
+    async def run(self, n_hands):
+
+        await asyncio.gather(
+            *(
+                self.run_table(table_index, n_hands)
+                for table_index in range(self.n_tables)
+            )
+        )
+
+        return [metrics.summary() for metrics in self.metrics]
+
+
+async def accept_socket_clients(n_clients, host="127.0.0.1", port=0, max_pending=64):
+
+    """
+    Listen on host:port (port 0 picks a free port) until n_clients clients have connected
+    Return the listening server (whose address is server.sockets[0].getsockname())
+    and a future of the list of SocketClients, in the order in which they connected
+    """
+
+    clients = []
+    all_connected = asyncio.get_running_loop().create_future()
+
+    async def on_connect(reader, writer):
+
+        clients.append(SocketClient(reader, writer, max_pending))
+
+        if len(clients) == n_clients:
+            all_connected.set_result(clients)
+
+    server = await asyncio.start_server(on_connect, host, port)
+
+    return server, all_connected
+
+
+def choose_action(agents, view, proba_random_action):
+
+    # Note: agents[player_index] acts for that seat at every table
+    return agents[view.player_index].get_action(view, proba_random_action)
+
+
+async def run_queue_agents(client, agents, proba_random_action=0.0):
+
+    """
+    Act for the seats of a QueueClient with agents (e.g. poker.agent.Agents), until cancelled
+    """
+
+    while True:
+
+        view, future = await client.requests.get()
+
+        if not future.done():
+            future.set_result(choose_action(agents, view, proba_random_action))
+
+
+async def run_socket_agents(host, port, agents, proba_random_action=0.0):
+
+    """
+    Connect to a GameServer's socket and act for its seats with agents, until the server disconnects
+    """
+
+    reader, writer = await asyncio.open_connection(host, port)
+
+    while True:
+
+        line = await reader.readline()
+
+        if not line:
+            break
+
+        request = json.loads(line)
+        view = PlayerView.from_dict(request["view"])
+
+        response = {
+            "request_id": request["request_id"],
+            "action": choose_action(agents, view, proba_random_action),
+        }
+        writer.write(json.dumps(response).encode() + b"\n")
+        await writer.drain()
+
+    writer.close()
+
+
+async def serve(n_tables, n_players, n_hands, host, port, action_timeout, seed):
+
+    # Note: client i (in the order in which they connect) acts for seat i at every table
+    listener, connected = await accept_socket_clients(n_players, host, port)
+    print(f"Waiting for {n_players} clients on {host}:{port}")
+
+    clients = await connected
+    server = GameServer([clients] * n_tables, action_timeout=action_timeout, seed=seed)
+    metrics = await server.run(n_hands)
+
+    for client in clients:
+        await client.close()
+
+    listener.close()
+
+    return metrics
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Host many tables for socket clients, or connect to a server as a client"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--n-tables", type=int, default=100)
+    parser.add_argument("--n-players", type=int, default=2)
+    parser.add_argument("--n-hands", type=int, default=100)
+    parser.add_argument("--action-timeout", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument(
+        "--client", action="store_true", help="connect to a server and play"
+    )
+    parser.add_argument(
+        "--weights", help="weights the client plays with (default: random play)"
+    )
+    args = parser.parse_args()
+
+    if args.client:
+
+        weights = None if args.weights is None else load_weights(args.weights)
+        proba_random_action = 1.0 if weights is None else 0.0
+
+        policy = Policy(weights)
+        agents = [
+            Agent(player_index, policy=policy) for player_index in range(args.n_players)
+        ]
+
+        asyncio.run(
+            run_socket_agents(args.host, args.port, agents, proba_random_action)
+        )
+
+        return
+
+    metrics = asyncio.run(
+        serve(
+            args.n_tables,
+            args.n_players,
+            args.n_hands,
+            args.host,
+            args.port,
+            args.action_timeout,
+            args.seed,
+        )
+    )
+
+    print(json.dumps(metrics, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,10 @@
 from enum import IntEnum
-from random import sample
 
 import numpy as np
 
-from poker.cards import Suit, Rank, Card, FULL_DECK
-from poker.hands import best_hand_strength, sort_hand
+from poker.cards import Suit, Rank, Card
+from poker.dealing import n_cards_to_deal, partial_shuffle
+from poker.hands import best_hand_strength, describe_hand_strength, sort_hand
 from poker.utils import argmax
 
 
@@ -26,6 +26,9 @@ class State:
         initial_dealer=0,
         verbose=False,
         deck=None,
+        recorder=None,
+        rng=None,
+        deck_buffer=None,
     ):
 
         self.n_players = n_players
@@ -34,11 +37,41 @@ class State:
         self.wealth = [initial_wealth for player in range(self.n_players)]
         self.verbose = verbose
 
+        # Note: every State shuffles with its own random number generator, so that
+        #  games are reproducible given the generator's seed
+        self.rng = np.random.default_rng() if rng is None else rng
+
+        # Note: if a deck_buffer (a poker.dealing.DeckBuffer) is given, decks are taken from it
+        #  rather than shuffled one at a time
+        self.deck_buffer = deck_buffer
+
+        # Note: if a recorder is given (e.g. a poker.history.HandHistoryRecorder),
+        #  it is told about the start of every hand, every action and the end of every hand
+        self.recorder = recorder
+
         if self.verbose:
             print(
                 f"Initialized game with {self.n_players} players each with wealth ${initial_wealth}"
             )
 
+        # Note: bets are tracked in lists that are allocated once and reset in place for every hand
+        #  bets_by_stage[stage][player] is the list of bets made by player during stage, and
+        #  stage_bets[stage][player] and player_bets[player] are running totals of those bets
+        self.bets_by_stage = {
+            stage: [[] for player in range(self.n_players)] for stage in GameStage
+        }
+        self.stage_bets = [
+            [0 for player in range(self.n_players)] for stage in GameStage
+        ]
+        self.player_bets = [0 for player in range(self.n_players)]
+        self.pot = 0
+
+        self.has_folded = [False for player in range(self.n_players)]
+
+        # Note: this counts every action (including the blinds), so (state, n_actions_taken)
+        #  identifies the state at one point in the game, e.g. for caching
+        self.n_actions_taken = 0
+
         self.initialize_pre_flop(dealer=initial_dealer, deck=deck)
 
         self.terminal = False
@@ -50,10 +83,13 @@ class State:
     def initialize_pre_flop(self, dealer, deck=None):
 
         if deck is None:
-            self.shuffled_deck = sample(FULL_DECK, k=len(FULL_DECK))
+            self.shuffled_deck = self.new_deck()
         else:
             self.shuffled_deck = deck
 
+        if self.recorder is not None:
+            self.recorder.start_hand(self.shuffled_deck, dealer)
+
         self.public_cards = []
 
         # Note: these are the private (face down) cards which are hidden from other players
@@ -64,14 +100,15 @@ class State:
 
         self.dealer = dealer
 
-        self.has_folded = [False for player in range(self.n_players)]
+        for player in range(self.n_players):
+            self.has_folded[player] = False
+
+        self.update_minimum_wealth()
 
         # Note: this is the player to the left of the dealer
         self.current_player = self.get_next_player(self.dealer)
 
-        self.bets_by_stage = {
-            stage: [[] for player in range(self.n_players)] for stage in GameStage
-        }
+        self.reset_bets()
 
         # Note: the first player to act is forced to bet the small blind,
         #  and the second player to act is forced to bet the big blind,
@@ -87,6 +124,14 @@ class State:
         big_blind = min(self.big_blind, min_wealth)
         self.update(big_blind)
 
+    def new_deck(self):
+
+        if self.deck_buffer is not None:
+            return self.deck_buffer.next_deck()
+
+        # Note: only the cards that can be dealt are shuffled
+        return partial_shuffle(n_cards_to_deal(self.n_players), self.rng)
+
     def get_next_player(self, current_player):
 
         next_player = (current_player + 1) % self.n_players
@@ -110,45 +155,54 @@ class State:
         #  The order of a player's hole cards does not affect the strength of their hand
         return [sort_hand(self.deal_k_cards(2)) for player in range(self.n_players)]
 
-    def total_bets(self):
+    def reset_bets(self):
+
+        for stage in GameStage:
+            for player in range(self.n_players):
+                self.bets_by_stage[stage][player].clear()
+                self.stage_bets[stage][player] = 0
 
-        total = 0
-        for stage_bets in self.bets_by_stage.values():
-            total += sum(sum(player_bets) for player_bets in stage_bets)
+        for player in range(self.n_players):
+            self.player_bets[player] = 0
+
+        self.pot = 0
+
+    def update_minimum_wealth(self):
 
-        return total
+        # Note: this only changes when wealth is redistributed or when a player folds,
+        #  so we cache it rather than recomputing it for every legal bet query
+        self.minimum_wealth = min(
+            wealth
+            for wealth, has_folded in zip(self.wealth, self.has_folded)
+            if not has_folded
+        )
+
+    def total_bets(self):
+
+        return self.pot
 
     def total_bet_by_player(self, player_index):
 
-        return sum(sum(self.bets_by_stage[stage][player_index]) for stage in GameStage)
+        return self.player_bets[player_index]
 
     def maximum_legal_bet(self):
 
         # Note: we don't allow bets that would put any non-folded player past all in
         #  That way, we can keep things simple and ignore side pots (because they can't happen)
-
-        total_bet_by_current_player = self.total_bet_by_player(self.current_player)
-
-        return min(
-            self.wealth[player] - total_bet_by_current_player
-            for player in range(self.n_players)
-            if not self.has_folded[player]
-        )
+        return self.minimum_wealth - self.player_bets[self.current_player]
 
     def minimum_legal_bet(self):
 
-        total_bet_current_player = sum(
-            self.bets_by_stage[self.game_stage][self.current_player]
-        )
+        stage_bets = self.stage_bets[self.game_stage]
+
+        total_bet_current_player = stage_bets[self.current_player]
 
         # Note: we want the previous player who has not folded
         previous_player = (self.current_player - 1) % self.n_players
         while self.has_folded[previous_player]:
             previous_player = (previous_player - 1) % self.n_players
 
-        total_bet_previous_player = sum(
-            self.bets_by_stage[self.game_stage][previous_player]
-        )
+        total_bet_previous_player = stage_bets[previous_player]
 
         return total_bet_previous_player - total_bet_current_player
 
@@ -161,10 +215,8 @@ class State:
             return False
 
         # Note: these are totals for the current stage only (e.g. player 1 has bet a total of $40 during the turn)
-        total_bet_current_player = sum(
-            self.bets_by_stage[self.game_stage][self.current_player]
-        )
-        total_bet_next_player = sum(self.bets_by_stage[self.game_stage][next_player])
+        total_bet_current_player = self.stage_bets[self.game_stage][self.current_player]
+        total_bet_next_player = self.stage_bets[self.game_stage][next_player]
 
         # TODO This is incorrect pre-flop, when the big blind is allowed to raise
         # TODO Could this lead to an infinite loop / never-ending stage if a player does not have enough wealth to complete the bet?
@@ -177,6 +229,7 @@ class State:
         if action < 0:
 
             self.has_folded[self.current_player] = True
+            self.update_minimum_wealth()
 
             if self.verbose:
                 print(f"Player {self.current_player} folds")
@@ -190,21 +243,24 @@ class State:
             assert minimum_legal_bet <= action <= maximum_legal_bet
 
             self.bets_by_stage[self.game_stage][self.current_player].append(action)
+            self.stage_bets[self.game_stage][self.current_player] += action
+            self.player_bets[self.current_player] += action
+            self.pot += action
 
             if self.verbose:
                 print(f"Player {self.current_player} bets ${action}")
 
     def redistribute_wealth_and_reinitialize(self, winning_players):
 
+        wealth_before = list(self.wealth)
+
         losing_players = set(range(self.n_players)).difference(winning_players)
 
         for losing_player in losing_players:
 
             for stage in GameStage:
 
-                total_bet_by_losing_player = sum(
-                    self.bets_by_stage[stage][losing_player]
-                )
+                total_bet_by_losing_player = self.stage_bets[stage][losing_player]
                 self.wealth[losing_player] -= total_bet_by_losing_player
 
                 if self.wealth[losing_player] <= 0:
@@ -220,6 +276,9 @@ class State:
         if self.verbose:
             print(f"Player wealths are now {self.wealth}")
 
+        if self.recorder is not None:
+            self.recorder.end_hand(self, winning_players, wealth_before)
+
         # Now that we have redistributed wealth, we assign a new dealer,
         #  deal new cards and go back to the initial stage
         next_dealer = (self.dealer + 1) % self.n_players
@@ -227,7 +286,7 @@ class State:
 
     def calculate_best_hand_strengths(self):
 
-        hand_strengths, hand_descriptions = ([], [])
+        hand_strengths = []
 
         for player in range(self.n_players):
 
@@ -235,16 +294,24 @@ class State:
                 # Note: players who have folded are given a negative hand strength,
                 #  which prevents them from ever winning
                 hand_strengths.append(-1)
-                hand_descriptions.append("player has folded")
 
             else:
-                hand_strength, hand_description = best_hand_strength(
-                    self.public_cards, self.hole_cards[player]
+                hand_strengths.append(
+                    best_hand_strength(self.public_cards, self.hole_cards[player])
                 )
-                hand_strengths.append(hand_strength)
-                hand_descriptions.append(hand_description)
 
-        return hand_strengths, hand_descriptions
+        return hand_strengths
+
+    def describe_hands(self, hand_strengths):
+
+        return [
+            (
+                "player has folded"
+                if hand_strength < 0
+                else describe_hand_strength(hand_strength)
+            )
+            for hand_strength in hand_strengths
+        ]
 
     def move_to_next_stage(self):
 
@@ -268,6 +335,11 @@ class State:
         if self.verbose:
             print(self)
 
+        if self.recorder is not None:
+            self.recorder.record_action(self, action)
+
+        self.n_actions_taken += 1
+
         self.update_has_folded_or_bets(action)
 
         over_due_to_folding = sum(self.has_folded) >= self.n_players - 1
@@ -284,13 +356,15 @@ class State:
 
                 # Note: we've reached the river and the stage is complete,
                 #  so we need to figure out who has the strongest hand
-                hand_strengths, hand_descriptions = self.calculate_best_hand_strengths()
+                hand_strengths = self.calculate_best_hand_strengths()
 
                 # TODO This is incorrect if there are ties (multiple players with the same hand),
                 #  in which case the winners split the pot
                 winning_players = argmax(hand_strengths)
 
                 if self.verbose:
+                    # Note: descriptions are only needed for printing, so we don't build them otherwise
+                    hand_descriptions = self.describe_hands(hand_strengths)
                     print(f"Hands: {hand_descriptions}")
                     winning_hand_description = hand_descriptions[winning_players[0]]
                     print(
@@ -0,0 +1,51 @@
+import os
+
+import numpy as np
+
+# Note: generated lookup tables are cached in this directory, so that each
+#  table is only built once per machine and is then memory-mapped on load
+TABLE_DIRECTORY = os.environ.get(
+    "POKER_TABLE_DIRECTORY", os.path.join(os.path.expanduser("~"), ".cache", "poker")
+)
+
+
+def table_path(name):
+
+    return os.path.join(TABLE_DIRECTORY, f"{name}.npy")
+
+
+def save_table(name, table):
+
+    os.makedirs(TABLE_DIRECTORY, exist_ok=True)
+
+    # Note: we write to a temporary file and then rename it, so that concurrent
+    #  processes never memory-map a partially written table
+    path = table_path(name)
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+
+    with open(temporary_path, "wb") as table_file:
+        np.save(table_file, table)
+
+    os.replace(temporary_path, path)
+
+
+def load_table(name, generate):
+
+    """
+    Memory-map the table with the given name, calling generate() to build
+    (and cache) the table if it does not exist yet
+    """
+
+    path = table_path(name)
+
+    if not os.path.exists(path):
+
+        table = generate()
+
+        try:
+            save_table(name, table)
+        except OSError:
+            # Note: if the table directory is not writable, we use the table without caching it
+            return table
+
+    return np.load(path, mmap_mode="r")
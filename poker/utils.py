@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def argmax(values):
 
     """
@@ -16,3 +19,17 @@ def argmax(values):
             max_value = value
 
     return argmax_indexes
+
+
+def spawn_generators(seed, n_generators):
+
+    """
+    Return n_generators independent numpy Generators derived from seed,
+    which can be an int, None (for fresh entropy) or a numpy SeedSequence
+    The same seed always gives the same generators, e.g. one per worker or per table
+    """
+
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+
+    return [np.random.default_rng(child) for child in seed.spawn(n_generators)]
@@ -0,0 +1,340 @@
+import numpy as np
+
+from poker.cards import FULL_DECK
+from poker.dealing import generate_decks, n_cards_to_deal
+from poker.hands import batch_hand_strength
+from poker.state import GameStage
+
+N_PUBLIC_CARDS = 5
+
+# Note: the number of public cards that have been dealt at each game stage
+N_PUBLIC_CARDS_BY_STAGE = np.array([0, 3, 4, 5])
+
+
+class VectorState:
+
+    """
+    N independent tables advanced in lockstep. Each table follows exactly the same rules as
+    poker.state.State, but the game is stored in arrays with one row per table, so that
+    every table takes one action per call to update(actions)
+    Tables whose game ends (because a player ran out of money) are flagged in self.terminal
+    and automatically restarted with fresh wealth, as if a new State had been created
+    """
+
+    def __init__(
+        self,
+        n_tables,
+        n_players=3,
+        initial_wealth=100.0,
+        big_blind=2,
+        small_blind=1,
+        initial_dealer=0,
+        decks=None,
+        rng=None,
+    ):
+
+        self.n_tables = n_tables
+        self.n_players = n_players
+        self.initial_wealth = initial_wealth
+        self.big_blind = big_blind
+        self.small_blind = small_blind
+        self.initial_dealer = initial_dealer
+        self.rng = np.random.default_rng() if rng is None else rng
+
+        shape = (n_tables, n_players)
+        self.wealth = np.full(shape, initial_wealth, dtype=np.float64)
+        self.has_folded = np.zeros(shape, dtype=bool)
+
+        # Note: bets[table, stage, player] is the total bet by player during stage, and
+        #  has_bet_this_stage records whether the player has bet at all (possibly zero) this stage
+        self.bets = np.zeros((n_tables, len(GameStage), n_players), dtype=np.float64)
+        self.total_bets = np.zeros(shape, dtype=np.float64)
+        self.has_bet_this_stage = np.zeros(shape, dtype=bool)
+
+        self.game_stage = np.zeros(n_tables, dtype=np.int64)
+        self.dealer = np.full(n_tables, initial_dealer, dtype=np.int64)
+        self.current_player = np.zeros(n_tables, dtype=np.int64)
+
+        # Note: as in State, cards are dealt (popped) off of the end of each table's deck
+        self.decks = np.zeros((n_tables, len(FULL_DECK)), dtype=np.int64)
+        self.n_cards_in_deck = np.zeros(n_tables, dtype=np.int64)
+        self.hole_cards = np.zeros((n_tables, n_players, 2), dtype=np.int64)
+        self.public_cards = np.zeros((n_tables, N_PUBLIC_CARDS), dtype=np.int64)
+
+        # Note: terminal[table] is True if the table's game ended during the last update,
+        #  in which case final_wealth[table] holds the wealths at the end of that game
+        self.terminal = np.zeros(n_tables, dtype=bool)
+        self.final_wealth = np.zeros(shape, dtype=np.float64)
+
+        all_tables = np.arange(n_tables)
+
+        if decks is not None:
+            decks = np.asarray(decks)
+            self.decks[:, : decks.shape[1]] = decks
+            self.n_cards_in_deck[:] = decks.shape[1]
+
+        self.start_new_hands(all_tables, shuffle=decks is None)
+
+    @property
+    def n_public_cards(self):
+
+        return N_PUBLIC_CARDS_BY_STAGE[self.game_stage]
+
+    def new_decks(self, tables):
+
+        # Note: only the cards that can be dealt are shuffled, as in State
+        return generate_decks(len(tables), n_cards_to_deal(self.n_players), self.rng)
+
+    def next_players(self, tables, players):
+
+        # Note: this is State.get_next_player for each table: the first player after players[i]
+        #  who has not folded, or players[i] itself if everyone else has folded
+        offsets = np.arange(1, self.n_players + 1)
+        candidates = (players[:, np.newaxis] + offsets) % self.n_players
+
+        is_candidate = ~self.has_folded[tables[:, np.newaxis], candidates]
+        is_candidate[:, -1] = True
+
+        return candidates[np.arange(len(tables)), np.argmax(is_candidate, axis=1)]
+
+    def previous_players(self, tables, players):
+
+        offsets = np.arange(1, self.n_players + 1)
+        candidates = (players[:, np.newaxis] - offsets) % self.n_players
+
+        is_candidate = ~self.has_folded[tables[:, np.newaxis], candidates]
+
+        return candidates[np.arange(len(tables)), np.argmax(is_candidate, axis=1)]
+
+    def stage_bets(self, tables, players):
+
+        return self.bets[tables, self.game_stage[tables], players]
+
+    def minimum_legal_bets(self, tables):
+
+        current_players = self.current_player[tables]
+        previous_players = self.previous_players(tables, current_players)
+
+        return self.stage_bets(tables, previous_players) - self.stage_bets(
+            tables, current_players
+        )
+
+    def maximum_legal_bets(self, tables):
+
+        # Note: as in State, we don't allow bets that would put any non-folded player past all in
+        total_bet_by_current_player = self.total_bets[
+            tables, self.current_player[tables]
+        ]
+        wealth = np.where(self.has_folded[tables], np.inf, self.wealth[tables])
+
+        return wealth.min(axis=1) - total_bet_by_current_player
+
+    def minimum_legal_bet(self):
+
+        return self.minimum_legal_bets(np.arange(self.n_tables))
+
+    def maximum_legal_bet(self):
+
+        return self.maximum_legal_bets(np.arange(self.n_tables))
+
+    def legal_action_mask(self, actions):
+
+        """
+        Return an (n_tables, len(actions)) boolean array that is True where the action is legal
+        Negative actions indicate folding, which is always legal
+        """
+
+        actions = np.asarray(actions)[np.newaxis, :]
+
+        minimum_legal_bet = self.minimum_legal_bet()[:, np.newaxis]
+        maximum_legal_bet = self.maximum_legal_bet()[:, np.newaxis]
+
+        return (actions < 0) | (
+            (minimum_legal_bet <= actions) & (actions <= maximum_legal_bet)
+        )
+
+    def deal_cards(self, tables, n_cards):
+
+        # Note: cards[i, j] is the j-th card popped off of the end of table i's deck
+        positions = self.n_cards_in_deck[tables, np.newaxis] - 1 - np.arange(n_cards)
+        self.n_cards_in_deck[tables] -= n_cards
+
+        return self.decks[tables[:, np.newaxis], positions]
+
+    def start_new_hands(self, tables, shuffle=True):
+
+        while len(tables) > 0:
+
+            if shuffle:
+                self.decks[tables] = self.new_decks(tables)
+                self.n_cards_in_deck[tables] = len(FULL_DECK)
+
+            shuffle = True
+
+            # Note: hole cards are dealt two at a time to each player, and sorted (as in State)
+            hole_cards = self.deal_cards(tables, 2 * self.n_players)
+            self.hole_cards[tables] = np.sort(
+                hole_cards.reshape(len(tables), self.n_players, 2), axis=2
+            )
+
+            self.game_stage[tables] = GameStage.PRE_FLOP
+            self.has_folded[tables] = False
+            self.bets[tables] = 0
+            self.total_bets[tables] = 0
+            self.has_bet_this_stage[tables] = False
+            self.current_player[tables] = self.next_players(tables, self.dealer[tables])
+
+            # Note: the blinds are forced bets, and they are capped by the smallest wealth
+            min_wealth = self.wealth[tables].min(axis=1)
+
+            finished_on_small_blind = self.apply_actions(
+                tables, np.minimum(self.small_blind, min_wealth)
+            )
+
+            still_playing = ~np.isin(tables, finished_on_small_blind)
+            finished_on_big_blind = self.apply_actions(
+                tables[still_playing],
+                np.minimum(self.big_blind, min_wealth[still_playing]),
+            )
+
+            tables = np.concatenate([finished_on_small_blind, finished_on_big_blind])
+
+    def move_to_next_stage(self, tables):
+
+        self.game_stage[tables] += 1
+        self.has_bet_this_stage[tables] = False
+
+        # Note: after moving to the next stage, the first person to act is
+        #  the first person left of the dealer (ignoring players who have already folded)
+        self.current_player[tables] = self.next_players(tables, self.dealer[tables])
+
+        flop = tables[self.game_stage[tables] == GameStage.FLOP]
+        self.public_cards[flop, :3] = self.deal_cards(flop, 3)
+
+        for stage in (GameStage.TURN, GameStage.RIVER):
+            dealt = tables[self.game_stage[tables] == stage]
+            self.public_cards[dealt, stage + 1] = self.deal_cards(dealt, 1)[:, 0]
+
+    def showdown_winners(self, tables):
+
+        hands = np.concatenate(
+            [
+                np.broadcast_to(
+                    self.public_cards[tables, np.newaxis, :],
+                    (len(tables), self.n_players, N_PUBLIC_CARDS),
+                ),
+                self.hole_cards[tables],
+            ],
+            axis=2,
+        )
+
+        hand_strengths = batch_hand_strength(hands.reshape(-1, hands.shape[2])).reshape(
+            len(tables), self.n_players
+        )
+
+        # Note: players who have folded can never win
+        hand_strengths = np.where(self.has_folded[tables], -1, hand_strengths)
+
+        return hand_strengths == hand_strengths.max(axis=1, keepdims=True)
+
+    def redistribute_wealth(self, tables, winners):
+
+        # Note: losers pay everything they bet, and winners split it equally
+        losing_bets = np.where(winners, 0.0, self.total_bets[tables])
+        pot_share = losing_bets.sum(axis=1) / winners.sum(axis=1)
+
+        wealth = self.wealth[tables] - losing_bets + winners * pot_share[:, np.newaxis]
+        self.wealth[tables] = wealth
+
+        # Note: for simplicity, the game ends as soon as any player runs out of money
+        game_over = ((wealth <= 0) & ~winners).any(axis=1)
+        game_over_tables = tables[game_over]
+
+        self.terminal[game_over_tables] = True
+        self.final_wealth[game_over_tables] = wealth[game_over]
+
+        self.wealth[game_over_tables] = self.initial_wealth
+        self.dealer[game_over_tables] = self.initial_dealer
+
+        continuing_tables = tables[~game_over]
+        self.dealer[continuing_tables] = (
+            self.dealer[continuing_tables] + 1
+        ) % self.n_players
+
+    def apply_actions(self, tables, actions):
+
+        """
+        Take one action at each of the given tables, returning the tables whose hand has ended
+        (the caller is responsible for dealing the next hand at those tables)
+        """
+
+        actions = np.asarray(actions, dtype=np.float64)
+        current_players = self.current_player[tables]
+
+        # Note: negative bets indicate that the player is folding
+        folding = actions < 0
+        betting = ~folding
+
+        minimum_legal_bets = self.minimum_legal_bets(tables)
+        maximum_legal_bets = self.maximum_legal_bets(tables)
+
+        # Note: blow up if any player tries to take an illegal action
+        assert np.all(
+            folding
+            | ((minimum_legal_bets <= actions) & (actions <= maximum_legal_bets))
+        )
+
+        self.has_folded[tables[folding], current_players[folding]] = True
+
+        betting_tables = tables[betting]
+        betting_players = current_players[betting]
+
+        self.bets[
+            betting_tables, self.game_stage[betting_tables], betting_players
+        ] += actions[betting]
+        self.total_bets[betting_tables, betting_players] += actions[betting]
+        self.has_bet_this_stage[betting_tables, betting_players] = True
+
+        over_due_to_folding = self.has_folded[tables].sum(axis=1) >= self.n_players - 1
+
+        next_players = self.next_players(tables, current_players)
+
+        stage_is_complete = (
+            ~over_due_to_folding
+            & self.has_bet_this_stage[tables, current_players]
+            & self.has_bet_this_stage[tables, next_players]
+            & (
+                self.stage_bets(tables, current_players)
+                == self.stage_bets(tables, next_players)
+            )
+        )
+
+        at_river = self.game_stage[tables] == GameStage.RIVER
+
+        continuing = ~over_due_to_folding & ~stage_is_complete
+        self.current_player[tables[continuing]] = next_players[continuing]
+
+        self.move_to_next_stage(tables[stage_is_complete & ~at_river])
+
+        showdown_tables = tables[stage_is_complete & at_river]
+        self.redistribute_wealth(
+            showdown_tables, self.showdown_winners(showdown_tables)
+        )
+
+        folded_tables = tables[over_due_to_folding]
+        winners = np.zeros((len(folded_tables), self.n_players), dtype=bool)
+        winners[np.arange(len(folded_tables)), next_players[over_due_to_folding]] = True
+        self.redistribute_wealth(folded_tables, winners)
+
+        return np.concatenate([showdown_tables, folded_tables])
+
+    def update(self, actions):
+
+        """
+        Take one action at every table (actions has shape (n_tables,))
+        """
+
+        self.terminal[:] = False
+
+        finished_tables = self.apply_actions(np.arange(self.n_tables), actions)
+        self.start_new_hands(finished_tables)
@@ -34,3 +34,24 @@ def test_agent():
 
     model_input_single_action = agent.get_model_input(private_state, actions=[-1])
     assert model_input_single_action.shape == (1, agent.n_inputs)
+
+
+def test_random_legal_action():
+
+    agents = [Agent(player_index=0, rng=np.random.default_rng(0)) for _ in range(2)]
+
+    random_actions = [
+        [
+            agent.random_legal_action(minimum_legal_bet=1, maximum_legal_bet=2)
+            for _ in range(100)
+        ]
+        for agent in agents
+    ]
+
+    assert random_actions[0] == random_actions[1]
+    assert set(random_actions[0]) == {-1, 1, 2}
+
+
+def test_agents_without_a_generator_do_not_share_one():
+
+    assert Agent(player_index=0).rng is not Agent(player_index=1).rng
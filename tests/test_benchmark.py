@@ -0,0 +1,20 @@
+from poker.benchmark import BENCHMARKS, compare_to_baseline, run_benchmarks
+
+
+def test_run_benchmarks():
+
+    results = run_benchmarks(min_seconds=0.0, n_repeats=1)
+
+    assert set(results["operations_per_second"]) == set(BENCHMARKS)
+    assert all(value > 0 for value in results["operations_per_second"].values())
+
+
+def test_compare_to_baseline():
+
+    baseline = {"operations_per_second": {"fast": 100.0, "slow": 100.0, "old": 1.0}}
+    results = {"operations_per_second": {"fast": 90.0, "slow": 70.0, "new": 1.0}}
+
+    ratios, regressions = compare_to_baseline(results, baseline, threshold=0.2)
+
+    assert ratios == {"fast": 0.9, "slow": 0.7}
+    assert regressions == ["slow"]
@@ -1,6 +1,16 @@
+import pickle
 from collections import Counter
 
-from poker.cards import Card, card_index, FULL_DECK, Rank, Suit
+from poker.cards import (
+    Card,
+    card_index,
+    cards_to_mask,
+    FULL_DECK,
+    FULL_DECK_MASK,
+    mask_to_cards,
+    Rank,
+    Suit,
+)
 
 
 def test_card_comparison():
@@ -40,3 +50,27 @@ def test_card_index():
 
     for index, card in enumerate(FULL_DECK):
         assert index == card_index(card)
+
+
+def test_card_is_an_int():
+
+    ace_of_spades = Card(Rank.ACE, Suit.SPADES)
+
+    assert ace_of_spades == 51
+    assert ace_of_spades.rank == Rank.ACE
+    assert ace_of_spades.suit == Suit.SPADES
+    assert repr(ace_of_spades) == "ACE of SPADES"
+
+    assert not hasattr(ace_of_spades, "__dict__")
+    assert len({ace_of_spades, Card(Rank.ACE, Suit.SPADES)}) == 1
+    assert pickle.loads(pickle.dumps(ace_of_spades)).rank == Rank.ACE
+
+
+def test_card_masks():
+
+    cards = [Card(Rank.TWO, Suit.HEARTS), Card(Rank.ACE, Suit.SPADES)]
+    mask = cards_to_mask(cards)
+
+    assert mask == 1 | (1 << 51)
+    assert mask_to_cards(mask) == cards
+    assert cards_to_mask(FULL_DECK) == FULL_DECK_MASK
@@ -0,0 +1,163 @@
+import contextlib
+import io
+
+import numpy as np
+import pytest
+
+import poker.play
+from poker.checkpoint import (
+    Checkpointer,
+    get_rng_states,
+    load_checkpoint,
+    set_rng_states,
+)
+from poker.dealing import DeckBuffer
+from poker.history import read_hand_history
+from poker.play import run_sarsa
+from poker.q_backends import HashedQTable
+
+
+def test_checkpointer(tmp_path):
+
+    path = str(tmp_path / "checkpoint.npz")
+
+    with Checkpointer(path) as checkpointer:
+        checkpointer.save({"values": np.arange(3)}, {"episode": 1})
+        checkpointer.save({"values": np.arange(4)}, {"episode": 2})
+
+    arrays, metadata = load_checkpoint(path)
+
+    assert checkpointer.n_saved == 2
+    assert np.all(arrays["values"] == np.arange(4))
+    assert metadata == {"episode": 2}
+
+
+def test_checkpointer_raises_write_errors(tmp_path):
+
+    checkpointer = Checkpointer(str(tmp_path / "missing" / "checkpoint.npz"))
+    checkpointer.save({"values": np.arange(3)}, {"episode": 1})
+
+    with pytest.raises(FileNotFoundError):
+        checkpointer.close()
+
+    with pytest.raises(FileNotFoundError):
+        checkpointer.save({"values": np.arange(4)}, {"episode": 2})
+
+    assert checkpointer.n_saved == 0
+
+
+def test_rng_and_deck_buffer_states():
+
+    rng = np.random.default_rng(0)
+    deck_buffer = DeckBuffer(9, rng=rng, buffer_size=4)
+    deck_buffer.next_deck()
+
+    rng_states = get_rng_states([rng])
+    deck_buffer_state = deck_buffer.get_state()
+    expected_decks = [deck_buffer.next_deck() for _ in range(6)]
+
+    set_rng_states([rng], rng_states)
+    deck_buffer.set_state(deck_buffer_state)
+
+    assert [deck_buffer.next_deck() for _ in range(6)] == expected_decks
+
+
+def run_sarsa_with_hashed_q_table(n_episodes, seed=0, **kwargs):
+
+    q_backend = HashedQTable(n_inputs=14, n_buckets=2**12)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_sarsa(
+            2,
+            n_episodes=n_episodes,
+            replay_capacity=500,
+            seed=seed,
+            q_backend=q_backend,
+            **kwargs,
+        )
+
+    return q_backend
+
+
+def test_run_sarsa_resumes_exactly(tmp_path):
+
+    path = str(tmp_path / "checkpoint.npz")
+
+    uninterrupted = run_sarsa_with_hashed_q_table(4)
+
+    # Note: the resumed run starts from a fresh table, and a different seed,
+    #  which are both replaced by the checkpoint
+    run_sarsa_with_hashed_q_table(2, checkpoint_path=path, checkpoint_every=1)
+    assert load_checkpoint(path)[1]["episode"] == 2
+
+    resumed = run_sarsa_with_hashed_q_table(
+        4, seed=1, checkpoint_path=path, resume=True
+    )
+
+    assert np.any(uninterrupted.values != 0)
+    assert np.array_equal(resumed.values, uninterrupted.values)
+    assert load_checkpoint(path)[1]["episode"] == 4
+
+
+def test_run_sarsa_resumes_hand_history(tmp_path):
+
+    path = str(tmp_path / "checkpoint.npz")
+
+    run_sarsa_with_hashed_q_table(4, hand_history_path=tmp_path / "uninterrupted.bin")
+
+    resumed_path = tmp_path / "resumed.bin"
+    run_sarsa_with_hashed_q_table(
+        2, checkpoint_path=path, hand_history_path=resumed_path
+    )
+
+    # Note: hands recorded after the checkpoint (here, a copy of the last hand and part of
+    #  another one) are removed when resuming
+    with open(resumed_path, "ab") as hand_history_file:
+        hand_history_file.write(read_hand_history(resumed_path)[-1:].tobytes() + b"\0")
+
+    run_sarsa_with_hashed_q_table(
+        4, checkpoint_path=path, hand_history_path=resumed_path, resume=True
+    )
+
+    with open(tmp_path / "uninterrupted.bin", "rb") as uninterrupted_file:
+        with open(resumed_path, "rb") as resumed_file:
+            assert resumed_file.read() == uninterrupted_file.read()
+
+
+def test_run_sarsa_closes_writers_when_training_raises(tmp_path, monkeypatch):
+
+    path = str(tmp_path / "checkpoint.npz")
+    resumed_path = tmp_path / "resumed.bin"
+
+    run_sarsa_with_hashed_q_table(4, hand_history_path=tmp_path / "uninterrupted.bin")
+
+    run_one_episode = poker.play.run_one_episode
+
+    def run_one_episode_until_crash(episode, *args, **kwargs):
+
+        if episode == 3:
+            raise RuntimeError("crash")
+
+        return run_one_episode(episode, *args, **kwargs)
+
+    monkeypatch.setattr(poker.play, "run_one_episode", run_one_episode_until_crash)
+
+    with pytest.raises(RuntimeError, match="crash"):
+        run_sarsa_with_hashed_q_table(
+            4, checkpoint_path=path, checkpoint_every=2, hand_history_path=resumed_path
+        )
+
+    # Note: the checkpoint of episode 2 is written, and the hands played are flushed,
+    #  so training resumes exactly as if it had not crashed
+    assert load_checkpoint(path)[1]["episode"] == 2
+    assert len(read_hand_history(resumed_path)) > 0
+
+    monkeypatch.setattr(poker.play, "run_one_episode", run_one_episode)
+
+    run_sarsa_with_hashed_q_table(
+        4, checkpoint_path=path, hand_history_path=resumed_path, resume=True
+    )
+
+    with open(tmp_path / "uninterrupted.bin", "rb") as uninterrupted_file:
+        with open(resumed_path, "rb") as resumed_file:
+            assert resumed_file.read() == uninterrupted_file.read()
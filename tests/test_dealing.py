@@ -0,0 +1,50 @@
+import numpy as np
+
+from poker.cards import FULL_DECK
+from poker.dealing import DeckBuffer, generate_decks, n_cards_to_deal, partial_shuffle
+from poker.state import State
+
+
+def test_partial_shuffle():
+
+    rng = np.random.default_rng(0)
+
+    deck = partial_shuffle(11, rng)
+
+    assert sorted(deck) == list(FULL_DECK)
+    assert partial_shuffle(0, rng) == list(FULL_DECK)
+
+    # Note: the first card dealt (the last card of the deck) is uniformly distributed
+    counts = np.bincount([partial_shuffle(1, rng)[-1] for _ in range(52_000)])
+    assert len(counts) == len(FULL_DECK)
+    assert np.all(np.abs(counts - 1000) < 150)
+
+
+def test_generate_decks():
+
+    decks = generate_decks(52_000, n_cards=3, rng=np.random.default_rng(0))
+
+    assert decks.shape == (52_000, len(FULL_DECK))
+    assert np.all(np.sort(decks, axis=1) == np.arange(len(FULL_DECK)))
+
+    # Note: each of the dealt positions is uniformly distributed, and cards are never repeated
+    for position in (-1, -2, -3):
+        counts = np.bincount(decks[:, position], minlength=len(FULL_DECK))
+        assert np.all(np.abs(counts - 1000) < 150)
+
+
+def test_deck_buffer():
+
+    deck_buffer = DeckBuffer(
+        n_cards_to_deal(3), rng=np.random.default_rng(0), buffer_size=4
+    )
+
+    decks = [deck_buffer.next_deck() for _ in range(10)]
+
+    for deck in decks:
+        assert sorted(deck) == list(FULL_DECK)
+
+    assert len(set(tuple(deck[-11:]) for deck in decks)) == len(decks)
+
+    state = State(n_players=3, deck_buffer=deck_buffer)
+    assert len(state.shuffled_deck) == len(FULL_DECK) - 6
@@ -0,0 +1,86 @@
+import pytest
+
+from poker.cards import FULL_DECK, Card, Rank, Suit
+from poker.equity import estimate_equity, estimate_equity_at_state
+from poker.state import State
+
+
+def test_pocket_aces():
+
+    pocket_aces = [Card(Rank.ACE, Suit.HEARTS), Card(Rank.ACE, Suit.SPADES)]
+
+    equity = estimate_equity(pocket_aces, max_samples=50_000, seed=0)
+
+    # Note: pocket aces win about 85% of the time against one random hand
+    assert equity.n_samples == 50_000
+    assert abs(equity.equity - 0.852) < 5 * equity.standard_error
+    assert equity.win + equity.tie <= 1.0
+
+
+def test_royal_flush_on_the_board():
+
+    hole_cards = [Card(Rank.TWO, Suit.CLUBS), Card(Rank.THREE, Suit.CLUBS)]
+    public_cards = [
+        Card(Rank.ACE, Suit.HEARTS),
+        Card(Rank.KING, Suit.HEARTS),
+        Card(Rank.QUEEN, Suit.HEARTS),
+        Card(Rank.JACK, Suit.HEARTS),
+        Card(Rank.TEN, Suit.HEARTS),
+    ]
+
+    equity = estimate_equity(hole_cards, public_cards, n_opponents=2, max_samples=1000)
+
+    # Note: every player plays the board, so the pot is always split three ways
+    assert equity.win == 0.0
+    assert equity.tie == 1.0
+    assert abs(equity.equity - 1 / 3) < 1e-9
+
+
+def test_stopping_rules():
+
+    hole_cards = [Card(Rank.SEVEN, Suit.CLUBS), Card(Rank.TWO, Suit.DIAMONDS)]
+
+    equity = estimate_equity(
+        hole_cards, target_standard_error=0.01, batch_size=1000, seed=0
+    )
+    assert equity.standard_error <= 0.01
+    assert equity.n_samples < 10_000
+
+    equity = estimate_equity(hole_cards, time_budget=0.0, batch_size=1000, seed=0)
+    assert equity.n_samples == 1000
+
+    equity = estimate_equity(hole_cards, max_samples=2500, batch_size=1000, seed=0)
+    assert equity.n_samples == 2500
+
+    with pytest.raises(ValueError):
+        estimate_equity(hole_cards, n_opponents=0)
+
+    ace_of_hearts = Card(Rank.ACE, Suit.HEARTS)
+
+    with pytest.raises(ValueError):
+        estimate_equity([ace_of_hearts, ace_of_hearts])
+
+    with pytest.raises(ValueError):
+        estimate_equity(hole_cards, public_cards=[ace_of_hearts, hole_cards[1]])
+
+    with pytest.raises(ValueError):
+        estimate_equity(hole_cards, public_cards=FULL_DECK[-6:])
+
+    with pytest.raises(ValueError):
+        estimate_equity(hole_cards, n_opponents=23)
+
+    # Note: 22 opponents use up the deck exactly
+    equity = estimate_equity(hole_cards, n_opponents=22, max_samples=100, seed=0)
+    assert equity.n_samples == 100
+
+
+def test_process_pool():
+
+    game_state = State(n_players=3)
+
+    equity = estimate_equity_at_state(
+        game_state, player_index=0, max_samples=7500, batch_size=1000, n_workers=2
+    )
+
+    assert equity.n_samples == 7500
+    assert 0.0 < equity.equity < 1.0
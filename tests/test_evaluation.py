@@ -0,0 +1,49 @@
+import numpy as np
+
+from poker.agent import Agent
+from poker.dealing import partial_shuffle
+from poker.evaluation import evaluate, play_hand, sequential_decision
+from poker.policy import Policy, random_weights
+
+
+def test_play_hand():
+
+    rng = np.random.default_rng(0)
+    players = [(Agent(seat, policy=Policy(), rng=rng), 1.0) for seat in range(3)]
+
+    for _ in range(20):
+        wealth_deltas = play_hand(players, partial_shuffle(11, rng), 100.0, 2, 1)
+
+        # Note: chips only move between players
+        assert abs(sum(wealth_deltas)) < 1e-9
+        assert any(wealth_delta != 0 for wealth_delta in wealth_deltas)
+
+
+def test_sequential_decision():
+
+    rng = np.random.default_rng(0)
+
+    assert sequential_decision(rng.normal(1.0, 1.0, 100), 5.0, 0.05, 0.05) == "better"
+    assert sequential_decision(rng.normal(-1.0, 1.0, 100), 5.0, 0.05, 0.05) == "worse"
+    assert sequential_decision(rng.normal(0.0, 1.0, 10), 5.0, 0.05, 0.05) is None
+
+
+def test_evaluate():
+
+    # Note: random play against itself is even, so the interval should contain 0
+    results = evaluate(None, None, max_deals=300, deals_per_batch=100, seed=0)
+
+    assert results["n_deals"] == 300
+    assert results["n_hands"] == 600
+    low, high = results["confidence_interval"]
+    assert low < results["big_blinds_per_100_hands"] < high
+
+    # Note: the same seed plays the same deals
+    assert evaluate(None, None, max_deals=300, seed=0) == results
+
+    # Note: a (deterministic) network plays very differently from random play, so the test stops early
+    weights = random_weights(np.random.default_rng(0), Agent(policy=Policy()).n_inputs)
+    results = evaluate(weights, None, min_deals=100, max_deals=2000, seed=0)
+
+    assert results["decision"] is not None
+    assert results["n_deals"] < 2000
@@ -0,0 +1,109 @@
+import numpy as np
+
+from poker.agent import Agent
+from poker.cards import FULL_DECK
+from poker.features import (
+    LEN_PRIVATE_STATE,
+    encode_private_state,
+    encode_private_states,
+    encode_vector_state,
+)
+from poker.q_backends import HashedQTable
+from poker.state import GameStage, State
+from poker.vector_state import VectorState
+
+
+def test_encode_private_state():
+
+    state = State(n_players=3, rng=np.random.default_rng(0))
+
+    for _ in range(4):
+
+        for player in range(state.n_players):
+
+            private_state = encode_private_state(state, player)
+            first_card, second_card = state.hole_cards[player]
+
+            assert private_state.dtype == np.float32
+            assert len(private_state) == LEN_PRIVATE_STATE
+            assert private_state[0] == state.game_stage
+            assert list(private_state[1:5]) == [
+                first_card.rank,
+                first_card.suit,
+                second_card.rank,
+                second_card.suit,
+            ]
+            assert private_state[5] == state.wealth[player]
+            assert private_state[6] == state.total_bet_by_player(player)
+
+            if state.game_stage == GameStage.PRE_FLOP:
+                assert np.all(private_state[7:] == -1)
+            else:
+                assert list(private_state[7:]) == [
+                    feature
+                    for card in state.public_cards[:3]
+                    for feature in (card.rank, card.suit)
+                ]
+
+        # Note: everyone calls, which moves the game to the next stage
+        for _ in range(state.n_players):
+            state.update(state.minimum_legal_bet())
+
+
+def test_encode_vector_state():
+
+    n_tables = 5
+    rng = np.random.default_rng(0)
+    decks = [rng.permutation(len(FULL_DECK)).tolist() for _ in range(n_tables)]
+
+    vector_state = VectorState(n_tables, n_players=3, decks=decks)
+    states = [
+        State(n_players=3, deck=[FULL_DECK[card] for card in deck]) for deck in decks
+    ]
+
+    for _ in range(8):
+
+        private_states = encode_private_states(
+            states, [state.current_player for state in states]
+        )
+        assert np.array_equal(encode_vector_state(vector_state), private_states)
+
+        actions = vector_state.minimum_legal_bet()
+        vector_state.update(actions)
+        for state, action in zip(states, actions):
+            state.update(action)
+
+
+class CountingQTable(HashedQTable):
+    def __init__(self, n_inputs):
+        super().__init__(n_inputs)
+        self.n_predictions = 0
+
+    def predict_batch(self, model_input):
+        self.n_predictions += 1
+        return super().predict_batch(model_input)
+
+
+def test_agent_caches_private_state_and_q():
+
+    agent = Agent(player_index=0, q_backend=CountingQTable(n_inputs=14))
+    state = State(n_players=3)
+    state.current_player = 0
+
+    private_state = agent.get_private_state(state)
+    action = agent.get_action(state, proba_random_action=0.0)
+
+    assert agent.get_private_state(state) is private_state
+    assert agent.predicted_q(private_state, action) == 0.0
+    assert agent.q_backend.n_predictions == 1
+
+    # Note: after an update, q is predicted again
+    agent.update_q(private_state, action, 1.0)
+    assert agent.predicted_q(private_state, action) > 0.0
+    assert agent.q_backend.n_predictions == 2
+
+    # Note: after an action, the state is encoded again, into the same buffer
+    state.update(action)
+    assert agent.get_private_state(state) is private_state
+    assert agent.cached_n_actions_taken == state.n_actions_taken
+    assert agent.cached_q is None
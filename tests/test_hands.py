@@ -1,5 +1,20 @@
-from poker.cards import Suit, Rank, Card
-from poker.hands import best_hand_strength, is_straight, strength, sort_hand
+from itertools import chain, combinations
+from random import Random
+
+import numpy as np
+
+from poker.cards import Suit, Rank, Card, FULL_DECK, card_index
+from poker.hands import (
+    EQUIVALENCE_CLASSES,
+    HandCategory,
+    batch_hand_strength,
+    best_hand_strength,
+    describe_hand_strength,
+    hand_category,
+    seven_card_tables,
+    strength,
+    sort_hand,
+)
 
 
 def test_sort_hand():
@@ -20,55 +35,6 @@ def test_sort_hand():
     assert sorted_hand[3].rank == sorted_hand[4].rank == Rank.ACE
 
 
-def test_straights():
-
-    straight = [
-        Card(Rank.SIX, Suit.SPADES),
-        Card(Rank.SEVEN, Suit.DIAMONDS),
-        Card(Rank.THREE, Suit.CLUBS),
-        Card(Rank.FOUR, Suit.CLUBS),
-        Card(Rank.FIVE, Suit.CLUBS),
-    ]
-
-    ace_low_straight = [
-        Card(Rank.THREE, Suit.CLUBS),
-        Card(Rank.FOUR, Suit.CLUBS),
-        Card(Rank.FIVE, Suit.CLUBS),
-        Card(Rank.ACE, Suit.SPADES),
-        Card(Rank.TWO, Suit.DIAMONDS),
-    ]
-
-    almost_ace_low_straight = [
-        Card(Rank.THREE, Suit.CLUBS),
-        Card(Rank.FOUR, Suit.CLUBS),
-        Card(Rank.SIX, Suit.CLUBS),
-        Card(Rank.ACE, Suit.SPADES),
-        Card(Rank.TWO, Suit.DIAMONDS),
-    ]
-
-    non_straight = [
-        Card(Rank.THREE, Suit.CLUBS),
-        Card(Rank.FOUR, Suit.CLUBS),
-        Card(Rank.FIVE, Suit.CLUBS),
-        Card(Rank.SIX, Suit.SPADES),
-        Card(Rank.EIGHT, Suit.DIAMONDS),
-    ]
-
-    another_non_straight = [
-        Card(Rank.ACE, Suit.HEARTS),
-        Card(Rank.ACE, Suit.SPADES),
-        Card(Rank.THREE, Suit.CLUBS),
-        Card(Rank.SEVEN, Suit.DIAMONDS),
-        Card(Rank.TWO, Suit.CLUBS),
-    ]
-
-    assert is_straight(sort_hand(straight)) == (True, Rank.SEVEN)
-    assert is_straight(sort_hand(ace_low_straight)) == (True, Rank.FIVE)
-    assert not is_straight(sort_hand(almost_ace_low_straight))[0]
-    assert not is_straight(sort_hand(non_straight))[0]
-    assert not is_straight(sort_hand(another_non_straight))[0]
-
-
 def test_best_hand_strength():
 
     # Note: the hole cards are a player's private cards
@@ -270,24 +236,151 @@ def test_hand_strengh():
     ]
 
     assert (
-        strength(royal_straight_flush)[0]
-        > strength(straight_flush)[0]
-        > strength(ace_low_straight_flush)[0]
-        > strength(four_aces)[0]
-        > strength(four_queens)[0]
-        > strength(flush_ace_high)[0]
-        > strength(flush_king_high)[0]
-        > strength(ace_high_straight)[0]
-        > strength(king_high_straight)[0]
-        > strength(six_high_straight)[0]
-        > strength(ace_low_straight)[0]
-        > strength(three_sevens)[0]
-        > strength(three_sixes)[0]
-        > strength(two_pair)[0]
-        > strength(pair_of_jacks)[0]
-        > strength(pair_of_eights)[0]
-        > strength(pair_of_sevens)[0]
-        > strength(queen_high)[0]
-        > strength(jack_high)[0]
-        > strength(nine_high)[0]
+        strength(royal_straight_flush)
+        > strength(straight_flush)
+        > strength(ace_low_straight_flush)
+        > strength(four_aces)
+        > strength(four_queens)
+        > strength(flush_ace_high)
+        > strength(flush_king_high)
+        > strength(ace_high_straight)
+        > strength(king_high_straight)
+        > strength(six_high_straight)
+        > strength(ace_low_straight)
+        > strength(three_sevens)
+        > strength(three_sixes)
+        > strength(two_pair)
+        > strength(pair_of_jacks)
+        > strength(pair_of_eights)
+        > strength(pair_of_sevens)
+        > strength(queen_high)
+        > strength(jack_high)
+        > strength(nine_high)
     )
+
+
+def test_equivalence_classes():
+
+    # Note: index zero is unused, so that hand strengths are always positive
+    assert len(EQUIVALENCE_CLASSES) == 7462 + 1
+
+    hand_categories = [category for category, _ in EQUIVALENCE_CLASSES[1:]]
+    assert hand_categories == sorted(hand_categories)
+    assert hand_categories.count(HandCategory.STRAIGHT_FLUSH) == 10
+    assert hand_categories.count(HandCategory.TWO_PAIR) == 858
+
+
+def test_kicker_tiebreaking():
+
+    jacks_and_threes_with_two = [
+        Card(Rank.JACK, Suit.CLUBS),
+        Card(Rank.JACK, Suit.HEARTS),
+        Card(Rank.THREE, Suit.DIAMONDS),
+        Card(Rank.THREE, Suit.HEARTS),
+        Card(Rank.TWO, Suit.HEARTS),
+    ]
+
+    jacks_and_threes_with_ace = [
+        Card(Rank.JACK, Suit.SPADES),
+        Card(Rank.JACK, Suit.DIAMONDS),
+        Card(Rank.THREE, Suit.CLUBS),
+        Card(Rank.THREE, Suit.SPADES),
+        Card(Rank.ACE, Suit.HEARTS),
+    ]
+
+    jacks_and_fours_with_two = [
+        Card(Rank.JACK, Suit.CLUBS),
+        Card(Rank.JACK, Suit.HEARTS),
+        Card(Rank.FOUR, Suit.DIAMONDS),
+        Card(Rank.FOUR, Suit.HEARTS),
+        Card(Rank.TWO, Suit.SPADES),
+    ]
+
+    same_hand_different_suits = [
+        Card(Rank.JACK, Suit.DIAMONDS),
+        Card(Rank.JACK, Suit.SPADES),
+        Card(Rank.THREE, Suit.CLUBS),
+        Card(Rank.THREE, Suit.SPADES),
+        Card(Rank.TWO, Suit.DIAMONDS),
+    ]
+
+    assert (
+        strength(jacks_and_fours_with_two)
+        > strength(jacks_and_threes_with_ace)
+        > strength(jacks_and_threes_with_two)
+    )
+    assert strength(jacks_and_threes_with_two) == strength(same_hand_different_suits)
+
+    assert hand_category(strength(jacks_and_threes_with_ace)) == HandCategory.TWO_PAIR
+    assert (
+        describe_hand_strength(strength(jacks_and_threes_with_ace))
+        == "two pair (JACK and THREE)"
+    )
+
+
+def test_best_hand_strength_matches_all_combinations():
+
+    random = Random(0)
+
+    for n_public_cards in (3, 4, 5):
+        for _ in range(2000):
+
+            cards = random.sample(FULL_DECK, n_public_cards + 2)
+            public_cards, hole_cards = cards[:n_public_cards], cards[n_public_cards:]
+
+            assert best_hand_strength(public_cards, hole_cards) == max(
+                strength(candidate_hand) for candidate_hand in combinations(cards, 5)
+            )
+
+
+def test_rank_dag():
+
+    rank_dag = seven_card_tables()["rank_dag"].reshape(-1, len(Rank) + 1)
+
+    # Note: there are 76155 multisets of at most seven ranks (with at most four cards per rank)
+    assert rank_dag.shape[0] == 76155
+
+    # Note: flushes are handled separately, so the strongest hand in the DAG is four aces
+    assert describe_hand_strength(rank_dag[:, -1].max()) == "four ACE"
+
+
+def test_batch_hand_strength():
+
+    random = Random(0)
+
+    for n_cards in (5, 6, 7):
+
+        hands = [random.sample(FULL_DECK, n_cards) for _ in range(1000)]
+        card_indexes = np.array([[card_index(card) for card in hand] for hand in hands])
+
+        hand_strengths = batch_hand_strength(card_indexes)
+
+        assert hand_strengths.shape == (len(hands),)
+        assert hand_strengths.tolist() == [
+            best_hand_strength(hand[2:], hand[:2]) for hand in hands
+        ]
+
+
+def test_batch_hand_strength_all_five_card_hands():
+
+    all_hands = np.fromiter(
+        chain.from_iterable(combinations(range(len(FULL_DECK)), 5)), dtype=np.int8
+    ).reshape(-1, 5)
+
+    hand_strength_counts = np.bincount(batch_hand_strength(all_hands))
+
+    category_counts = [0 for _ in HandCategory]
+    for hand_strength, count in enumerate(hand_strength_counts[1:], start=1):
+        category_counts[EQUIVALENCE_CLASSES[hand_strength][0]] += count
+
+    assert category_counts == [
+        1302540,
+        1098240,
+        123552,
+        54912,
+        10200,
+        5108,
+        3744,
+        624,
+        40,
+    ]
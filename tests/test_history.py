@@ -0,0 +1,134 @@
+from random import Random
+
+import numpy as np
+import pytest
+
+from poker.cards import FULL_DECK
+from poker.history import HandHistoryRecorder, HandHistoryWriter, read_hand_history
+from poker.state import State
+
+
+def play_random_game(writer, rng, n_players=3):
+
+    game_state = State(n_players=n_players, recorder=HandHistoryRecorder(writer))
+
+    actions = []
+    while not game_state.terminal:
+
+        legal_actions = [
+            action
+            for action in [-1, 0, 1, 2, 3]
+            if action < 0
+            or game_state.minimum_legal_bet()
+            <= action
+            <= game_state.maximum_legal_bet()
+        ]
+
+        action = rng.choice(legal_actions)
+        actions.append(action)
+        game_state.update(action)
+
+    return game_state
+
+
+def test_hand_history(tmp_path):
+
+    path = tmp_path / "hands.bin"
+    rng = Random(0)
+
+    # Note: a tiny buffer, so that several buffers are written by the background thread
+    with HandHistoryWriter(path, n_players=3, buffer_size=4) as writer:
+        final_states = [play_random_game(writer, rng) for _ in range(3)]
+
+    hands = read_hand_history(path)
+
+    assert len(hands) == writer.n_records > 4
+    assert np.all(hands["n_actions"] >= 2)
+
+    # Note: the hands of each game are numbered from zero
+    assert np.sum(hands["hand_index"] == 0) == len(final_states)
+
+    # Note: wealth is only moved between players, and only winners gain wealth
+    assert np.allclose(hands["wealth_deltas"].sum(axis=1), 0, atol=1e-4)
+    assert np.all(hands["winners"].any(axis=1))
+    assert np.all((hands["wealth_deltas"] <= 0) | hands["winners"])
+
+    for hand in hands:
+
+        n_actions = hand["n_actions"]
+        bets = hand["actions"][:n_actions]
+
+        # Note: the first two actions are the blinds
+        assert list(hand["action_stages"][:2]) == [0, 0]
+        assert np.all(bets[:2] > 0)
+        assert np.isclose(bets[bets > 0].sum(), hand["bets"].sum())
+
+        for stage in range(4):
+            stage_bets = bets[(hand["action_stages"][:n_actions] == stage) & (bets > 0)]
+            assert np.isclose(stage_bets.sum(), hand["bets"][stage].sum())
+
+        assert hand["n_cards"] == 52
+        assert sorted(hand["deck"]) == list(range(52))
+
+    # Note: replaying the last game's hands reproduces its final wealths
+    last_game = hands[np.flatnonzero(hands["hand_index"] == 0)[-1] :]
+    assert np.allclose(
+        100 + last_game["wealth_deltas"].sum(axis=0), final_states[-1].wealth, atol=1e-3
+    )
+
+
+def test_hand_history_raises_write_errors(tmp_path):
+
+    writer = HandHistoryWriter(
+        tmp_path / "hands.bin", n_players=3, buffer_size=4, max_pending_buffers=1
+    )
+
+    # Note: writing to a closed file raises a ValueError in the background thread
+    writer.file.close()
+
+    rng = Random(0)
+    with pytest.raises(ValueError):
+        for _ in range(100):
+            play_random_game(writer, rng)
+
+    with pytest.raises(ValueError):
+        writer.close()
+
+
+def test_hole_cards_are_dealt_from_recorded_deck(tmp_path):
+
+    path = tmp_path / "hands.bin"
+
+    with HandHistoryWriter(path, n_players=3) as writer:
+        game_state = State(n_players=3, recorder=HandHistoryRecorder(writer))
+        hole_cards = game_state.hole_cards
+
+        # Note: two of the three players fold, which ends the first hand
+        game_state.update(-1)
+        game_state.update(-1)
+
+    hand = read_hand_history(path)[0]
+
+    # Note: cards are dealt from the end of the deck, two at a time to each player
+    deck = list(hand["deck"][: hand["n_cards"]])
+    for player in range(3):
+        assert sorted(hole_cards[player]) == sorted(deck[-2 * player - 2 :][:2][::-1])
+
+
+def test_hand_dealt_from_injected_deck(tmp_path):
+
+    path = tmp_path / "hands.bin"
+    deck = list(FULL_DECK[:9])
+
+    with HandHistoryWriter(path, n_players=2) as writer:
+        game_state = State(
+            n_players=2, deck=list(deck), recorder=HandHistoryRecorder(writer)
+        )
+
+        # Note: the first player folds, which ends the first hand
+        game_state.update(-1)
+
+    hand = read_hand_history(path)[0]
+
+    assert hand["n_cards"] == len(deck)
+    assert list(hand["deck"][: hand["n_cards"]]) == deck
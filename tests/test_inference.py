@@ -0,0 +1,66 @@
+import numpy as np
+
+from poker.agent import Agent
+from poker.inference import NumpyQFunction, load_weights, save_weights
+from poker.state import State
+
+
+def get_weights(n_inputs=14, n_units=64, seed=0):
+
+    rng = np.random.default_rng(seed)
+
+    return [
+        rng.normal(size=(n_inputs, n_units)),
+        rng.normal(size=n_units),
+        rng.normal(size=(n_units, n_units)),
+        rng.normal(size=n_units),
+        rng.normal(size=(n_units, 1)),
+        rng.normal(size=1),
+    ]
+
+
+def test_numpy_q_function():
+
+    weights = get_weights()
+    q_function = NumpyQFunction(weights)
+
+    model_input = np.random.default_rng(1).normal(size=(5, 14))
+
+    first_layer = np.maximum(model_input @ weights[0] + weights[1], 0)
+    second_layer = np.maximum(first_layer @ weights[2] + weights[3], 0)
+    expected_q = second_layer @ weights[4] + weights[5]
+
+    q = q_function.predict(model_input)
+    assert q.shape == (5, 1)
+    assert q.dtype == np.float32
+    assert np.allclose(q, expected_q, rtol=1e-4, atol=1e-3)
+
+
+def test_save_and_load_weights(tmp_path):
+
+    weights = get_weights()
+    path = str(tmp_path / "weights")
+
+    save_weights(path, weights)
+    loaded_weights = load_weights(path)
+
+    assert len(loaded_weights) == len(weights)
+    assert all(np.array_equal(a, b) for a, b in zip(weights, loaded_weights))
+
+
+def test_agent_from_weights():
+
+    # Note: agents created from weights play without a keras model
+    agent = Agent(player_index=1, weights=get_weights())
+    assert agent.q_backend.model is None
+
+    game_state = State(n_players=3)
+    for _ in range(20):
+        game_state.update(agent.get_action(game_state, proba_random_action=0.0))
+
+    private_state = agent.get_private_state(game_state)
+    assert np.isfinite(agent.predicted_q(private_state, 0))
+
+    other_weights = get_weights(seed=1)
+    agent.set_weights(other_weights)
+    assert np.allclose(agent.get_weights()[0], other_weights[0])
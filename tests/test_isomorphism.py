@@ -0,0 +1,111 @@
+from itertools import combinations
+
+from poker.cards import FULL_DECK, Card, Rank, Suit
+from poker.hands import best_hand_strength
+from poker.isomorphism import (
+    LRUCache,
+    canonical_cards,
+    canonical_key,
+    cached_estimate_equity,
+    memoize,
+)
+
+
+def test_canonical_key_counts():
+
+    assert len({canonical_key(cards) for cards in combinations(FULL_DECK, 2)}) == 169
+    assert len({canonical_key(cards) for cards in combinations(FULL_DECK, 3)}) == 1755
+
+
+def test_canonical_key():
+
+    hole_cards = [Card(Rank.ACE, Suit.HEARTS), Card(Rank.KING, Suit.HEARTS)]
+    flop = [
+        Card(Rank.TWO, Suit.HEARTS),
+        Card(Rank.SEVEN, Suit.SPADES),
+        Card(Rank.NINE, Suit.CLUBS),
+    ]
+
+    # Note: the same hand with hearts and spades swapped, and the cards in another order
+    swapped_hole_cards = [Card(Rank.KING, Suit.SPADES), Card(Rank.ACE, Suit.SPADES)]
+    swapped_flop = [
+        Card(Rank.SEVEN, Suit.HEARTS),
+        Card(Rank.TWO, Suit.SPADES),
+        Card(Rank.NINE, Suit.CLUBS),
+    ]
+
+    assert canonical_key(hole_cards, flop) == canonical_key(
+        swapped_hole_cards, swapped_flop
+    )
+    assert canonical_cards(hole_cards, flop) == canonical_cards(
+        swapped_hole_cards, swapped_flop
+    )
+
+    # Note: which cards are hole cards matters
+    assert canonical_key(hole_cards, flop) != canonical_key(
+        flop[:2], hole_cards + flop[2:]
+    )
+
+    # Note: relabelling suits never changes a hand's strength
+    public_cards, canonical_hole_cards = canonical_cards(flop, hole_cards)
+    assert best_hand_strength(public_cards, canonical_hole_cards) == best_hand_strength(
+        flop, hole_cards
+    )
+
+
+def test_lru_cache():
+
+    cache = LRUCache(maxsize=2)
+
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+
+    # Note: "b" is now the least recently used entry
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert len(cache) == 2
+
+    assert cache.stats() == {
+        "size": 2,
+        "maxsize": 2,
+        "hits": 1,
+        "misses": 1,
+        "hit_rate": 0.5,
+    }
+
+
+def test_memoize():
+
+    calls = []
+
+    @memoize(canonical_key)
+    def count_calls(cards):
+        calls.append(cards)
+        return len(calls)
+
+    assert count_calls([Card(Rank.ACE, Suit.HEARTS)]) == 1
+    assert count_calls([Card(Rank.ACE, Suit.CLUBS)]) == 1
+    assert count_calls([Card(Rank.KING, Suit.CLUBS)]) == 2
+    assert count_calls.cache.hit_rate == 1 / 3
+
+
+def test_cached_estimate_equity():
+
+    hole_cards = [Card(Rank.ACE, Suit.HEARTS), Card(Rank.ACE, Suit.CLUBS)]
+    isomorphic_hole_cards = [Card(Rank.ACE, Suit.SPADES), Card(Rank.ACE, Suit.DIAMONDS)]
+
+    equity = cached_estimate_equity(hole_cards, max_samples=1000, seed=0)
+
+    assert (
+        cached_estimate_equity(isomorphic_hole_cards, max_samples=1000, seed=0)
+        is equity
+    )
+    assert cached_estimate_equity.cache.hits >= 1
+
+    # Note: options passed by position are part of the key
+    three_way_equity = cached_estimate_equity(hole_cards, (), 2, None, None, 1000)
+
+    assert three_way_equity is not equity
+    assert three_way_equity.equity < equity.equity
+    assert cached_estimate_equity(hole_cards, (), 1, None, None, 1000, seed=0) is equity
@@ -0,0 +1,213 @@
+import sys
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+# Note: we mock this module so that we don't import tensorflow during pytest
+sys.modules["poker.q_function"] = Mock()
+
+from poker.agent import Agent
+from poker.history import HandHistoryWriter, read_hand_history
+from poker.play import run_actor_learner, run_one_episode, run_sarsa
+from poker.q_backends import HashedQTable
+from poker.replay import ReplayBuffer
+
+
+class FakeModel:
+
+    # Note: a stand-in for the keras model, with the same layer shapes as get_model,
+    #  that counts how many times it is trained, and on how many rows
+    def __init__(self, n_inputs, n_units=64):
+
+        rng = np.random.default_rng(0)
+        self.weights = [
+            rng.normal(size=(n_inputs, n_units)),
+            np.zeros(n_units),
+            rng.normal(size=(n_units, n_units)),
+            np.zeros(n_units),
+            rng.normal(size=(n_units, 1)),
+            np.zeros(1),
+        ]
+        self.n_fit_calls = 0
+        self.batch_sizes = []
+
+    def train_on_batch(self, x, y):
+        assert len(x) == len(y)
+        self.n_fit_calls += 1
+        self.batch_sizes.append(len(x))
+
+    def get_weights(self):
+        return self.weights
+
+    def set_weights(self, weights):
+        self.weights = weights
+
+
+def get_players(n_players=3):
+
+    players = [Agent(player_index) for player_index in range(n_players)]
+
+    for player in players:
+        player.q_backend.model = FakeModel(player.n_inputs)
+
+    return players
+
+
+def test_run_one_episode():
+
+    players = get_players()
+
+    transitions = run_one_episode(episode=0, players=players)
+
+    assert len(transitions) > 0
+    assert sum(player.q_backend.model.n_fit_calls for player in players) == len(
+        transitions
+    )
+
+    for private_state, action, updated_guess_for_q in transitions:
+        assert len(private_state) == players[0].len_private_state
+        assert action in players[0].actions
+
+    # Note: transitions keep copies of the private states, not the agents' buffers
+    private_states = [private_state for private_state, _, _ in transitions]
+    assert len({id(private_state) for private_state in private_states}) == len(
+        transitions
+    )
+    assert not any(
+        private_state is player.private_state_buffer
+        for private_state in private_states
+        for player in players
+    )
+
+
+def test_run_one_episode_without_learning():
+
+    players = get_players()
+
+    transitions = run_one_episode(episode=0, players=players, learn=False)
+
+    assert len(transitions) > 0
+    assert sum(player.q_backend.model.n_fit_calls for player in players) == 0
+
+
+def test_run_one_episode_with_replay_buffer():
+
+    players = get_players()
+    replay_buffer = ReplayBuffer(
+        capacity=1000, len_private_state=players[0].len_private_state
+    )
+
+    n_transitions = 0
+    for episode in range(3):
+        n_transitions += len(
+            run_one_episode(
+                episode,
+                players,
+                replay_buffer=replay_buffer,
+                batch_size=4,
+                train_every=2,
+            )
+        )
+
+    assert replay_buffer.n_added == n_transitions
+
+    # Note: every update is a minibatch from the replay buffer
+    batch_sizes = [
+        size for player in players for size in player.q_backend.model.batch_sizes
+    ]
+    assert len(batch_sizes) > 0
+    assert set(batch_sizes) == {4}
+
+
+def test_run_one_episode_with_shared_policy():
+
+    players = get_players(n_players=1)
+    model = players[0].q_backend.model
+    players += [
+        Agent(player_index, q_backend=players[0].q_backend.share())
+        for player_index in range(1, 3)
+    ]
+
+    transitions = run_one_episode(episode=0, players=players)
+
+    assert model.n_fit_calls == len(transitions)
+
+    # Note: every seat plays with the latest published version of the shared policy
+    for player in players:
+        player.q_backend.sync_policy()
+        assert player.q_backend.model is model
+        assert player.q_backend.q_function is players[0].q_backend.policy.q_function
+
+
+def test_run_one_episode_with_hand_history(tmp_path):
+
+    players = get_players()
+
+    with HandHistoryWriter(tmp_path / "hands.bin", n_players=3) as hand_history:
+        run_one_episode(episode=0, players=players, hand_history=hand_history)
+
+    hands = read_hand_history(tmp_path / "hands.bin")
+
+    assert len(hands) == hand_history.n_records > 0
+
+
+def test_run_actor_learner():
+
+    q_backend = get_players(n_players=1)[0].q_backend
+
+    learner = run_actor_learner(
+        n_players=3,
+        n_episodes=8,
+        n_workers=2,
+        sync_interval=1,
+        seed=0,
+        q_backend=q_backend,
+        timeout=60.0,
+    )
+
+    assert learner.q_backend is q_backend
+    assert q_backend.model.n_fit_calls > 0
+
+
+def test_run_actor_learner_with_crashed_actor():
+
+    # Note: the learner's weights are for a network with the wrong number of inputs,
+    #  so actors crash as soon as they predict q with them
+    q_backend = get_players(n_players=1)[0].q_backend
+    q_backend.model = FakeModel(n_inputs=3)
+
+    with pytest.raises(RuntimeError):
+        run_actor_learner(
+            n_players=3,
+            n_episodes=4,
+            n_workers=2,
+            sync_interval=1,
+            q_backend=q_backend,
+            timeout=60.0,
+        )
+
+
+def test_run_actor_learner_rejects_invalid_arguments():
+
+    for n_workers, sync_interval in [(0, 1), (2, 0)]:
+        with pytest.raises(ValueError):
+            run_actor_learner(
+                n_players=3,
+                n_episodes=4,
+                n_workers=n_workers,
+                sync_interval=sync_interval,
+                q_backend=get_players(n_players=1)[0].q_backend,
+            )
+
+
+def test_run_sarsa_with_workers_rejects_unsupported_options(tmp_path):
+
+    with pytest.raises(ValueError):
+        run_sarsa(3, n_workers=2, checkpoint_path=tmp_path / "checkpoint.npz")
+
+    with pytest.raises(ValueError):
+        run_sarsa(3, n_workers=2, replay_capacity=1000)
+
+    with pytest.raises(ValueError, match="KerasQBackend"):
+        run_sarsa(3, n_workers=2, q_backend=HashedQTable(n_inputs=14))
@@ -0,0 +1,65 @@
+import numpy as np
+
+from poker.agent import Agent
+from poker.policy import Policy
+from poker.state import State
+
+
+def get_weights(n_inputs=14, n_units=8, seed=0):
+
+    rng = np.random.default_rng(seed)
+
+    return [
+        rng.normal(size=(n_inputs, n_units)),
+        rng.normal(size=n_units),
+        rng.normal(size=(n_units, 1)),
+        rng.normal(size=1),
+    ]
+
+
+def test_policy_versions():
+
+    policy = Policy(get_weights())
+
+    assert policy.version == 1
+    assert not policy.is_stale
+
+    for array in policy.q_function.get_weights():
+        assert array.dtype == np.float32
+        assert not array.flags.writeable
+
+    first_q_function = policy.q_function
+    policy.set_weights(get_weights(seed=1))
+
+    # Note: the previous version is replaced, not modified
+    assert policy.version == 2
+    assert policy.q_function is not first_q_function
+    assert np.allclose(first_q_function.get_weights()[0], get_weights()[0])
+
+
+def test_seats_share_policy():
+
+    policy = Policy(get_weights())
+    players = [Agent(player_index, policy=policy) for player_index in range(3)]
+
+    for player in players:
+        assert player.q_backend.model is None
+        assert player.q_backend.get_q_function() is policy.q_function
+
+    policy.set_weights(get_weights(seed=1))
+
+    # Note: seats keep playing with their snapshot until they sync
+    assert players[1].q_backend.get_q_function() is not policy.q_function
+
+    # Note: but their weights (e.g. for a checkpoint) are always the latest ones
+    assert np.allclose(players[1].q_backend.get_weights()[0], get_weights(seed=1)[0])
+
+    for player in players:
+        player.q_backend.sync_policy()
+        assert player.q_backend.get_q_function() is policy.q_function
+
+    game_state = State(n_players=3)
+    game_state.current_player = 0
+    assert (
+        players[0].get_action(game_state, proba_random_action=0.0) in players[0].actions
+    )
@@ -0,0 +1,66 @@
+from collections import Counter
+from itertools import combinations
+
+import pytest
+
+from poker import preflop, tables
+from poker.cards import Card, FULL_DECK, Rank, Suit
+from poker.preflop import (
+    describe_starting_hand,
+    generate_preflop_equity_table,
+    N_STARTING_HANDS,
+    preflop_equity,
+    representative_hole_cards,
+    starting_hand_index,
+)
+
+
+def test_starting_hand_index():
+
+    hand_counts = Counter(
+        starting_hand_index(*hole_cards) for hole_cards in combinations(FULL_DECK, 2)
+    )
+
+    assert len(hand_counts) == N_STARTING_HANDS
+
+    # Note: there are 6 ways to deal each pair, 4 for each suited hand and 12 for each offsuit hand
+    assert sorted(Counter(hand_counts.values()).items()) == [(4, 78), (6, 13), (12, 78)]
+
+    for index in range(N_STARTING_HANDS):
+        assert starting_hand_index(*representative_hole_cards(index)) == index
+
+    ace_king_suited = starting_hand_index(
+        Card(Rank.KING, Suit.CLUBS), Card(Rank.ACE, Suit.CLUBS)
+    )
+    assert describe_starting_hand(ace_king_suited) == "ACE KING suited"
+
+
+def test_preflop_equity_table(monkeypatch, tmp_path):
+
+    monkeypatch.setattr(tables, "TABLE_DIRECTORY", str(tmp_path))
+    monkeypatch.setattr(preflop, "PREFLOP_EQUITY", {})
+
+    pocket_aces = [Card(Rank.ACE, Suit.HEARTS), Card(Rank.ACE, Suit.CLUBS)]
+
+    with pytest.raises(FileNotFoundError):
+        preflop_equity(*pocket_aces)
+
+    table = generate_preflop_equity_table(n_samples=1000, max_opponents=2, n_workers=1)
+    assert table.shape == (N_STARTING_HANDS, 2, 5)
+
+    tables.save_table(preflop.PREFLOP_EQUITY_TABLE, table)
+
+    heads_up = preflop_equity(*pocket_aces)
+    three_way = preflop_equity(*pocket_aces, n_opponents=2)
+
+    assert heads_up.n_samples == 1000
+    assert abs(heads_up.equity - 0.852) < 0.06
+    assert three_way.equity < heads_up.equity
+
+    seven_two_offsuit = [Card(Rank.SEVEN, Suit.SPADES), Card(Rank.TWO, Suit.HEARTS)]
+    assert preflop_equity(*seven_two_offsuit).equity < 0.4
+
+    # Note: the table was generated for up to two opponents
+    for n_opponents in [0, 3]:
+        with pytest.raises(ValueError):
+            preflop_equity(*pocket_aces, n_opponents=n_opponents)
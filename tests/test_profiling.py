@@ -0,0 +1,88 @@
+import contextlib
+import csv
+import io
+import json
+import tracemalloc
+
+import numpy as np
+
+import poker.play
+from poker.agent import random_policy_players
+from poker.profiling import Profiler
+from poker.state import State
+
+
+def run_episodes(profiler, n_episodes):
+
+    players = random_policy_players(np.random.default_rng(0))
+
+    with profiler:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for episode in range(n_episodes):
+                poker.play.run_one_episode(episode, players, learn=False)
+
+
+def test_profiler_restores_originals():
+
+    original_update = State.update
+    original_run_one_episode = poker.play.run_one_episode
+
+    with Profiler():
+        assert State.update is not original_update
+
+    assert State.update is original_update
+    assert poker.play.run_one_episode is original_run_one_episode
+
+
+def test_profiler_only_stops_its_own_tracing():
+
+    with Profiler(track_allocations=True):
+        assert tracemalloc.is_tracing()
+
+    assert not tracemalloc.is_tracing()
+
+    # Note: tracing started by the caller keeps running after the profiler is disabled
+    tracemalloc.start()
+
+    with Profiler(track_allocations=True):
+        pass
+
+    assert tracemalloc.is_tracing()
+    tracemalloc.stop()
+
+
+def test_profiler_episode_summaries(tmp_path):
+
+    profiler = Profiler(track_allocations=True)
+    run_episodes(profiler, n_episodes=2)
+
+    assert len(profiler.episodes) == 2
+
+    for counters in profiler.episodes:
+        assert counters["run_one_episode"]["calls"] == 1
+        assert counters["State.update"]["calls"] > 0
+        assert counters["Agent.get_action"]["calls"] > 0
+        assert counters["predict"]["calls"] > 0
+        assert counters["fit"]["calls"] == 0
+
+        # Note: nested State.update calls are counted, but only timed once
+        assert (
+            counters["State.update"]["seconds"]
+            <= counters["run_one_episode"]["seconds"]
+        )
+
+    totals = profiler.totals()
+    assert totals["State.update"]["calls"] == sum(
+        counters["State.update"]["calls"] for counters in profiler.episodes
+    )
+
+    profiler.to_json(tmp_path / "profile.json")
+    with open(tmp_path / "profile.json") as json_file:
+        assert json.load(json_file)["totals"] == totals
+
+    profiler.to_csv(tmp_path / "profile.csv")
+    with open(tmp_path / "profile.csv") as csv_file:
+        rows = list(csv.DictReader(csv_file))
+
+    assert len(rows) == 2 * len(totals)
+    assert {row["episode"] for row in rows} == {"0", "1"}
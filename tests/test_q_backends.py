@@ -0,0 +1,111 @@
+import contextlib
+import io
+
+import numpy as np
+
+from poker.agent import Agent
+from poker.play import run_one_episode
+from poker.q_backends import HashedQTable, KerasQBackend
+from poker.state import State
+
+
+def test_hashed_q_table():
+
+    table = HashedQTable(n_inputs=3, n_buckets=1024, learning_rate=0.5)
+
+    model_input = np.array([[0, 1, 2], [0, 1, 3], [0.2, 1, 2]])
+
+    assert np.all(table.predict_batch(model_input) == 0)
+
+    for _ in range(20):
+        table.update_batch(model_input[:2], [1.0, -1.0])
+
+    predictions = table.predict_batch(model_input)
+
+    assert np.allclose(predictions[:2], [1.0, -1.0], atol=1e-4)
+
+    # Note: inputs that round to the same features share a value
+    assert predictions[2] == predictions[0]
+
+
+def test_hashed_q_table_save_and_load(tmp_path):
+
+    table = HashedQTable(n_inputs=2, n_buckets=64, learning_rate=1.0)
+    table.update_batch(np.array([[1, 2]]), [5.0])
+
+    # Note: the path is used as given, without adding ".npz"
+    table.save(tmp_path / "table")
+
+    other_table = HashedQTable(n_inputs=2)
+    other_table.load(tmp_path / "table")
+
+    assert other_table.n_buckets == 64
+    assert other_table.predict_batch(np.array([[1, 2]]))[0] == 5.0
+
+    other_table.copy_from(table)
+    assert table.share() is table
+
+
+def test_keras_q_backend_save_and_load(tmp_path):
+
+    rng = np.random.default_rng(0)
+    weights = [
+        rng.normal(size=(3, 4)),
+        np.zeros(4),
+        rng.normal(size=(4, 1)),
+        np.zeros(1),
+    ]
+
+    q_backend = KerasQBackend(n_inputs=3, n_actions=1, weights=weights)
+    q_backend.save(tmp_path / "weights.npz")
+
+    other_q_backend = KerasQBackend(
+        n_inputs=3, n_actions=1, weights=[w * 0 for w in weights]
+    )
+    other_q_backend.load(tmp_path / "weights.npz")
+
+    model_input = rng.normal(size=(5, 3))
+    assert np.allclose(
+        q_backend.predict_batch(model_input), other_q_backend.predict_batch(model_input)
+    )
+
+
+def test_agent_with_hashed_q_table():
+
+    agent = Agent(player_index=0, q_backend=HashedQTable(n_inputs=14, n_buckets=1024))
+
+    weights = agent.get_weights()
+    assert [values.shape for values in weights] == [(1024,)]
+
+    weights[0][:] = 1.0
+    other_agent = Agent(player_index=0, q_backend=HashedQTable(n_inputs=14))
+    other_agent.set_weights(weights)
+
+    assert other_agent.q_backend.n_buckets == 1024
+    np.testing.assert_array_equal(other_agent.get_weights()[0], weights[0])
+
+    # Note: get_weights returns a copy, which doesn't change with the table
+    weights[0][:] = 2.0
+    assert np.all(other_agent.q_backend.values == 1.0)
+
+    game_state = State(n_players=3)
+    action = other_agent.get_action(game_state, proba_random_action=0.0)
+
+    assert action == -1 or (
+        game_state.minimum_legal_bet() <= action <= game_state.maximum_legal_bet()
+    )
+
+
+def test_run_one_episode_with_hashed_q_table():
+
+    learner = Agent(player_index=0, q_backend=HashedQTable(n_inputs=14))
+    players = [learner] + [
+        Agent(player_index, q_backend=learner.q_backend.share())
+        for player_index in range(1, 3)
+    ]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        transitions = run_one_episode(episode=0, players=players)
+
+    assert len(transitions) > 0
+    assert np.any(learner.q_backend.values != 0)
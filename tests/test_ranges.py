@@ -0,0 +1,146 @@
+import numpy as np
+import pytest
+
+from poker.cards import Card, Rank, Suit, cards_to_mask
+from poker.hands import best_hand_strength
+from poker.ranges import (
+    COMBO_MASKS,
+    COMBOS,
+    N_COMBOS,
+    combo_equities,
+    combo_index,
+    equity_matrix,
+    expand_starting_hands,
+    multiway_equity,
+    range_equity,
+    remove_blocked_combos,
+    runouts,
+)
+
+BOARD = [
+    Card(Rank.TWO, Suit.HEARTS),
+    Card(Rank.SEVEN, Suit.DIAMONDS),
+    Card(Rank.NINE, Suit.CLUBS),
+    Card(Rank.JACK, Suit.SPADES),
+    Card(Rank.THREE, Suit.HEARTS),
+]
+
+
+def pair_range(rank):
+
+    # Note: pairs are on the diagonal of the grid of starting hands
+    starting_hand_weights = np.zeros(len(Rank) ** 2)
+    starting_hand_weights[rank * len(Rank) + rank] = 1.0
+
+    return expand_starting_hands(starting_hand_weights)
+
+
+def test_combos():
+
+    assert N_COMBOS == 1326
+    assert len(set(COMBO_MASKS.tolist())) == N_COMBOS
+
+    for index in [0, 100, N_COMBOS - 1]:
+        first, second = COMBOS[index]
+        assert combo_index(first, second) == combo_index(second, first) == index
+        assert int(COMBO_MASKS[index]) == cards_to_mask([int(first), int(second)])
+
+    assert expand_starting_hands(np.ones(len(Rank) ** 2)).sum() == N_COMBOS
+    assert pair_range(Rank.ACE).sum() == 6
+
+    aces = [Card(Rank.ACE, Suit.HEARTS), Card(Rank.ACE, Suit.SPADES)]
+    assert remove_blocked_combos(pair_range(Rank.ACE), aces[:1]).sum() == 3
+
+
+def test_river_equity_matrix():
+
+    matrix = equity_matrix(BOARD)
+
+    rng = np.random.default_rng(0)
+    for index, other_index in rng.integers(N_COMBOS, size=(50, 2)):
+
+        hole_cards = [Card(*divmod(card, len(Suit))) for card in COMBOS[index]]
+        other_hole_cards = [
+            Card(*divmod(card, len(Suit))) for card in COMBOS[other_index]
+        ]
+
+        if COMBO_MASKS[index] & COMBO_MASKS[other_index] or (
+            cards_to_mask(BOARD) & int(COMBO_MASKS[index] | COMBO_MASKS[other_index])
+        ):
+            assert matrix.n_runouts[index, other_index] == 0
+            continue
+
+        strength = best_hand_strength(BOARD, hole_cards)
+        other_strength = best_hand_strength(BOARD, other_hole_cards)
+
+        assert matrix.n_runouts[index, other_index] == 1
+        assert matrix.equity[index, other_index] == (
+            1.0
+            if strength > other_strength
+            else 0.5
+            if strength == other_strength
+            else 0.0
+        )
+
+    # Note: the equities of two combos against each other add up to 1
+    is_possible = matrix.n_runouts > 0
+    assert np.allclose((matrix.equity + matrix.equity.T)[is_possible], 1.0)
+
+    # Note: on this board, aces always beat kings
+    assert range_equity(matrix, pair_range(Rank.ACE), pair_range(Rank.KING)) == 1.0
+
+    uniform_range = np.ones(N_COMBOS)
+    assert range_equity(matrix, uniform_range, uniform_range) == pytest.approx(0.5)
+
+    equities = combo_equities(matrix, uniform_range)
+    assert equities.shape == (N_COMBOS,)
+    assert equities[combo_index(BOARD[0], BOARD[1])] == 0.0
+
+
+def test_turn_equity_matrix():
+
+    matrix = equity_matrix(BOARD[:4])
+
+    # Note: every river but the four cards dealt to the two combos
+    index = combo_index(Card(Rank.ACE, Suit.HEARTS), Card(Rank.ACE, Suit.SPADES))
+    other_index = combo_index(
+        Card(Rank.KING, Suit.HEARTS), Card(Rank.KING, Suit.SPADES)
+    )
+    assert matrix.n_runouts[index, other_index] == 52 - 4 - 4
+
+    # Note: kings only win if the river is one of the two other kings
+    assert matrix.equity[index, other_index] == pytest.approx(42 / 44)
+
+
+def test_sampled_equity_matrix():
+
+    with pytest.raises(ValueError):
+        runouts([])
+
+    matrix = equity_matrix([], n_runouts=200, seed=0)
+    equity = range_equity(matrix, pair_range(Rank.ACE), pair_range(Rank.KING))
+
+    # Note: aces are about 82% against kings before the flop
+    assert 0.7 < equity < 0.95
+
+
+def test_multiway_equity():
+
+    uniform_range = np.ones(N_COMBOS)
+
+    equities = multiway_equity([uniform_range] * 3, BOARD, n_samples=20_000, seed=0)
+    assert equities.sum() == pytest.approx(1.0)
+    assert np.allclose(equities, 1 / 3, atol=0.02)
+
+    equities = multiway_equity(
+        [pair_range(Rank.ACE), pair_range(Rank.KING)], BOARD, seed=0
+    )
+    assert np.allclose(equities, [1.0, 0.0])
+
+    # Note: both players can only hold the same two aces
+    only_aces = np.zeros(N_COMBOS)
+    only_aces[combo_index(Card(Rank.ACE, Suit.HEARTS), Card(Rank.ACE, Suit.SPADES))] = 1
+
+    for ranges in [[uniform_range, np.zeros(N_COMBOS)], [only_aces, only_aces]]:
+        with pytest.raises(ValueError):
+            multiway_equity(ranges, BOARD, seed=0)
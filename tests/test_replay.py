@@ -0,0 +1,54 @@
+import numpy as np
+
+from poker.replay import ReplayBuffer
+
+
+def test_replay_buffer_wraps_around():
+
+    replay_buffer = ReplayBuffer(capacity=4, len_private_state=3)
+
+    assert len(replay_buffer) == 0
+    assert replay_buffer.nbytes == 4 * (3 * 4 + 4 + 4 + 3 * 4 + 4 + 1)
+
+    for step in range(6):
+        replay_buffer.add(
+            np.full(3, step), step, -step, np.full(3, step + 1), step + 1, step == 5
+        )
+
+    assert len(replay_buffer) == 4
+    assert replay_buffer.n_added == 6
+
+    # Note: the two oldest transitions have been overwritten
+    assert sorted(replay_buffer.actions) == [2, 3, 4, 5]
+    assert replay_buffer.terminal.sum() == 1
+
+
+def test_replay_buffer_sample():
+
+    replay_buffer = ReplayBuffer(
+        capacity=100, len_private_state=3, rng=np.random.default_rng(0)
+    )
+
+    for step in range(10):
+        replay_buffer.add(
+            np.full(3, step), step, -step, np.full(3, step + 1), step + 1, False
+        )
+
+    (
+        private_states,
+        actions,
+        rewards,
+        next_private_states,
+        next_actions,
+        terminal,
+    ) = replay_buffer.sample(32)
+
+    assert private_states.shape == (32, 3)
+    assert next_private_states.shape == (32, 3)
+
+    # Note: only the rows that have been filled are sampled
+    assert np.all(actions < 10)
+    assert np.all(private_states[:, 0] == actions)
+    assert np.all(rewards == -actions)
+    assert np.all(next_actions == actions + 1)
+    assert not terminal.any()
@@ -0,0 +1,199 @@
+import asyncio
+import json
+import logging
+
+import numpy as np
+
+from poker.agent import Agent
+from poker.policy import Policy
+from poker.server import (
+    GameServer,
+    PlayerView,
+    QueueClient,
+    TableMetrics,
+    accept_socket_clients,
+    run_queue_agents,
+    run_socket_agents,
+)
+from poker.state import State
+
+
+def random_agents(n_players, seed=0):
+
+    # Note: agents without weights, which only play random legal actions
+    rng = np.random.default_rng(seed)
+    return [
+        Agent(player_index, policy=Policy(), rng=rng)
+        for player_index in range(n_players)
+    ]
+
+
+def test_player_view():
+
+    game_state = State(n_players=3)
+    view = PlayerView.from_state(game_state, table_index=0)
+
+    player_index = game_state.current_player
+    assert view.hole_cards[player_index] == game_state.hole_cards[player_index]
+    assert sum(cards is not None for cards in view.hole_cards) == 1
+
+    assert view.minimum_legal_bet() == game_state.minimum_legal_bet()
+    assert view.maximum_legal_bet() == game_state.maximum_legal_bet()
+
+    copied_view = PlayerView.from_dict(view.to_dict())
+    assert copied_view.hole_cards == view.hole_cards
+    assert copied_view.game_stage == view.game_stage
+
+    agent = random_agents(3)[player_index]
+    assert view.is_legal(agent.get_action(copied_view, proba_random_action=1.0))
+
+
+async def run_queue_server(n_tables, n_players, n_hands, **kwargs):
+
+    clients = [QueueClient(max_pending=4) for _ in range(n_players)]
+    bots = [
+        asyncio.ensure_future(run_queue_agents(client, random_agents(n_players), 1.0))
+        for client in clients
+    ]
+
+    server = GameServer([clients] * n_tables, seed=0, **kwargs)
+    metrics = await server.run(n_hands)
+
+    for bot in bots:
+        bot.cancel()
+
+    return metrics
+
+
+def test_game_server_with_queue_clients():
+
+    metrics = asyncio.run(run_queue_server(n_tables=16, n_players=3, n_hands=5))
+
+    assert len(metrics) == 16
+
+    for table_metrics in metrics:
+        assert table_metrics["n_hands"] == 5
+        assert table_metrics["n_decisions"] > 0
+        assert table_metrics["n_timeouts"] == 0
+        assert table_metrics["n_illegal_actions"] == 0
+        assert table_metrics["max_latency"] >= table_metrics["p50_latency"]
+
+
+class SilentClient:
+
+    # Note: a client that accepts every decision, and never makes it
+    async def send(self, view):
+
+        return asyncio.get_running_loop().create_future()
+
+
+def test_game_server_times_out():
+
+    server = GameServer([[SilentClient(), SilentClient()]], action_timeout=0.01)
+    [metrics] = asyncio.run(server.run(n_hands=2))
+
+    assert metrics["n_hands"] == 2
+    assert metrics["n_timeouts"] == metrics["n_decisions"] > 0
+
+
+class BoolClient:
+
+    # Note: a client that answers every decision with JSON true, which is not a bet
+    async def send(self, view):
+
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(json.loads("true"))
+        return future
+
+
+def test_game_server_rejects_bool_actions():
+
+    server = GameServer([[BoolClient(), BoolClient()]])
+    [metrics] = asyncio.run(server.run(n_hands=2))
+
+    assert metrics["n_illegal_actions"] == metrics["n_decisions"] > 0
+
+
+def test_table_metrics_latency_histogram():
+
+    metrics = TableMetrics()
+    for latency in np.linspace(0.001, 0.1, 100_000):
+        metrics.record_latency(latency)
+
+    # Note: the histogram has a fixed size, and its percentiles are within a bucket's width
+    summary = metrics.summary()
+    assert metrics.latency_counts.sum() == summary["n_decisions"] == 100_000
+    assert np.isclose(summary["mean_latency"], 0.0505)
+    assert 0.0505 <= summary["p50_latency"] <= 0.0505 * 1.13
+    assert 0.099 <= summary["p99_latency"] <= summary["max_latency"] == 0.1
+
+
+async def run_socket_server(n_tables, n_players, n_hands):
+
+    listener, connected = await accept_socket_clients(n_clients=1)
+    host, port = listener.sockets[0].getsockname()[:2]
+
+    bot = asyncio.ensure_future(
+        run_socket_agents(host, port, random_agents(n_players), 1.0)
+    )
+    [client] = await connected
+
+    server = GameServer([[client] * n_players] * n_tables, seed=0)
+    metrics = await server.run(n_hands)
+
+    await client.close()
+    listener.close()
+    await bot
+
+    return metrics
+
+
+def test_game_server_with_socket_clients():
+
+    metrics = asyncio.run(run_socket_server(n_tables=4, n_players=2, n_hands=3))
+
+    for table_metrics in metrics:
+        assert table_metrics["n_hands"] == 3
+        assert table_metrics["n_timeouts"] == 0
+        assert table_metrics["n_illegal_actions"] == 0
+
+
+async def answer_after_malformed_lines():
+
+    listener, connected = await accept_socket_clients(n_clients=1)
+    host, port = listener.sockets[0].getsockname()[:2]
+
+    reader, writer = await asyncio.open_connection(host, port)
+    [client] = await connected
+
+    view = PlayerView.from_state(State(n_players=2), table_index=0)
+    future = await client.send(view)
+
+    request = json.loads(await reader.readline())
+
+    # Note: the malformed lines are skipped, and the answer after them is still read
+    writer.write(b"not json\n")
+    writer.write(json.dumps({"request_id": request["request_id"]}).encode() + b"\n")
+    writer.write(json.dumps([request["request_id"]]).encode() + b"\n")
+    writer.write(
+        json.dumps({"request_id": request["request_id"], "action": -1}).encode() + b"\n"
+    )
+    await writer.drain()
+
+    action = await asyncio.wait_for(future, 5.0)
+
+    writer.close()
+    await client.close()
+    listener.close()
+
+    return action, client.n_malformed_messages
+
+
+def test_socket_client_ignores_malformed_lines(caplog):
+
+    with caplog.at_level(logging.WARNING, logger="poker.server"):
+        action, n_malformed_messages = asyncio.run(answer_after_malformed_lines())
+
+    assert action == -1
+    assert n_malformed_messages == 3
+    assert sum("malformed" in record.message for record in caplog.records) == 3
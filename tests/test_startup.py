@@ -0,0 +1,35 @@
+import subprocess
+import sys
+
+# Note: generous limits, since these guard against regressions like importing tensorflow
+#  (which takes seconds) rather than measuring startup precisely
+MAX_IMPORT_SECONDS = {"poker.state": 2.0, "poker.hands": 2.0, "poker.play": 3.0}
+
+
+def import_in_new_process(module):
+
+    code = (
+        "import sys, time\n"
+        "start_time = time.perf_counter()\n"
+        f"import {module}\n"
+        "print(time.perf_counter() - start_time)\n"
+        "print('tensorflow' in sys.modules)\n"
+    )
+
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, check=True, text=True
+    ).stdout.split()
+
+    return float(output[0]), output[1] == "True"
+
+
+def test_startup_time():
+
+    for module, max_seconds in MAX_IMPORT_SECONDS.items():
+
+        import_seconds, imported_tensorflow = import_in_new_process(module)
+
+        assert not imported_tensorflow
+        assert (
+            import_seconds < max_seconds
+        ), f"importing {module} took {import_seconds}s"
@@ -1,3 +1,7 @@
+from random import Random
+
+import numpy as np
+
 from poker.cards import Card, Rank, Suit
 from poker.state import GameStage, State
 from poker.utils import argmax
@@ -302,7 +306,7 @@ def test_state():
 
     # Note: even though the stage has not ended, all public cards have
     #  been dealt and we can calculate hand strengths
-    hand_strengths, hand_descriptions = state.calculate_best_hand_strengths()
+    hand_strengths = state.calculate_best_hand_strengths()
     winning_players = argmax(hand_strengths)
 
     # Note: there may be multiple winning players (a tie)
@@ -327,3 +331,66 @@ def test_state():
         / len(winning_players)
     )
     assert state.wealth[winning_players[0]] == wealth_before_winning + amount_won
+
+
+def test_running_bet_totals():
+
+    state = State(n_players=4)
+    rng = Random(0)
+
+    for _ in range(500):
+
+        action = rng.choice(
+            [-1, state.minimum_legal_bet(), state.maximum_legal_bet()]
+            if state.minimum_legal_bet() <= state.maximum_legal_bet()
+            else [-1]
+        )
+        state.update(action)
+
+        if state.terminal:
+            break
+
+        # Note: the running totals always match the per-stage bet history
+        for stage in GameStage:
+            for player in range(state.n_players):
+                assert state.stage_bets[stage][player] == sum(
+                    state.bets_by_stage[stage][player]
+                )
+
+        for player in range(state.n_players):
+            assert state.total_bet_by_player(player) == sum(
+                sum(state.bets_by_stage[stage][player]) for stage in GameStage
+            )
+
+        assert state.total_bets() == sum(state.player_bets)
+
+
+def test_seeded_states_are_reproducible():
+
+    states = [State(n_players=3, rng=np.random.default_rng(0)) for _ in range(2)]
+
+    for _ in range(200):
+
+        assert states[0].hole_cards == states[1].hole_cards
+        assert states[0].public_cards == states[1].public_cards
+        assert states[0].wealth == states[1].wealth
+
+        if states[0].terminal:
+            break
+
+        action = states[0].minimum_legal_bet()
+        for state in states:
+            state.update(action)
+
+    other_state = State(n_players=3, rng=np.random.default_rng(1))
+    assert (
+        other_state.hole_cards
+        != State(n_players=3, rng=np.random.default_rng(0)).hole_cards
+    )
+
+
+def test_states_without_a_generator_do_not_share_one():
+
+    # Note: each State gets a generator of its own, so its cards don't depend on
+    #  how many draws other States have made
+    assert State(n_players=3).rng is not State(n_players=3).rng
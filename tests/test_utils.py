@@ -1,4 +1,6 @@
-from poker.utils import argmax
+import numpy as np
+
+from poker.utils import argmax, spawn_generators
 
 
 def test_argmax():
@@ -17,3 +19,17 @@ def test_argmax():
 
     values = [0, 55, 99, 99]
     assert argmax(values) == [2, 3]
+
+
+def test_spawn_generators():
+
+    first_generators = spawn_generators(0, n_generators=3)
+    second_generators = spawn_generators(np.random.SeedSequence(0), n_generators=3)
+
+    draws = [generator.random(5) for generator in first_generators]
+
+    for generator, first_draws in zip(second_generators, draws):
+        assert np.array_equal(generator.random(5), first_draws)
+
+    # Note: the generators are independent of each other
+    assert not np.array_equal(draws[0], draws[1])
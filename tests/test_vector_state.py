@@ -0,0 +1,129 @@
+import numpy as np
+
+from poker.cards import FULL_DECK
+from poker.state import State
+from poker.vector_state import VectorState
+
+
+def test_vector_state_matches_state(monkeypatch):
+
+    n_tables = 20
+    n_players = 3
+    initial_wealth = 20.0
+    actions = np.array([-1, 0, 1, 2, 5, 10])
+
+    rng = np.random.default_rng(0)
+
+    # Note: each table draws its decks from its own list, so that table i
+    #  of the vector state is dealt exactly the same cards as states[i]
+    decks_by_table = [
+        [rng.permutation(len(FULL_DECK)).tolist() for _ in range(200)]
+        for _ in range(n_tables)
+    ]
+    next_deck = [1 for _ in range(n_tables)]
+
+    def next_decks(tables):
+        decks = [decks_by_table[table][next_deck[table]] for table in tables]
+        for table in tables:
+            next_deck[table] += 1
+        return np.array(decks).reshape(len(tables), len(FULL_DECK))
+
+    vector_state = VectorState(
+        n_tables,
+        n_players=n_players,
+        initial_wealth=initial_wealth,
+        decks=[decks[0] for decks in decks_by_table],
+    )
+    vector_state.new_decks = next_decks
+
+    states = [
+        State(
+            n_players=n_players,
+            initial_wealth=initial_wealth,
+            deck=[FULL_DECK[card] for card in decks_by_table[table][0]],
+        )
+        for table in range(n_tables)
+    ]
+
+    for _ in range(500):
+
+        minimum_legal_bet = vector_state.minimum_legal_bet()
+        maximum_legal_bet = vector_state.maximum_legal_bet()
+
+        legal_actions = vector_state.legal_action_mask(actions)
+        chosen_actions = np.array(
+            [rng.choice(actions[legal_actions[table]]) for table in range(n_tables)]
+        )
+
+        for table, state in enumerate(states):
+
+            if state is None:
+                continue
+
+            assert state.minimum_legal_bet() == minimum_legal_bet[table]
+            assert state.maximum_legal_bet() == maximum_legal_bet[table]
+
+            # Note: if this action ends the hand, State deals its next hand from new_deck
+            deck = [FULL_DECK[card] for card in decks_by_table[table][next_deck[table]]]
+            monkeypatch.setattr(state, "new_deck", lambda: deck)
+
+            state.update(chosen_actions[table])
+
+        vector_state.update(chosen_actions)
+
+        for table, state in enumerate(states):
+
+            if state is None:
+                continue
+
+            if state.terminal:
+                # Note: the vector state restarts finished tables, so we stop comparing them
+                assert vector_state.terminal[table]
+                assert np.allclose(state.wealth, vector_state.final_wealth[table])
+                states[table] = None
+                continue
+
+            assert not vector_state.terminal[table]
+            assert np.allclose(state.wealth, vector_state.wealth[table])
+            assert state.dealer == vector_state.dealer[table]
+            assert state.current_player == vector_state.current_player[table]
+            assert state.game_stage == vector_state.game_stage[table]
+            assert state.has_folded == vector_state.has_folded[table].tolist()
+            assert state.hole_cards == vector_state.hole_cards[table].tolist()
+            assert (
+                state.public_cards
+                == vector_state.public_cards[table, : len(state.public_cards)].tolist()
+            )
+
+    # Note: every game has ended at least once, so we compared whole games
+    assert all(state is None for state in states)
+
+
+def test_vector_state_random_play():
+
+    n_tables = 1000
+    actions = np.array([-1, 0, 1, 2, 4, 8])
+
+    vector_state = VectorState(n_tables, rng=np.random.default_rng(1))
+    rng = np.random.default_rng(2)
+
+    n_games = 0
+
+    for _ in range(200):
+
+        legal_actions = vector_state.legal_action_mask(actions)
+        assert legal_actions[:, 0].all()
+
+        # Note: pick a uniformly random legal action at every table
+        scores = np.where(legal_actions, rng.random(legal_actions.shape), -1)
+        vector_state.update(actions[np.argmax(scores, axis=1)])
+
+        n_games += vector_state.terminal.sum()
+
+        # Note: wealth is only ever moved between players
+        assert np.allclose(vector_state.wealth.sum(axis=1), 3 * 100.0)
+        assert np.allclose(
+            vector_state.final_wealth[vector_state.terminal].sum(axis=1), 3 * 100.0
+        )
+
+    assert n_games > 0